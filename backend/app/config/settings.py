@@ -2,21 +2,137 @@ from pydantic_settings import BaseSettings
 
 class Settings(BaseSettings):
     DATABASE_URL: str
+    # Comma-separated read replicas for read-only endpoints
+    DATABASE_REPLICA_URLS: str = ""
+    # After a write, the client's reads stay on the primary this long
+    READ_YOUR_WRITES_SECONDS: int = 10
+    DB_POOL_SIZE: int = 10
+    DB_MAX_OVERFLOW: int = 20
+    DB_POOL_TIMEOUT_SECONDS: int = 30
+    DB_POOL_RECYCLE_SECONDS: int = 1800
+    DB_POOL_PRE_PING: bool = True
     SECRET_KEY: str
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 60
+    # Password hashing: bcrypt cost and its dedicated thread pool
+    BCRYPT_ROUNDS: int = 12
+    BCRYPT_WORKERS: int = 4
+    BCRYPT_QUEUE_SIZE: int = 32
+    # In-process caches of user identities (for tokens without claims) and organizations
+    IDENTITY_CACHE_SIZE: int = 10000
+    IDENTITY_CACHE_TTL_SECONDS: float = 300
     
     RPC_URL: str = ""
     PRIVATE_KEY: str = ""
     CONTRACT_ADDRESS: str = ""
+    # CertificateVerifierV2 (bytes32 keys); new certificates go here when set
+    CONTRACT_V2_ADDRESS: str = ""
+
+    # RPC endpoints: comma-separated RPC_URLS takes precedence over RPC_URL.
+    # Reads go to the fastest healthy endpoint, writes stick to one.
+    RPC_URLS: str = ""
+    RPC_TIMEOUT_SECONDS: float = 10
+    RPC_POOL_SIZE: int = 20
+    RPC_MAX_CONSECUTIVE_FAILURES: int = 3
+    RPC_COOLDOWN_SECONDS: int = 30
+    RPC_HEDGE_READS: bool = False
+    RPC_HEDGE_AFTER_MS: int = 300
+
+    # Transaction fees: EIP-1559 from eth_feeHistory, gas limits cached per function
+    FEE_REFRESH_SECONDS: int = 15
+    FEE_HISTORY_BLOCKS: int = 20
+    FEE_PRIORITY_PERCENTILE: int = 50
+    FEE_MIN_PRIORITY_GWEI: float = 1
+    FEE_BASE_FEE_MULTIPLIER: float = 2
+    GAS_LIMIT_MULTIPLIER: float = 1.2
+    GAS_ESTIMATE_TTL_SECONDS: int = 600
+    # Fee increase of a replacement for a transaction stuck in the mempool
+    FEE_REPLACEMENT_BUMP: float = 0.125
     FRONTEND_URL: str = "http://localhost:3000"
 
+    # Anchoring: "direct" sends one transaction per certificate,
+    # "merkle" batches pending certificates and anchors only the root
+    ANCHOR_MODE: str = "direct"
+    MERKLE_BATCH_SIZE: int = 1000
+    MERKLE_BATCH_INTERVAL_SECONDS: int = 60
+
+    # Issuance outbox: single certificates move through persisted stages and
+    # are resumed by the issuance worker after a crash or an RPC outage
+    ISSUANCE_POLL_SECONDS: int = 5
+    ISSUANCE_WORKERS: int = 4
+    ISSUANCE_BATCH_SIZE: int = 50
+    ISSUANCE_LEASE_SECONDS: int = 300
+    ISSUANCE_RETRY_SECONDS: int = 30
+    ISSUANCE_MAX_ATTEMPTS: int = 5
+
+    # Receipt confirmation for broadcast transactions
+    CONFIRMATION_POLL_SECONDS: int = 5
+    CONFIRMATION_BATCH_SIZE: int = 200
+    CONFIRMATION_TIMEOUT_SECONDS: int = 900
+
+    # Local index of contract events used to answer verification without an eth_call
+    INDEXER_ENABLED: bool = True
+    INDEXER_START_BLOCK: int = 0
+    INDEXER_BATCH_BLOCKS: int = 2000
+    INDEXER_REORG_DEPTH: int = 12
+    INDEXER_POLL_SECONDS: int = 10
+    INDEXER_MAX_LAG_SECONDS: int = 60
+
+    # Jinja template cache; compiled bytecode survives restarts
+    TEMPLATE_CACHE_DIR: str = ".template_cache"
+    TEMPLATE_CACHE_SIZE: int = 100
+
+    # PDF rendering process pool (0 workers = one per CPU core)
+    PDF_RENDER_WORKERS: int = 0
+    PDF_RENDER_QUEUE_SIZE: int = 64
+    PDF_RENDER_QUEUE_TIMEOUT_SECONDS: float = 5
+    PDF_RENDER_TIMEOUT_SECONDS: float = 60
+
+    # Largest PDF accepted by /certificates/verify-file
+    VERIFY_UPLOAD_MAX_BYTES: int = 10 * 1024 * 1024
+
+    # GET /certificates/ page size: default and largest accepted ?limit=
+    CERTIFICATES_PAGE_SIZE: int = 50
+    CERTIFICATES_MAX_PAGE_SIZE: int = 200
+
+    # Batch verification: hashes per request, hashes per verifyMany call,
+    # eth_calls per JSON-RPC batch
+    VERIFY_BATCH_MAX_HASHES: int = 500
+    VERIFY_MANY_CHUNK_SIZE: int = 200
+    RPC_BATCH_SIZE: int = 100
+
+    # Bulk issuance pipeline
+    BULK_MAX_ROWS: int = 10000
+    BULK_MAX_CONCURRENT_JOBS: int = 2
+    BULK_QUEUE_SIZE: int = 256
+    BULK_RENDER_WORKERS: int = 4
+    BULK_UPLOAD_WORKERS: int = 8
+    BULK_ANCHOR_WORKERS: int = 4
+    BULK_INSERT_BATCH_SIZE: int = 200
+    # Certificates per issueBatch transaction when the v2 contract is configured
+    BULK_ISSUE_BATCH_SIZE: int = 100
+    BULK_ISSUE_BATCH_WAIT_SECONDS: float = 1.0
+
     # MinIO Configuration
     MINIO_ENDPOINT: str = "play.min.io:9000"
     MINIO_ACCESS_KEY: str = "minioadmin"
     MINIO_SECRET_KEY: str = "minioadmin"
     MINIO_BUCKET_NAME: str = "certificates"
     MINIO_SECURE: bool = True
+    # Presigned download URLs: lifetime, reuse cutoff before expiry, cached objects
+    PRESIGNED_URL_EXPIRY_SECONDS: int = 7 * 24 * 3600
+    PRESIGNED_URL_SAFETY_MARGIN_SECONDS: int = 3600
+    PRESIGNED_URL_CACHE_SIZE: int = 10000
+    # Bearer token required by GET /metrics; empty leaves it open (e.g. behind a private network)
+    METRICS_TOKEN: str = ""
+    # Request profiling (opt-in): requests carrying X-Profile-Token: PROFILE_TOKEN,
+    # plus PROFILE_SAMPLE_RATE of all requests, are profiled into PROFILE_DIR.
+    # PROFILE_TOKEN also grants access to GET /profiles.
+    PROFILE_TOKEN: str = ""
+    PROFILE_SAMPLE_RATE: float = 0.0
+    PROFILE_INTERVAL_SECONDS: float = 0.001
+    PROFILE_DIR: str = "profiles"
+    PROFILE_MAX_FILES: int = 200
 
     class Config:
         env_file = ".env"
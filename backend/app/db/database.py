@@ -1,15 +1,149 @@
+import random
+import time
+from fastapi import Request, Response
 from sqlalchemy import create_engine
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import declarative_base
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.orm import Session, sessionmaker
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
 from app.config.settings import settings
+from app.services.metrics import DB_CHECKOUT_SECONDS
 
-engine = create_engine(settings.DATABASE_URL)
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+# Async drivers used in place of each sync one for the async engine
+ASYNC_DRIVERS = {
+    "postgresql": "postgresql+asyncpg",
+    "postgres": "postgresql+asyncpg",
+    "sqlite": "sqlite+aiosqlite",
+}
+
+# Set after a write so the same client reads from the primary until replicas catch up
+READ_PRIMARY_COOKIE = "cyphire_read_primary"
+READ_PRIMARY_HEADER = "x-read-primary"
+
+def async_database_url(url: str):
+    """Maps DATABASE_URL onto its async driver, e.g. postgresql:// -> postgresql+asyncpg://."""
+    parsed = make_url(url)
+    backend = parsed.get_backend_name()
+    if backend not in ASYNC_DRIVERS:
+        raise ValueError(f"No async driver configured for '{backend}' databases")
+    parsed = parsed.set(drivername=ASYNC_DRIVERS[backend])
+    if backend != "sqlite" and "sslmode" in parsed.query:
+        # asyncpg spells libpq's sslmode as ssl
+        query = dict(parsed.query)
+        query["ssl"] = query.pop("sslmode")
+        parsed = parsed.set(query=query)
+    return parsed
+
+class TimedQueuePool(QueuePool):
+    """QueuePool recording how long each checkout waited for a connection."""
+
+    label = "primary"
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            DB_CHECKOUT_SECONDS.labels(self.label).observe(time.perf_counter() - start)
+
+class TimedAsyncQueuePool(TimedQueuePool, AsyncAdaptedQueuePool):
+    pass
+
+def engine_options(url, is_async: bool = False) -> dict:
+    # SQLite manages its own connections; pool sizing only applies to server databases
+    if make_url(url).get_backend_name() == "sqlite":
+        return {}
+    return {
+        "poolclass": TimedAsyncQueuePool if is_async else TimedQueuePool,
+        "pool_size": settings.DB_POOL_SIZE,
+        "max_overflow": settings.DB_MAX_OVERFLOW,
+        "pool_timeout": settings.DB_POOL_TIMEOUT_SECONDS,
+        "pool_recycle": settings.DB_POOL_RECYCLE_SECONDS,
+        "pool_pre_ping": settings.DB_POOL_PRE_PING,
+    }
+
+def replica_urls() -> list[str]:
+    return [url.strip() for url in settings.DATABASE_REPLICA_URLS.split(",") if url.strip()]
+
+engine = create_engine(settings.DATABASE_URL, **engine_options(settings.DATABASE_URL))
+replica_engines = [create_engine(url, **engine_options(url)) for url in replica_urls()]
+
+async_engine = create_async_engine(
+    async_database_url(settings.DATABASE_URL), **engine_options(settings.DATABASE_URL, is_async=True)
+)
+async_replica_engines = [
+    create_async_engine(async_database_url(url), **engine_options(url, is_async=True)) for url in replica_urls()
+]
+
+def _label_pools():
+    pools = {"primary": engine.pool, "async_primary": async_engine.pool}
+    for i, (sync, async_) in enumerate(zip(replica_engines, async_replica_engines)):
+        pools[f"replica{i}"] = sync.pool
+        pools[f"async_replica{i}"] = async_.pool
+    for label, pool in pools.items():
+        pool.label = label
+    return pools
+
+engine_pools = _label_pools()
+
+def pool_stats() -> list[dict]:
+    return [
+        {"pool": label, "checked_out": pool.checkedout(), "size": pool.size(), "overflow": pool.overflow()}
+        for label, pool in engine_pools.items() if isinstance(pool, QueuePool)
+    ]
+
+class RoutingSession(Session):
+    """Sends a session's queries to a replica when it was opened for reading, everything else to the primary.
+
+    Flushes always go to the primary, so a read session that ends up writing
+    stays correct.
+    """
+
+    primary = engine
+    replicas = replica_engines
+
+    def get_bind(self, mapper=None, clause=None, **kw):
+        if self.info.get("replica") and self.replicas and not self._flushing:
+            # One replica for the whole session, so its queries see a single point in time
+            if "replica_engine" not in self.info:
+                self.info["replica_engine"] = random.choice(self.replicas)
+            return self.info["replica_engine"]
+        return self.primary
+
+class AsyncRoutingSession(RoutingSession):
+    # AsyncSession runs a sync Session underneath, bound to the async engines' sync facades
+    primary = async_engine.sync_engine
+    replicas = [replica.sync_engine for replica in async_replica_engines]
+
+SessionLocal = sessionmaker(class_=RoutingSession, autocommit=False, autoflush=False)
 Base = declarative_base()
 
+# Objects stay readable after commit; async sessions cannot lazy-load expired attributes
+AsyncSessionLocal = async_sessionmaker(
+    class_=AsyncSession, sync_session_class=AsyncRoutingSession, autoflush=False, expire_on_commit=False
+)
+
+def reads_from_primary(request: Request) -> bool:
+    return bool(request.cookies.get(READ_PRIMARY_COOKIE) or request.headers.get(READ_PRIMARY_HEADER))
+
+def mark_write(response: Response):
+    """Pins the client's reads to the primary for READ_YOUR_WRITES_SECONDS after a write."""
+    if replica_engines:
+        response.set_cookie(READ_PRIMARY_COOKIE, "1", max_age=settings.READ_YOUR_WRITES_SECONDS, httponly=True)
+
 def get_db():
     db = SessionLocal()
     try:
         yield db
     finally:
         db.close()
+
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
+
+async def get_async_read_db(request: Request):
+    """get_async_db for read-only endpoints: served by a replica unless the client just wrote."""
+    async with AsyncSessionLocal(info={"replica": not reads_from_primary(request)}) as db:
+        yield db
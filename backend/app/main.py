@@ -1,9 +1,27 @@
-from fastapi import FastAPI
+from fastapi import FastAPI, Request
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import JSONResponse
+from starlette.datastructures import Headers
+from starlette.middleware.base import BaseHTTPMiddleware
 from app.db.database import Base, engine
-from app.routes import auth, certificates, organizations
+from app.routes import auth, certificates, metrics, organizations, profiles
 import app.models.user
 import app.models.organization
 import app.models.certificate
+import app.models.anchor_batch
+import app.models.chain_event
+import app.models.bulk_job
+import app.models.issuance_job
+from app.config.settings import settings
+from app.services.anchor_service import anchor_service
+from app.services.confirmation_service import receipt_confirmer
+from app.services.event_indexer import event_indexer
+from app.services.pdf_renderer import renderer_pool
+from app.services.password_hasher import password_hasher
+from app.services.blockchain_service import blockchain_service
+from app.services.fee_engine import fee_engine
+from app.services.issuance_service import issuance_worker
+from app.services import profiler
 
 app = FastAPI(title="Cyphire API", version="1.0.0")
 
@@ -16,6 +34,68 @@ def startup_event():
     except Exception as e:
         print(f"Database Initialization Error: {e}")
 
+    renderer_pool.start()
+    issuance_worker.start()
+    if settings.ANCHOR_MODE == "merkle":
+        anchor_service.start()
+    if blockchain_service.is_connected:
+        fee_engine.start()
+        receipt_confirmer.start()
+        if settings.INDEXER_ENABLED:
+            event_indexer.start()
+
+@app.on_event("shutdown")
+def shutdown_event():
+    issuance_worker.stop()
+    anchor_service.stop()
+    receipt_confirmer.stop()
+    fee_engine.stop()
+    event_indexer.stop()
+    renderer_pool.shutdown()
+    password_hasher.shutdown()
+
+async def profile_request(request: Request, call_next):
+    """Profiles requests sent with the profile token, and a PROFILE_SAMPLE_RATE share of the rest."""
+    if not profiler.should_profile(request.headers):
+        return await call_next(request)
+
+    with profiler.RequestProfile() as profile:
+        response = await call_next(request)
+    try:
+        name = await run_in_threadpool(profile.save, request.method, request.url.path)
+        response.headers[profiler.PROFILE_ID_HEADER] = name
+    except Exception as e:
+        print(f"Profiler Error: {e}")
+    return response
+
+# Only installed when profiling is configured, so other deployments pay nothing for it
+if settings.PROFILE_TOKEN or settings.PROFILE_SAMPLE_RATE > 0:
+    app.add_middleware(BaseHTTPMiddleware, dispatch=profile_request)
+
+class UploadSizeLimit:
+    """Answers 413 to a verify-file upload whose Content-Length is over VERIFY_UPLOAD_MAX_BYTES.
+
+    FastAPI parses a multipart form before the route runs, so this has to happen
+    here to stop the body from being read and spooled at all.
+    """
+    path = "/certificates/verify-file"
+    # Room for the multipart framing around the file itself
+    framing_bytes = 64 * 1024
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "http" and scope["path"] == self.path:
+            length = Headers(scope=scope).get("content-length")
+            if length and length.isdigit() and int(length) > settings.VERIFY_UPLOAD_MAX_BYTES + self.framing_bytes:
+                response = JSONResponse({"detail": "File too large"}, status_code=413)
+                await response(scope, receive, send)
+                return
+        await self.app(scope, receive, send)
+
+app.add_middleware(UploadSizeLimit)
+
 from fastapi.middleware.cors import CORSMiddleware
 
 origins = [
@@ -34,6 +114,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", profiler.PROFILE_ID_HEADER],
 )
 
 os.makedirs("storage", exist_ok=True)
@@ -42,6 +123,8 @@ app.mount("/storage", StaticFiles(directory="storage"), name="storage")
 app.include_router(auth.router)
 app.include_router(certificates.router)
 app.include_router(organizations.router)
+app.include_router(metrics.router)
+app.include_router(profiles.router)
 
 @app.get("/")
 def root():
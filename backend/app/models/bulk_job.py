@@ -0,0 +1,31 @@
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Text
+from sqlalchemy.orm import relationship
+from datetime import datetime, timezone
+from app.db.database import Base
+
+class BulkJob(Base):
+    __tablename__ = "bulk_jobs"
+
+    id = Column(String, primary_key=True)
+    organization_id = Column(Integer, ForeignKey("organizations.id"), nullable=False, index=True)
+    status = Column(String, default="queued", nullable=False)
+    total = Column(Integer, default=0, nullable=False)
+    succeeded = Column(Integer, default=0, nullable=False)
+    failed = Column(Integer, default=0, nullable=False)
+    created_at = Column(DateTime, default=lambda: datetime.now(timezone.utc))
+    finished_at = Column(DateTime, nullable=True)
+
+    items = relationship("BulkJobItem", order_by="BulkJobItem.row_number")
+
+class BulkJobItem(Base):
+    __tablename__ = "bulk_job_items"
+
+    id = Column(Integer, primary_key=True, index=True)
+    job_id = Column(String, ForeignKey("bulk_jobs.id"), nullable=False, index=True)
+    row_number = Column(Integer, nullable=False)
+    owner_name = Column(String, nullable=True)
+    course_name = Column(String, nullable=True)
+    status = Column(String, default="pending", nullable=False)
+    cert_hash = Column(String, nullable=True)
+    certificate_id = Column(Integer, ForeignKey("certificates.id"), nullable=True)
+    error = Column(Text, nullable=True)
@@ -1,10 +1,14 @@
-from sqlalchemy import Column, Integer, String, Boolean, DateTime, ForeignKey
+from sqlalchemy import Column, Integer, String, Boolean, DateTime, ForeignKey, Index, Text
 from sqlalchemy.orm import relationship
 from datetime import datetime, timezone
 from app.db.database import Base
 
 class Certificate(Base):
     __tablename__ = "certificates"
+    __table_args__ = (
+        # Serves the organization's certificate list newest first, keyset-paginated on (created_at, id)
+        Index("ix_certificates_issued_by_created_at_id", "issued_by", "created_at", "id"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     cert_hash = Column(String, unique=True, index=True, nullable=False)
@@ -12,8 +16,28 @@ class Certificate(Base):
     course_name = Column(String, nullable=False)
     issued_by = Column(Integer, ForeignKey("organizations.id"), nullable=False)
     storage_url = Column(String, nullable=False)
+    # SHA-256 of the PDF itself (cert_hash is derived from the certificate's content)
+    file_hash = Column(String, nullable=True, index=True)
     tx_hash = Column(String, nullable=True)
     revoked = Column(Boolean, default=False)
     created_at = Column(DateTime, default=lambda: datetime.now(timezone.utc))
 
+    # Transactions are broadcast without waiting; the receipt confirmer moves
+    # chain_status from "pending" to "confirmed" or "failed"
+    chain_status = Column(String, default="pending", nullable=False, index=True)
+    revoke_tx_hash = Column(String, nullable=True)
+    chain_updated_at = Column(DateTime, default=lambda: datetime.now(timezone.utc))
+
+    # Merkle anchoring: set once the certificate's batch root is written on chain
+    anchor_batch_id = Column(Integer, ForeignKey("anchor_batches.id"), nullable=True, index=True)
+    merkle_proof = Column(Text, nullable=True)
+
+    # Which CertificateVerifier holds this certificate: 1 (string keys) or 2 (bytes32 keys)
+    contract_version = Column(Integer, default=1, nullable=False)
+
     issuer = relationship("Organization")
+    anchor_batch = relationship("AnchorBatch")
+
+    @property
+    def merkle_root(self):
+        return self.anchor_batch.merkle_root if self.anchor_batch else None
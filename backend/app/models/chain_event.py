@@ -0,0 +1,26 @@
+from sqlalchemy import Column, Integer, String, BigInteger, DateTime, UniqueConstraint
+from app.db.database import Base
+
+class ChainEvent(Base):
+    """A decoded CertificateVerifier log, keyed by cert hash (or Merkle root/leaf)."""
+
+    __tablename__ = "chain_events"
+    __table_args__ = (UniqueConstraint("tx_hash", "log_index", name="uq_chain_events_tx_log"),)
+
+    id = Column(Integer, primary_key=True, index=True)
+    event = Column(String, nullable=False)
+    key = Column(String, nullable=False, index=True)
+    actor = Column(String, nullable=True)
+    timestamp = Column(BigInteger, nullable=True)
+    block_number = Column(BigInteger, nullable=False, index=True)
+    tx_hash = Column(String, nullable=False)
+    log_index = Column(Integer, nullable=False)
+
+class IndexerState(Base):
+    __tablename__ = "indexer_state"
+
+    id = Column(Integer, primary_key=True)
+    last_block = Column(BigInteger, nullable=False)
+    last_block_hash = Column(String, nullable=True)
+    head_block = Column(BigInteger, nullable=True)
+    updated_at = Column(DateTime, nullable=True)
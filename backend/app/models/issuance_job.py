@@ -0,0 +1,40 @@
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Text
+from datetime import datetime, timezone
+from app.db.database import Base
+
+class IssuanceJob(Base):
+    """One certificate on its way through the issuance outbox.
+
+    `stage` is the last step that completed (queued, uploaded, broadcast,
+    confirmed, committed); workers resume from there after a crash.
+    Whoever holds an unexpired lease is the only one working on the job.
+    """
+
+    __tablename__ = "issuance_jobs"
+
+    id = Column(String, primary_key=True)
+    organization_id = Column(Integer, ForeignKey("organizations.id"), nullable=False, index=True)
+    owner_name = Column(String, nullable=False)
+    course_name = Column(String, nullable=False)
+    org_name = Column(String, nullable=False)
+    template_name = Column(String, nullable=True)
+    cert_hash = Column(String, unique=True, index=True, nullable=False)
+    # Content-addressed object name, known once the PDF is uploaded
+    storage_url = Column(String, nullable=True)
+
+    stage = Column(String, default="queued", nullable=False)
+    status = Column(String, default="pending", nullable=False, index=True)
+    pdf_sha256 = Column(String, nullable=True)
+
+    # Stored before the first send so a resumed job rebroadcasts the same transaction
+    signed_tx = Column(Text, nullable=True)
+    tx_hash = Column(String, nullable=True)
+    contract_version = Column(Integer, nullable=True)
+    broadcast_at = Column(DateTime, nullable=True)
+
+    certificate_id = Column(Integer, ForeignKey("certificates.id"), nullable=True)
+    attempts = Column(Integer, default=0, nullable=False)
+    error = Column(Text, nullable=True)
+    lease_until = Column(DateTime, nullable=True, index=True)
+    created_at = Column(DateTime, default=lambda: datetime.now(timezone.utc))
+    updated_at = Column(DateTime, default=lambda: datetime.now(timezone.utc))
@@ -9,5 +9,6 @@ class Organization(Base):
     name = Column(String, nullable=False, unique=True)
     domain = Column(String, nullable=True)
     wallet_address = Column(String, nullable=True)
+    certificate_template = Column(String, nullable=True)
 
     users = relationship("User", back_populates="organization")
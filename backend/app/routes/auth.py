@@ -1,24 +1,30 @@
 from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
-from app.db.database import get_db
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.db.database import get_async_db
 from app.schemas.user import UserCreate, UserOut, LoginRequest, Token
-from app.services.auth_service import register_user, authenticate_user, create_access_token
+from app.services.auth_service import register_user, authenticate_user, create_user_token
+from app.services.password_hasher import HasherSaturated
+from app.services.profiler import ProfiledRoute
 
-router = APIRouter(prefix="/auth", tags=["Auth"])
+router = APIRouter(prefix="/auth", tags=["Auth"], route_class=ProfiledRoute)
 
 @router.post("/register", response_model=UserOut)
-def register(data: UserCreate, db: Session = Depends(get_db)):
+async def register(data: UserCreate, db: AsyncSession = Depends(get_async_db)):
     try:
-        user = register_user(db, data)
+        user = await register_user(db, data)
         return user
+    except HasherSaturated as e:
+        raise HTTPException(status_code=503, detail=str(e))
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
 
 @router.post("/login", response_model=Token)
-def login(data: LoginRequest, db: Session = Depends(get_db)):
+async def login(data: LoginRequest, db: AsyncSession = Depends(get_async_db)):
     try:
-        user = authenticate_user(db, data.email, data.password)
-        token = create_access_token({"sub": str(user.id), "role": user.role})
+        user = await authenticate_user(db, data.email, data.password)
+        token = create_user_token(user)
         return {"access_token": token}
+    except HasherSaturated as e:
+        raise HTTPException(status_code=503, detail=str(e))
     except ValueError as e:
         raise HTTPException(status_code=401, detail=str(e))
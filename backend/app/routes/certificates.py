@@ -1,145 +1,381 @@
-from fastapi import APIRouter, Depends, HTTPException, File, UploadFile
-from sqlalchemy.orm import Session
-import os
-from app.db.database import get_db
-from app.schemas.certificate import CertificateCreate, CertificateOut
+from fastapi import APIRouter, Depends, HTTPException, File, UploadFile, Response, Query
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import JSONResponse
+from sqlalchemy import or_, select, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, selectinload
+import base64
+import binascii
+import csv
+import json
+from datetime import datetime, timezone
+from web3 import Web3
+from app.db.database import get_db, get_async_read_db, mark_write
+from app.schemas.certificate import CertificateCreate, CertificateOut, VerifyBatchRequest
+from app.schemas.bulk_job import BulkJobOut
+from app.schemas.issuance_job import IssuanceJobOut
+from app.models.bulk_job import BulkJob
 from app.models.certificate import Certificate
-from app.models.organization import Organization
-from app.services.certificate_service import generate_certificate_pdf, get_file_hash, get_content_hash
+from app.models.issuance_job import IssuanceJob
+from app.services.certificate_service import get_content_hash, hash_upload, is_cert_hash, UploadTooLarge
+from app.services.pdf_renderer import RendererSaturated
 from app.services.blockchain_service import blockchain_service
+from app.services import merkle_service, event_indexer
+from app.services.anchor_service import anchor_pending
+from app.services import bulk_issuance_service, issuance_service
 from app.services.minio_service import minio_service
-from app.services.auth_service import get_current_user
+from app.services.metrics import stage_timer
+from app.services.auth_service import Identity, get_identity
+from app.services.organization_service import get_organization
+from app.config.settings import settings
+from app.services.profiler import ProfiledRoute
 
-router = APIRouter(prefix="/certificates", tags=["Certificates"])
+router = APIRouter(prefix="/certificates", tags=["Certificates"], route_class=ProfiledRoute)
 
-@router.post("/issue", response_model=CertificateOut)
-def issue_certificate(data: CertificateCreate, db: Session = Depends(get_db), current_user_id: int = Depends(get_current_user)):
-    from app.services.auth_service import get_user_by_id
-    user = get_user_by_id(db, current_user_id)
-    if not user.organization_id:
+# Cursor for the next page of GET /certificates/
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+NOT_ON_CHAIN = {"exists": False, "revoked": False, "issuer": "None", "timestamp": 0}
+
+@router.post("/issue", response_model=CertificateOut, responses={202: {"model": IssuanceJobOut}})
+def issue_certificate(data: CertificateCreate, response: Response, db: Session = Depends(get_db), identity: Identity = Depends(get_identity)):
+    """Issues through the issuance outbox.
+
+    Returns the certificate once every stage is done; while the transaction is
+    still being mined (or a stage is being retried) it answers 202 with the job,
+    which the issuance worker finishes. Submitting the same certificate again
+    resumes that job instead of starting over.
+    """
+    if not identity.organization_id:
         raise HTTPException(status_code=400, detail="User is not associated with an organization")
 
-    org = db.query(Organization).filter(Organization.id == user.organization_id).first()
+    org = get_organization(db, identity.organization_id)
     if not org:
         raise HTTPException(status_code=404, detail="Organization not found")
 
     cert_hash = get_content_hash(data.owner_name, data.course_name, org.name)
+    existing = db.query(Certificate).filter(Certificate.cert_hash == cert_hash).first()
+    if existing:
+        return existing
 
     try:
-        pdf_path = generate_certificate_pdf(data.owner_name, data.course_name, org.name, cert_hash)
-        
-        file_name = os.path.basename(pdf_path)
-        minio_object_name = f"certs/{file_name}"
-        try:
-             minio_service.upload_file(pdf_path, minio_object_name)
-        except Exception as e:
-            print(f"Warning: MinIO upload failed: {e}")
-
-        tx_hash = blockchain_service.issue_on_chain(cert_hash)
-
-        new_cert = Certificate(
-            cert_hash=cert_hash,
-            owner_name=data.owner_name,
-            course_name=data.course_name,
-            issued_by=org.id,
-            storage_url=minio_object_name, 
-            tx_hash=tx_hash
-        )
-        db.add(new_cert)
-        db.commit()
-        db.refresh(new_cert)
+        job, claimed = issuance_service.enqueue(db, org, data.owner_name, data.course_name, cert_hash)
+        if claimed:
+            job = issuance_service.advance(db, job)
+    except RendererSaturated as e:
+        raise HTTPException(status_code=503, detail=str(e))
 
-        if os.path.exists(pdf_path):
-            os.remove(pdf_path)
+    mark_write(response)
+    if job.status == "failed":
+        raise HTTPException(status_code=500, detail=f"Failed to issue certificate: {job.error}")
+    if job.stage == "committed":
+        return db.get(Certificate, job.certificate_id)
+    return JSONResponse(status_code=202, content=IssuanceJobOut.model_validate(job).model_dump(mode="json"))
 
-        return new_cert
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Failed to issue certificate: {str(e)}")
+@router.post("/issue-bulk")
+def issue_certificates_bulk(response: Response, file: UploadFile = File(...), db: Session = Depends(get_db), identity: Identity = Depends(get_identity)):
+    if not identity.organization_id:
+        raise HTTPException(status_code=400, detail="User is not associated with an organization")
+
+    org = get_organization(db, identity.organization_id)
+    if not org:
+        raise HTTPException(status_code=404, detail="Organization not found")
+
+    try:
+        rows = bulk_issuance_service.parse_recipients(file.file, file.filename)
+    except (ValueError, UnicodeDecodeError, csv.Error) as e:
+        raise HTTPException(status_code=400, detail=f"Invalid recipients file: {str(e)}")
+    if not rows:
+        raise HTTPException(status_code=400, detail="Recipients file is empty")
+
+    job = bulk_issuance_service.create_job(db, org.id, rows)
+    bulk_issuance_service.start_job(job, org)
+    mark_write(response)
+    return {"job_id": job.id, "status": job.status, "total": job.total}
+
+@router.get("/bulk/{job_id}", response_model=BulkJobOut)
+def get_bulk_job(job_id: str, db: Session = Depends(get_db), identity: Identity = Depends(get_identity)):
+    job = db.query(BulkJob).filter(BulkJob.id == job_id).first()
+    if not job or job.organization_id != identity.organization_id:
+        raise HTTPException(status_code=404, detail="Bulk job not found")
+    return job
+
+@router.get("/issuance/{job_id}", response_model=IssuanceJobOut)
+def get_issuance_job(job_id: str, db: Session = Depends(get_db), identity: Identity = Depends(get_identity)):
+    job = db.get(IssuanceJob, job_id)
+    if not job or job.organization_id != identity.organization_id:
+        raise HTTPException(status_code=404, detail="Issuance job not found")
+    return job
 
 @router.post("/{cert_id}/revoke")
-def revoke_certificate(cert_id: int, db: Session = Depends(get_db), current_user_id: int = Depends(get_current_user)):
-    from app.services.auth_service import get_user_by_id
-    user = get_user_by_id(db, current_user_id)
-    cert = db.query(Certificate).filter(Certificate.id == cert_id).first()
+def revoke_certificate(cert_id: int, response: Response, db: Session = Depends(get_db), identity: Identity = Depends(get_identity)):
+    with stage_timer("revoke", "lookup"):
+        cert = db.query(Certificate).filter(Certificate.id == cert_id).first()
     if not cert:
         raise HTTPException(status_code=404, detail="Certificate not found")
     
-    if cert.issued_by != user.organization_id:
+    if cert.issued_by != identity.organization_id:
         raise HTTPException(status_code=403, detail="Not authorized to revoke this certificate")
     
     if cert.revoked:
         raise HTTPException(status_code=400, detail="Certificate already revoked")
 
+    if cert.tx_hash and cert.chain_status == "pending":
+        raise HTTPException(status_code=409, detail="Certificate issuance is still being confirmed on chain")
+
     try:
-        blockchain_service.revoke_on_chain(cert.cert_hash)
+        revoke_tx_hash = None
+        with stage_timer("revoke", "chain"):
+            if cert.anchor_batch_id:
+                revoke_tx_hash = blockchain_service.revoke_leaf_on_chain(
+                    Web3.to_bytes(hexstr=cert.merkle_root),
+                    merkle_service.leaf_hash(cert.cert_hash),
+                    merkle_service.proof_from_json(cert.merkle_proof),
+                    cert.contract_version,
+                )
+            elif cert.tx_hash and cert.chain_status == "confirmed":
+                revoke_tx_hash = blockchain_service.revoke_on_chain(cert.cert_hash, cert.contract_version)
+        # Certificates that never reached the chain are revoked locally only
         cert.revoked = True
-        db.commit()
+        cert.revoke_tx_hash = revoke_tx_hash
+        if revoke_tx_hash:
+            cert.chain_status = "pending" if blockchain_service.is_connected else "confirmed"
+        elif cert.chain_status == "pending":
+            # Never anchored, so there is nothing left to wait for
+            cert.chain_status = "confirmed"
+        cert.chain_updated_at = datetime.now(timezone.utc)
+        with stage_timer("revoke", "commit"):
+            db.commit()
+        mark_write(response)
         return {"message": "Certificate revoked successfully"}
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to revoke on blockchain: {str(e)}")
 
 @router.delete("/{cert_id}")
-def delete_certificate(cert_id: int, db: Session = Depends(get_db), current_user_id: int = Depends(get_current_user)):
-    from app.services.auth_service import get_user_by_id
-    user = get_user_by_id(db, current_user_id)
+def delete_certificate(cert_id: int, response: Response, db: Session = Depends(get_db), identity: Identity = Depends(get_identity)):
     cert = db.query(Certificate).filter(Certificate.id == cert_id).first()
     if not cert:
         raise HTTPException(status_code=404, detail="Certificate not found")
     
-    if cert.issued_by != user.organization_id:
+    if cert.issued_by != identity.organization_id:
         raise HTTPException(status_code=403, detail="Not authorized to delete this certificate")
     
+    # Issuing the same certificate again later starts a new job
+    db.query(IssuanceJob).filter(IssuanceJob.cert_hash == cert.cert_hash).delete(synchronize_session=False)
     db.delete(cert)
     db.commit()
+    mark_write(response)
     return {"message": "Certificate deleted successfully"}
 
-@router.get("/verify/{cert_hash}")
-def verify_certificate(cert_hash: str, db: Session = Depends(get_db)):
-    cert = db.query(Certificate).filter(Certificate.cert_hash == cert_hash).first()
-    if not cert:
-        raise HTTPException(status_code=404, detail=f"Certificate not found. Hash: {cert_hash}")
-    
-    on_chain_data = blockchain_service.verify_on_chain(cert_hash)
-    
-    pdf_url = ""
-    if cert.storage_url:
-        if cert.storage_url.startswith("certs/"):
-             pdf_url = minio_service.get_file_url(cert.storage_url)
+def _index_is_behind(cert: Certificate, indexed) -> bool:
+    """The index is behind when it has no answer or misses a change we already saw confirmed."""
+    if indexed is None:
+        return True
+    if cert.chain_status != "confirmed":
+        return False
+    return not indexed["exists"] or (cert.revoked and not indexed["revoked"])
+
+async def _verify_merkle_inclusion(db: AsyncSession, certs: list[Certificate]) -> dict:
+    results = {}
+    included = []
+    for cert in certs:
+        leaf = merkle_service.leaf_hash(cert.cert_hash)
+        root = Web3.to_bytes(hexstr=cert.merkle_root)
+        if merkle_service.verify_proof(leaf, merkle_service.proof_from_json(cert.merkle_proof), root):
+            included.append((cert, root, leaf))
         else:
-             pdf_url = cert.storage_url
+            results[cert.cert_hash] = dict(NOT_ON_CHAIN, merkle_root=cert.merkle_root, proof_valid=False)
+    if not included:
+        return results
+
+    pairs = [(c.merkle_root, Web3.to_hex(leaf)) for c, _, leaf in included]
+    indexed = await event_indexer.lookup_roots_async(db, pairs) or {}
+    behind = [(c, root, leaf) for c, root, leaf in included if _index_is_behind(c, indexed.get(Web3.to_hex(leaf)))]
+    live = {}
+    for version in {c.contract_version for c, _, _ in behind}:
+        live.update(await run_in_threadpool(
+            blockchain_service.verify_roots_many_on_chain,
+            [(root, leaf) for c, root, leaf in behind if c.contract_version == version], version
+        ))
+
+    for cert, _, leaf in included:
+        leaf_hex = Web3.to_hex(leaf)
+        on_chain_data = live[leaf_hex] if leaf_hex in live else indexed.get(leaf_hex)
+        if on_chain_data:
+            on_chain_data.update({"merkle_root": cert.merkle_root, "proof_valid": True})
+        results[cert.cert_hash] = on_chain_data
+    return results
+
+async def _verify_many_on_chain(db: AsyncSession, certs: list[Certificate]) -> dict:
+    """On-chain status for each certificate, keyed by cert hash.
+
+    The event index answers in one query; only certificates it cannot vouch
+    for go to the RPC node, batched into as few calls as possible and run off
+    the event loop.
+    """
+    results = await _verify_merkle_inclusion(db, [c for c in certs if c.anchor_batch_id])
+
+    direct = [c for c in certs if not c.anchor_batch_id and c.tx_hash]
+    if direct:
+        indexed = await event_indexer.lookup_certificates_async(db, [c.cert_hash for c in direct]) or {}
+        behind = [c for c in direct if _index_is_behind(c, indexed.get(c.cert_hash))]
+        results.update(indexed)
+        for version in {c.contract_version for c in behind}:
+            results.update(await run_in_threadpool(
+                blockchain_service.verify_many_on_chain,
+                [c.cert_hash for c in behind if c.contract_version == version], version
+            ))
+    return results
+
+def _pdf_url(cert: Certificate) -> str:
+    if not cert.storage_url:
+        return ""
+    if cert.storage_url.startswith("certs/"):
+        return minio_service.get_file_url(cert.storage_url)
+    return cert.storage_url
 
-    status = {
+def _verification(cert: Certificate, on_chain_data) -> dict:
+    return {
         "local_record": cert,
-        "on_chain": on_chain_data if on_chain_data else {"exists": False, "revoked": False, "issuer": "None", "timestamp": 0},
-        "pdf_url": pdf_url
+        "on_chain": on_chain_data if on_chain_data else dict(NOT_ON_CHAIN),
+        "pdf_url": _pdf_url(cert)
     }
-    
-    return status
+
+@router.post("/anchor")
+def anchor_pending_certificates(db: Session = Depends(get_db), identity: Identity = Depends(get_identity)):
+    """Anchors the caller's organization's certificates waiting for a merkle batch right away."""
+    if not identity.organization_id:
+        raise HTTPException(status_code=400, detail="User is not associated with an organization")
+
+    try:
+        batches = anchor_pending(db, identity.organization_id)
+    except Exception as e:
+        db.rollback()
+        raise HTTPException(status_code=500, detail=f"Failed to anchor certificates: {str(e)}")
+    return {
+        "batches": [{"merkle_root": b.merkle_root, "tx_hash": b.tx_hash, "size": b.size} for b in batches]
+    }
+
+def _certificates_by_hash(cert_hashes):
+    # anchor_batch is loaded up front; async sessions cannot lazy-load merkle_root
+    return (
+        select(Certificate)
+        .where(Certificate.cert_hash.in_(cert_hashes))
+        .options(selectinload(Certificate.anchor_batch))
+    )
+
+async def _verify_one(db: AsyncSession, query, looked_up: str, operation: str = "verify"):
+    with stage_timer(operation, "lookup"):
+        cert = (await db.scalars(query)).first()
+    if not cert:
+        raise HTTPException(status_code=404, detail=f"Certificate not found. Hash: {looked_up}")
+
+    with stage_timer(operation, "chain"):
+        on_chain_data = (await _verify_many_on_chain(db, [cert])).get(cert.cert_hash)
+    return _verification(cert, on_chain_data)
+
+@router.get("/verify/{cert_hash}")
+async def verify_certificate(cert_hash: str, db: AsyncSession = Depends(get_async_read_db)):
+    if not is_cert_hash(cert_hash):
+        # Could never match; v2 lookups would also choke on it
+        raise HTTPException(status_code=404, detail=f"Certificate not found. Hash: {cert_hash}")
+    return await _verify_one(db, _certificates_by_hash([cert_hash]), cert_hash)
+
+@router.post("/verify-batch")
+async def verify_certificates_batch(data: VerifyBatchRequest, db: AsyncSession = Depends(get_async_read_db)):
+    """Verifies many hashes at once. Results follow the input order; unknown hashes get found=False."""
+    if len(data.hashes) > settings.VERIFY_BATCH_MAX_HASHES:
+        raise HTTPException(
+            status_code=413,
+            detail=f"At most {settings.VERIFY_BATCH_MAX_HASHES} hashes can be verified per request"
+        )
+
+    # Malformed hashes are reported as not found without being looked up
+    unique_hashes = [h for h in dict.fromkeys(data.hashes) if is_cert_hash(h)]
+    certs = {}
+    if unique_hashes:
+        with stage_timer("verify_batch", "lookup"):
+            certs = {cert.cert_hash: cert for cert in (await db.scalars(_certificates_by_hash(unique_hashes))).all()}
+    with stage_timer("verify_batch", "chain"):
+        on_chain = await _verify_many_on_chain(db, list(certs.values()))
+
+    results = []
+    for cert_hash in data.hashes:
+        cert = certs.get(cert_hash)
+        if not cert:
+            results.append({"cert_hash": cert_hash, "found": False})
+            continue
+        results.append({"cert_hash": cert_hash, "found": True, **_verification(cert, on_chain.get(cert_hash))})
+    return {"results": results}
 
 @router.post("/verify-file")
-async def verify_certificate_file(file: UploadFile = File(...), db: Session = Depends(get_db)):
-    temp_path = f"storage/temp_{file.filename}"
-    with open(temp_path, "wb") as buffer:
-        buffer.write(await file.read())
-    
+async def verify_certificate_file(file: UploadFile = File(...), db: AsyncSession = Depends(get_async_read_db)):
+    # Oversized declared bodies are turned away by UploadSizeLimit in app.main before
+    # they are spooled; this catches the rest, e.g. chunked uploads
     try:
-        file_hash = get_file_hash(temp_path)
-    finally:
-        if os.path.exists(temp_path):
-            os.remove(temp_path)
-    
-    return verify_certificate(file_hash, db)
+        with stage_timer("verify_file", "hash"):
+            file_hash = await hash_upload(file, settings.VERIFY_UPLOAD_MAX_BYTES)
+    except UploadTooLarge as e:
+        raise HTTPException(status_code=413, detail=str(e))
+
+    # An uploaded PDF matches by its own SHA-256; cert_hash still matches for older records
+    query = (
+        select(Certificate)
+        .where(or_(Certificate.file_hash == file_hash, Certificate.cert_hash == file_hash))
+        .options(selectinload(Certificate.anchor_batch))
+    )
+    return await _verify_one(db, query, file_hash, "verify_file")
+
+def _encode_cursor(cert: Certificate) -> str:
+    position = json.dumps([cert.created_at.isoformat(), cert.id])
+    return base64.urlsafe_b64encode(position.encode()).decode().rstrip("=")
+
+def _decode_cursor(cursor: str):
+    try:
+        created_at, cert_id = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+        return datetime.fromisoformat(created_at), int(cert_id)
+    except (binascii.Error, UnicodeDecodeError, ValueError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
 
 @router.get("/", response_model=list[CertificateOut])
-def list_certificates(db: Session = Depends(get_db), current_user_id: int = Depends(get_current_user)):
-    from app.services.auth_service import get_user_by_id
-    user = get_user_by_id(db, current_user_id)
-    if not user.organization_id:
+async def list_certificates(
+    response: Response,
+    cursor: str | None = None,
+    limit: int = Query(settings.CERTIFICATES_PAGE_SIZE, ge=1, le=settings.CERTIFICATES_MAX_PAGE_SIZE),
+    revoked: bool | None = None,
+    course: str | None = None,
+    db: AsyncSession = Depends(get_async_read_db),
+    identity: Identity = Depends(get_identity),
+):
+    """Newest certificates first, one page at a time.
+
+    Pages are keyed on (created_at, id) so each one is an index range scan on
+    ix_certificates_issued_by_created_at_id. When more rows follow, the
+    opaque cursor for the next page is returned in the X-Next-Cursor header.
+    """
+    if not identity.organization_id:
         return []
 
-    certs = db.query(Certificate).filter(Certificate.issued_by == user.organization_id).order_by(Certificate.created_at.desc()).all()
-    
-    if not certs:
+    query = (
+        select(Certificate)
+        .where(Certificate.issued_by == identity.organization_id)
+        .options(selectinload(Certificate.anchor_batch))
+        .order_by(Certificate.created_at.desc(), Certificate.id.desc())
+        .limit(limit + 1)
+    )
+    if cursor:
+        query = query.where(tuple_(Certificate.created_at, Certificate.id) < _decode_cursor(cursor))
+    if revoked is not None:
+        query = query.where(Certificate.revoked == revoked)
+    if course:
+        query = query.where(Certificate.course_name == course)
+
+    certs = (await db.scalars(query)).all()
+    if len(certs) > limit:
+        certs = certs[:limit]
+        response.headers[NEXT_CURSOR_HEADER] = _encode_cursor(certs[-1])
+
+    if not certs and not (cursor or revoked is not None or course):
         from datetime import datetime, timedelta
         import random
         
@@ -154,7 +390,7 @@ def list_certificates(db: Session = Depends(get_db), current_user_id: int = Depe
                 "course_name": courses[i % len(courses)],
                 "created_at": datetime.now() - timedelta(days=random.randint(1, 30)),
                 "cert_hash": f"mock_hash_{random.randint(1000, 9999)}",
-                "issued_by": user.organization_id,
+                "issued_by": identity.organization_id,
                 "tx_hash": f"0x{random.randint(100000, 999999)}...",
                 "storage_url": "",
                 "revoked": False
@@ -0,0 +1,41 @@
+import secrets
+import anyio.to_thread
+from fastapi import APIRouter, Header, HTTPException, Response
+from prometheus_client import CONTENT_TYPE_LATEST, generate_latest
+from app.config.settings import settings
+from app.db.database import pool_stats
+from app.services import metrics
+from app.services.auth_service import identity_cache
+from app.services.blockchain_service import blockchain_service
+from app.services.minio_service import minio_service
+from app.services.organization_service import organization_cache
+from app.services.password_hasher import password_hasher
+from app.services.pdf_renderer import renderer_pool
+
+router = APIRouter(tags=["Metrics"])
+
+def _rpc_stats() -> list[dict]:
+    return blockchain_service.w3.provider.stats() if blockchain_service.w3 else []
+
+metrics.service_stats.add("renderer", renderer_pool.stats)
+metrics.service_stats.add("bcrypt", password_hasher.stats)
+metrics.service_stats.add("minio", minio_service.stats)
+metrics.service_stats.add("identity_cache", identity_cache.stats)
+metrics.service_stats.add("organization_cache", organization_cache.stats)
+metrics.service_stats.add("db_pool", pool_stats, label="pool")
+metrics.service_stats.add("rpc_endpoint", _rpc_stats, label="endpoint")
+
+def _sample_threadpool():
+    # The threadpool FastAPI runs sync routes and dependencies on
+    limiter = anyio.to_thread.current_default_thread_limiter()
+    metrics.THREADPOOL_BORROWED.set(limiter.borrowed_tokens)
+    metrics.THREADPOOL_TOTAL.set(limiter.total_tokens)
+    metrics.THREADPOOL_WAITING.set(limiter.statistics().tasks_waiting)
+
+@router.get("/metrics", include_in_schema=False)
+async def prometheus_metrics(authorization: str = Header(default="")):
+    """Prometheus exposition of this process's metrics."""
+    if settings.METRICS_TOKEN and not secrets.compare_digest(authorization, f"Bearer {settings.METRICS_TOKEN}"):
+        raise HTTPException(status_code=401, detail="Invalid metrics token")
+    _sample_threadpool()
+    return Response(generate_latest(), media_type=CONTENT_TYPE_LATEST)
@@ -1,59 +1,63 @@
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
-from app.db.database import get_db
+from fastapi import APIRouter, Depends, HTTPException, Response, status
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.db.database import get_async_db, get_async_read_db, mark_write
 from app.schemas.organization import OrganizationCreate, OrganizationOut, OrganizationUpdate
 from app.models.organization import Organization
 
-from app.services.auth_service import get_current_user
+from app.services.auth_service import Identity, get_identity
+from app.services.certificate_service import available_templates
+from app.services.organization_service import get_organization_async, remember_organization
+from app.services.profiler import ProfiledRoute
 
-router = APIRouter(prefix="/organizations", tags=["Organizations"])
+router = APIRouter(prefix="/organizations", tags=["Organizations"], route_class=ProfiledRoute)
 
 @router.get("/me", response_model=OrganizationOut)
-def get_my_organization(db: Session = Depends(get_db), current_user_id: int = Depends(get_current_user)):
-    from app.services.auth_service import get_user_by_id
-    user = get_user_by_id(db, current_user_id)
-    if not user:
-        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="User not found or not authenticated")
-        
-    if not user.organization_id:
+async def get_my_organization(db: AsyncSession = Depends(get_async_read_db), identity: Identity = Depends(get_identity)):
+    if not identity.organization_id:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="User is not associated with an organization")
         
-    org = db.query(Organization).filter(Organization.id == user.organization_id).first()
+    org = await get_organization_async(db, identity.organization_id)
     if not org:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Organization not found")
     return org
 
+def _check_template(template_name):
+    if template_name and template_name not in available_templates():
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=f"Unknown certificate template: {template_name}")
+
+@router.get("/templates", response_model=list[str])
+def list_certificate_templates():
+    return available_templates()
+
 @router.post("/", response_model=OrganizationOut)
-def create_organization(data: OrganizationCreate, db: Session = Depends(get_db)):
-    existing = db.query(Organization).filter(Organization.name == data.name).first()
+async def create_organization(data: OrganizationCreate, response: Response, db: AsyncSession = Depends(get_async_db)):
+    existing = (await db.scalars(select(Organization).where(Organization.name == data.name))).first()
     if existing:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Organization already exists")
+    _check_template(data.certificate_template)
     
-    org = Organization(name=data.name, wallet_address=data.wallet_address, domain=data.domain)
+    org = Organization(name=data.name, wallet_address=data.wallet_address, domain=data.domain,
+                       certificate_template=data.certificate_template)
     db.add(org)
-    db.commit()
-    db.refresh(org)
+    await db.commit()
+    await db.refresh(org)
+    mark_write(response)
     return org
 
 @router.get("/{org_id}", response_model=OrganizationOut)
-def get_organization(org_id: int, db: Session = Depends(get_db)):
-    org = db.query(Organization).filter(Organization.id == org_id).first()
+async def get_organization(org_id: int, db: AsyncSession = Depends(get_async_read_db)):
+    org = await get_organization_async(db, org_id)
     if not org:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Organization not found")
     return org
 
 @router.put("/{org_id}", response_model=OrganizationOut)
-def update_organization(org_id: int, data: OrganizationUpdate, db: Session = Depends(get_db), current_user_id: int = Depends(get_current_user)):
-    from app.services.auth_service import get_user_by_id
-    user = get_user_by_id(db, current_user_id)
-    
-    if not user:
-        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="User not found or not authenticated")
-
-    if int(org_id) != user.organization_id:
+async def update_organization(org_id: int, data: OrganizationUpdate, response: Response, db: AsyncSession = Depends(get_async_db), identity: Identity = Depends(get_identity)):
+    if int(org_id) != identity.organization_id:
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Not authorized to update this organization")
 
-    org = db.query(Organization).filter(Organization.id == org_id).first()
+    org = await db.get(Organization, org_id)
     if not org:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Organization not found")
     
@@ -63,7 +67,12 @@ def update_organization(org_id: int, data: OrganizationUpdate, db: Session = Dep
         org.wallet_address = data.wallet_address
     if data.domain:
         org.domain = data.domain
+    if data.certificate_template:
+        _check_template(data.certificate_template)
+        org.certificate_template = data.certificate_template
         
-    db.commit()
-    db.refresh(org)
+    await db.commit()
+    await db.refresh(org)
+    remember_organization(org)
+    mark_write(response)
     return org
@@ -0,0 +1,22 @@
+from fastapi import APIRouter, Depends, Header, HTTPException
+from fastapi.responses import FileResponse
+from app.services import profiler
+
+def require_profile_token(x_profile_token: str = Header(default="")):
+    if not profiler.has_profile_token(x_profile_token):
+        raise HTTPException(status_code=403, detail="A valid X-Profile-Token is required")
+
+router = APIRouter(prefix="/profiles", tags=["Profiles"], dependencies=[Depends(require_profile_token)])
+
+@router.get("/")
+def list_profiles():
+    """Stored request profiles, newest first."""
+    return profiler.list_profiles()
+
+@router.get("/{name}")
+def download_profile(name: str):
+    """A stored profile in speedscope format; open it at https://www.speedscope.app."""
+    path = profiler.profile_path(name)
+    if not path:
+        raise HTTPException(status_code=404, detail="Profile not found")
+    return FileResponse(path, media_type="application/json", filename=name)
@@ -0,0 +1,26 @@
+from pydantic import BaseModel
+from typing import Optional
+from datetime import datetime
+
+class BulkJobItemOut(BaseModel):
+    row_number: int
+    owner_name: Optional[str]
+    course_name: Optional[str]
+    status: str
+    cert_hash: Optional[str]
+    certificate_id: Optional[int]
+    error: Optional[str]
+
+    model_config = {"from_attributes": True}
+
+class BulkJobOut(BaseModel):
+    id: str
+    status: str
+    total: int
+    succeeded: int
+    failed: int
+    created_at: datetime
+    finished_at: Optional[datetime]
+    items: list[BulkJobItemOut] = []
+
+    model_config = {"from_attributes": True}
@@ -16,5 +16,11 @@ class CertificateOut(BaseModel):
     tx_hash: Optional[str]
     created_at: datetime
     revoked: bool
+    chain_status: str = "confirmed"
+    revoke_tx_hash: Optional[str] = None
+    merkle_root: Optional[str] = None
 
     model_config = {"from_attributes": True}
+
+class VerifyBatchRequest(BaseModel):
+    hashes: list[str]
@@ -0,0 +1,15 @@
+from pydantic import BaseModel
+from typing import Optional
+from datetime import datetime
+
+class IssuanceJobOut(BaseModel):
+    id: str
+    stage: str
+    status: str
+    cert_hash: str
+    tx_hash: Optional[str]
+    certificate_id: Optional[int]
+    error: Optional[str]
+    created_at: datetime
+
+    model_config = {"from_attributes": True}
@@ -5,16 +5,19 @@ class OrganizationCreate(BaseModel):
     name: str
     wallet_address: Optional[str] = None
     domain: Optional[str] = None
+    certificate_template: Optional[str] = None
 
 class OrganizationUpdate(BaseModel):
     name: Optional[str] = None
     wallet_address: Optional[str] = None
     domain: Optional[str] = None
+    certificate_template: Optional[str] = None
 
 class OrganizationOut(BaseModel):
     id: int
     name: str
     wallet_address: Optional[str]
     domain: Optional[str]
+    certificate_template: Optional[str] = None
 
     model_config = {"from_attributes": True}
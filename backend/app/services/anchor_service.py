@@ -0,0 +1,91 @@
+from datetime import datetime, timezone
+from sqlalchemy.orm import Session
+from web3 import Web3
+from app.config.settings import settings
+from app.db.database import SessionLocal
+from app.models.anchor_batch import AnchorBatch
+from app.models.certificate import Certificate
+from app.services import merkle_service
+from app.services.blockchain_service import blockchain_service
+from app.services.worker import PollingWorker
+
+def get_pending_certificates(db: Session, limit: int, organization_id: int = None) -> list[Certificate]:
+    """Certificates issued in merkle mode that are not part of an anchored batch yet."""
+    query = db.query(Certificate).filter(
+        Certificate.anchor_batch_id.is_(None),
+        Certificate.tx_hash.is_(None),
+        Certificate.revoked == False,
+    )
+    if organization_id is not None:
+        query = query.filter(Certificate.issued_by == organization_id)
+    return (
+        query
+        .order_by(Certificate.id)
+        .limit(limit)
+        .with_for_update(skip_locked=True)
+        .all()
+    )
+
+def anchor_batch(db: Session, certs: list[Certificate]) -> AnchorBatch:
+    """Builds a Merkle tree over `certs`, anchors its root and stores each inclusion proof."""
+    levels = merkle_service.build_levels([merkle_service.leaf_hash(c.cert_hash) for c in certs])
+    root = merkle_service.get_root(levels)
+
+    tx_hash = blockchain_service.anchor_root_on_chain(root, len(certs))
+
+    batch = AnchorBatch(merkle_root=Web3.to_hex(root), tx_hash=tx_hash, size=len(certs))
+    db.add(batch)
+    db.flush()
+
+    now = datetime.now(timezone.utc)
+    for index, cert in enumerate(certs):
+        cert.anchor_batch_id = batch.id
+        cert.merkle_proof = merkle_service.proof_to_json(merkle_service.get_proof(levels, index))
+        cert.tx_hash = tx_hash
+        cert.contract_version = blockchain_service.issue_version
+        cert.chain_status = "pending" if blockchain_service.is_connected else "confirmed"
+        cert.chain_updated_at = now
+
+    db.commit()
+    db.refresh(batch)
+    return batch
+
+def release_failed_batch(db: Session, batch_id: int):
+    """Puts the certificates of a batch whose anchor transaction failed back in the queue."""
+    db.query(Certificate).filter(Certificate.anchor_batch_id == batch_id).update(
+        {
+            Certificate.anchor_batch_id: None,
+            Certificate.merkle_proof: None,
+            Certificate.tx_hash: None,
+            Certificate.chain_status: "pending",
+        },
+        synchronize_session="fetch",
+    )
+    db.query(AnchorBatch).filter(AnchorBatch.id == batch_id).delete(synchronize_session="fetch")
+
+def anchor_pending(db: Session, organization_id: int = None) -> list[AnchorBatch]:
+    """Anchors every pending certificate, or only one organization's, MERKLE_BATCH_SIZE leaves per transaction."""
+    batches = []
+    while True:
+        certs = get_pending_certificates(db, settings.MERKLE_BATCH_SIZE, organization_id)
+        if not certs:
+            return batches
+        batches.append(anchor_batch(db, certs))
+        print(f"Anchored {len(certs)} certificates under root {batches[-1].merkle_root}")
+        if len(certs) < settings.MERKLE_BATCH_SIZE:
+            return batches
+
+class AnchorService(PollingWorker):
+    name = "Merkle Anchor Service"
+
+    def run_once(self):
+        db = SessionLocal()
+        try:
+            anchor_pending(db)
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+
+anchor_service = AnchorService(settings.MERKLE_BATCH_INTERVAL_SECONDS)
@@ -1,24 +1,30 @@
+from dataclasses import dataclass
 from datetime import datetime, timedelta, timezone
 from jose import JWTError, jwt
-import bcrypt
-
-# Monkey patch for passlib + bcrypt compatibility
-if not hasattr(bcrypt, '__about__'):
-    bcrypt.__about__ = type('about', (object,), {'__version__': bcrypt.__version__})
-
-from passlib.context import CryptContext
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from app.config.settings import settings
+from app.db.database import AsyncSessionLocal
 from app.models.user import User
 from app.schemas.user import UserCreate
-
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+from app.services.cache import MISSING, TTLCache
+from app.services.password_hasher import password_hasher, pwd_context
 
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="auth/login")
 
+@dataclass(frozen=True)
+class Identity:
+    """Who is calling: read from the token's claims, or a cached snapshot of the user row."""
+    user_id: int
+    organization_id: int | None
+    role: str
+
+# Users whose tokens predate the organization_id claim
+identity_cache = TTLCache(settings.IDENTITY_CACHE_SIZE, settings.IDENTITY_CACHE_TTL_SECONDS)
+
 def hash_password(password: str) -> str:
     return pwd_context.hash(password)
 
@@ -31,39 +37,60 @@ def create_access_token(data: dict) -> str:
     payload.update({"exp": expire})
     return jwt.encode(payload, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
 
+def create_user_token(user: User) -> str:
+    # Organization and role ride along as signed claims so requests need no user lookup
+    return create_access_token({"sub": str(user.id), "role": user.role, "organization_id": user.organization_id})
+
 def decode_token(token: str) -> dict:
     return jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
 
-def get_current_user(db: Session = Depends(lambda: None), token: str = Depends(oauth2_scheme)) -> User:
+async def get_identity(token: str = Depends(oauth2_scheme)) -> Identity:
     try:
         payload = decode_token(token)
-        user_id = payload.get("sub")
-        if user_id is None:
-            raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid token")
-        return int(user_id)
-    except (JWTError, ValueError):
+        user_id = int(payload["sub"])
+    except (JWTError, KeyError, TypeError, ValueError):
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Could not validate credentials")
 
-def register_user(db: Session, data: UserCreate) -> User:
-    existing = db.query(User).filter(User.email == data.email).first()
+    if "organization_id" in payload:
+        return Identity(user_id, payload["organization_id"], payload.get("role") or "admin")
+
+    identity = identity_cache.get(user_id)
+    if identity is MISSING:
+        async with AsyncSessionLocal() as db:
+            user = await get_user_by_id_async(db, user_id)
+        if not user:
+            raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="User not found or not authenticated")
+        identity = Identity(user.id, user.organization_id, user.role)
+        identity_cache.set(user_id, identity)
+    return identity
+
+async def register_user(db: AsyncSession, data: UserCreate) -> User:
+    existing = (await db.scalars(select(User).where(User.email == data.email))).first()
     if existing:
         raise ValueError("Email already registered")
     user = User(
         email=data.email,
-        password_hash=hash_password(data.password),
+        password_hash=await password_hasher.hash(data.password),
         role=data.role,
         organization_id=data.organization_id,
     )
     db.add(user)
-    db.commit()
-    db.refresh(user)
+    await db.commit()
+    await db.refresh(user)
     return user
 
-def authenticate_user(db: Session, email: str, password: str) -> User:
-    user = db.query(User).filter(User.email == email).first()
-    if not user or not verify_password(password, user.password_hash):
+async def authenticate_user(db: AsyncSession, email: str, password: str) -> User:
+    user = (await db.scalars(select(User).where(User.email == email))).first()
+    if not user:
+        raise ValueError("Invalid credentials")
+    matches, new_hash = await password_hasher.verify_and_update(password, user.password_hash)
+    if not matches:
         raise ValueError("Invalid credentials")
+    if new_hash:
+        # Stored with an older BCRYPT_ROUNDS; upgrade while we have the plain password
+        user.password_hash = new_hash
+        await db.commit()
     return user
 
-def get_user_by_id(db: Session, user_id: int) -> User:
-    return db.query(User).filter(User.id == user_id).first()
+async def get_user_by_id_async(db: AsyncSession, user_id: int) -> User:
+    return await db.get(User, user_id)
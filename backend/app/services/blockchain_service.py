@@ -1,6 +1,14 @@
 import json
+import heapq
+import threading
+from contextlib import contextmanager
+import rlp
+from eth_account.typed_transactions import TypedTransaction
+from hexbytes import HexBytes
 from web3 import Web3
 from app.config.settings import settings
+from app.services.fee_engine import fee_engine
+from app.services.rpc_provider import MultiEndpointProvider, rpc_urls
 
 ABI = [
     {
@@ -22,6 +30,18 @@ ABI = [
         "stateMutability": "view",
         "type": "function",
     },
+    {
+        "inputs": [{"internalType": "string[]", "name": "_certHashes", "type": "string[]"}],
+        "name": "verifyMany",
+        "outputs": [
+            {"internalType": "bool[]", "name": "exists", "type": "bool[]"},
+            {"internalType": "address[]", "name": "issuers", "type": "address[]"},
+            {"internalType": "uint256[]", "name": "timestamps", "type": "uint256[]"},
+            {"internalType": "bool[]", "name": "revoked", "type": "bool[]"},
+        ],
+        "stateMutability": "view",
+        "type": "function",
+    },
     {
         "inputs": [{"internalType": "string", "name": "_certHash", "type": "string"}],
         "name": "revokeCertificate",
@@ -29,21 +49,387 @@ ABI = [
         "stateMutability": "nonpayable",
         "type": "function",
     },
+    {
+        "inputs": [
+            {"internalType": "bytes32", "name": "_root", "type": "bytes32"},
+            {"internalType": "uint256", "name": "_size", "type": "uint256"},
+        ],
+        "name": "anchorRoot",
+        "outputs": [],
+        "stateMutability": "nonpayable",
+        "type": "function",
+    },
+    {
+        "inputs": [{"internalType": "bytes32", "name": "_root", "type": "bytes32"}],
+        "name": "verifyRoot",
+        "outputs": [
+            {"internalType": "bool", "name": "", "type": "bool"},
+            {"internalType": "address", "name": "", "type": "address"},
+            {"internalType": "uint256", "name": "", "type": "uint256"},
+        ],
+        "stateMutability": "view",
+        "type": "function",
+    },
+    {
+        "inputs": [
+            {"internalType": "bytes32", "name": "_root", "type": "bytes32"},
+            {"internalType": "bytes32", "name": "_leaf", "type": "bytes32"},
+            {"internalType": "bytes32[]", "name": "_proof", "type": "bytes32[]"},
+        ],
+        "name": "revokeLeaf",
+        "outputs": [],
+        "stateMutability": "nonpayable",
+        "type": "function",
+    },
+    {
+        "inputs": [{"internalType": "bytes32", "name": "_leaf", "type": "bytes32"}],
+        "name": "isLeafRevoked",
+        "outputs": [{"internalType": "bool", "name": "", "type": "bool"}],
+        "stateMutability": "view",
+        "type": "function",
+    },
+    {
+        "anonymous": False,
+        "inputs": [
+            {"indexed": False, "internalType": "string", "name": "certHash", "type": "string"},
+            {"indexed": True, "internalType": "address", "name": "issuer", "type": "address"},
+            {"indexed": False, "internalType": "uint256", "name": "timestamp", "type": "uint256"},
+        ],
+        "name": "CertificateIssued",
+        "type": "event",
+    },
+    {
+        "anonymous": False,
+        "inputs": [
+            {"indexed": False, "internalType": "string", "name": "certHash", "type": "string"},
+            {"indexed": True, "internalType": "address", "name": "revoker", "type": "address"},
+        ],
+        "name": "CertificateRevoked",
+        "type": "event",
+    },
+    {
+        "anonymous": False,
+        "inputs": [
+            {"indexed": True, "internalType": "bytes32", "name": "root", "type": "bytes32"},
+            {"indexed": True, "internalType": "address", "name": "issuer", "type": "address"},
+            {"indexed": False, "internalType": "uint256", "name": "size", "type": "uint256"},
+            {"indexed": False, "internalType": "uint256", "name": "timestamp", "type": "uint256"},
+        ],
+        "name": "RootAnchored",
+        "type": "event",
+    },
+    {
+        "anonymous": False,
+        "inputs": [
+            {"indexed": True, "internalType": "bytes32", "name": "root", "type": "bytes32"},
+            {"indexed": True, "internalType": "bytes32", "name": "leaf", "type": "bytes32"},
+            {"indexed": True, "internalType": "address", "name": "revoker", "type": "address"},
+        ],
+        "name": "LeafRevoked",
+        "type": "event",
+    },
 ]
 
+# CertificateVerifierV2: bytes32 keys, batch issuance/revocation
+ABI_V2 = [
+    {
+        "inputs": [{"internalType": "bytes32", "name": "_certHash", "type": "bytes32"}],
+        "name": "issueCertificate",
+        "outputs": [],
+        "stateMutability": "nonpayable",
+        "type": "function",
+    },
+    {
+        "inputs": [{"internalType": "bytes32[]", "name": "_certHashes", "type": "bytes32[]"}],
+        "name": "issueBatch",
+        "outputs": [],
+        "stateMutability": "nonpayable",
+        "type": "function",
+    },
+    {
+        "inputs": [{"internalType": "bytes32", "name": "_certHash", "type": "bytes32"}],
+        "name": "verifyCertificate",
+        "outputs": [
+            {"internalType": "bool", "name": "", "type": "bool"},
+            {"internalType": "address", "name": "", "type": "address"},
+            {"internalType": "uint256", "name": "", "type": "uint256"},
+            {"internalType": "bool", "name": "", "type": "bool"},
+        ],
+        "stateMutability": "view",
+        "type": "function",
+    },
+    {
+        "inputs": [{"internalType": "bytes32[]", "name": "_certHashes", "type": "bytes32[]"}],
+        "name": "verifyMany",
+        "outputs": [
+            {"internalType": "bool[]", "name": "exists", "type": "bool[]"},
+            {"internalType": "address[]", "name": "issuers", "type": "address[]"},
+            {"internalType": "uint256[]", "name": "timestamps", "type": "uint256[]"},
+            {"internalType": "bool[]", "name": "revoked", "type": "bool[]"},
+        ],
+        "stateMutability": "view",
+        "type": "function",
+    },
+    {
+        "inputs": [{"internalType": "bytes32", "name": "_certHash", "type": "bytes32"}],
+        "name": "revokeCertificate",
+        "outputs": [],
+        "stateMutability": "nonpayable",
+        "type": "function",
+    },
+    {
+        "inputs": [{"internalType": "bytes32[]", "name": "_certHashes", "type": "bytes32[]"}],
+        "name": "revokeBatch",
+        "outputs": [],
+        "stateMutability": "nonpayable",
+        "type": "function",
+    },
+    {
+        "inputs": [
+            {"internalType": "bytes32", "name": "_root", "type": "bytes32"},
+            {"internalType": "uint256", "name": "_size", "type": "uint256"},
+        ],
+        "name": "anchorRoot",
+        "outputs": [],
+        "stateMutability": "nonpayable",
+        "type": "function",
+    },
+    {
+        "inputs": [{"internalType": "bytes32", "name": "_root", "type": "bytes32"}],
+        "name": "verifyRoot",
+        "outputs": [
+            {"internalType": "bool", "name": "", "type": "bool"},
+            {"internalType": "address", "name": "", "type": "address"},
+            {"internalType": "uint256", "name": "", "type": "uint256"},
+        ],
+        "stateMutability": "view",
+        "type": "function",
+    },
+    {
+        "inputs": [
+            {"internalType": "bytes32", "name": "_root", "type": "bytes32"},
+            {"internalType": "bytes32", "name": "_leaf", "type": "bytes32"},
+            {"internalType": "bytes32[]", "name": "_proof", "type": "bytes32[]"},
+        ],
+        "name": "revokeLeaf",
+        "outputs": [],
+        "stateMutability": "nonpayable",
+        "type": "function",
+    },
+    {
+        "inputs": [{"internalType": "bytes32", "name": "_leaf", "type": "bytes32"}],
+        "name": "isLeafRevoked",
+        "outputs": [{"internalType": "bool", "name": "", "type": "bool"}],
+        "stateMutability": "view",
+        "type": "function",
+    },
+    {
+        "anonymous": False,
+        "inputs": [
+            {"indexed": True, "internalType": "bytes32", "name": "certHash", "type": "bytes32"},
+            {"indexed": True, "internalType": "address", "name": "issuer", "type": "address"},
+            {"indexed": False, "internalType": "uint256", "name": "timestamp", "type": "uint256"},
+        ],
+        "name": "CertificateIssued",
+        "type": "event",
+    },
+    {
+        "anonymous": False,
+        "inputs": [
+            {"indexed": True, "internalType": "bytes32", "name": "certHash", "type": "bytes32"},
+            {"indexed": True, "internalType": "address", "name": "revoker", "type": "address"},
+        ],
+        "name": "CertificateRevoked",
+        "type": "event",
+    },
+    {
+        "anonymous": False,
+        "inputs": [
+            {"indexed": True, "internalType": "bytes32", "name": "root", "type": "bytes32"},
+            {"indexed": True, "internalType": "address", "name": "issuer", "type": "address"},
+            {"indexed": False, "internalType": "uint256", "name": "size", "type": "uint256"},
+            {"indexed": False, "internalType": "uint256", "name": "timestamp", "type": "uint256"},
+        ],
+        "name": "RootAnchored",
+        "type": "event",
+    },
+    {
+        "anonymous": False,
+        "inputs": [
+            {"indexed": True, "internalType": "bytes32", "name": "root", "type": "bytes32"},
+            {"indexed": True, "internalType": "bytes32", "name": "leaf", "type": "bytes32"},
+            {"indexed": True, "internalType": "address", "name": "revoker", "type": "address"},
+        ],
+        "name": "LeafRevoked",
+        "type": "event",
+    },
+]
+
+INDEXED_EVENTS = ["CertificateIssued", "CertificateRevoked", "RootAnchored", "LeafRevoked"]
+
+OUTPUT_TYPES = {
+    version: {
+        entry["name"]: [output["type"] for output in entry["outputs"]]
+        for entry in abi
+        if entry["type"] == "function"
+    }
+    for version, abi in ((1, ABI), (2, ABI_V2))
+}
+
+MOCK_VERIFICATION = {
+    "exists": True,
+    "issuer": "0xMOCK_ISSUER",
+    "timestamp": 1700000000,
+    "revoked": False
+}
+
+def _is_revert(error: dict) -> bool:
+    """Whether a JSON-RPC error is the contract reverting, rather than the node failing (rate limit, timeout...)."""
+    # Geth and most clients answer reverts with code 3; others only say so in the message
+    return error.get("code") == 3 or "revert" in str(error.get("message", "")).lower()
+
+def _decode_signed(raw_tx: str) -> dict:
+    """The unsigned fields of a signed transaction, ready to be signed again."""
+    raw = HexBytes(raw_tx)
+    if raw[0] <= 0x7f:
+        # EIP-2718 typed transaction (EIP-1559 fees)
+        tx = TypedTransaction.from_bytes(raw).as_dict()
+        for signature_field in ("v", "r", "s"):
+            tx.pop(signature_field, None)
+    else:
+        nonce, gas_price, gas, to, value, data = rlp.decode(raw)[:6]
+        tx = {
+            "nonce": int.from_bytes(nonce, "big"),
+            "gasPrice": int.from_bytes(gas_price, "big"),
+            "gas": int.from_bytes(gas, "big"),
+            "to": to,
+            "value": int.from_bytes(value, "big"),
+            "data": data,
+            "chainId": fee_engine.chain_id,
+        }
+    tx["to"] = Web3.to_checksum_address(tx["to"])
+    return tx
+
+def _bumped(fee: int) -> int:
+    # Nodes only replace a pending transaction that pays a set share more (10% on geth)
+    return int(fee * (1 + settings.FEE_REPLACEMENT_BUMP)) + 1
+
+class NonceManager:
+    """Hands out nonces for one signer locally so transactions can be pipelined.
+
+    The counter is synced from the pending transaction count once and then
+    advanced in memory. Nonces whose transaction the node never accepted are
+    released and handed out again first, so a failed send does not leave a gap
+    that would stall every later transaction.
+
+    Nonces handed out but not yet sent are tracked as in flight: the node
+    cannot count them yet, so a resync never moves the counter below them.
+    """
+
+    def __init__(self, w3: Web3, address: str):
+        self.w3 = w3
+        self.address = address
+        self._lock = threading.Lock()
+        self._next_nonce = None
+        self._released = []
+        self._in_flight = set()
+
+    def sync(self):
+        with self._lock:
+            self._sync_locked()
+
+    def _sync_locked(self):
+        chain = self.w3.eth.get_transaction_count(self.address, "pending")
+        if self._in_flight and self._next_nonce is not None:
+            self._next_nonce = max(self._next_nonce, chain)
+        else:
+            self._next_nonce = chain
+        # Released nonces below the node's count have been used since; the rest are still gaps
+        self._released = [n for n in self._released if chain <= n < self._next_nonce]
+        heapq.heapify(self._released)
+
+    def allocate(self) -> int:
+        with self._lock:
+            if self._next_nonce is None:
+                self._sync_locked()
+            if self._released:
+                nonce = heapq.heappop(self._released)
+            else:
+                nonce = self._next_nonce
+                self._next_nonce += 1
+            self._in_flight.add(nonce)
+            return nonce
+
+    def settle(self, nonce: int):
+        """Marks a nonce as sent (or persisted for sending); it is no longer in flight."""
+        with self._lock:
+            self._in_flight.discard(nonce)
+
+    def release(self, nonce: int):
+        with self._lock:
+            self._in_flight.discard(nonce)
+            if self._next_nonce is not None and nonce < self._next_nonce and nonce not in self._released:
+                heapq.heappush(self._released, nonce)
+
+    def _accepted(self, nonce: int) -> bool:
+        """Whether the node has taken a transaction with this nonce; True when it cannot tell."""
+        try:
+            return self.w3.eth.get_transaction_count(self.address, "pending") > nonce
+        except Exception as e:
+            print(f"Nonce Warning: could not check nonce {nonce}, not reusing it: {e}")
+            return True
+
+    @contextmanager
+    def reserve(self):
+        """Yields a nonce and gives it back if the block raises and the node did not accept it."""
+        nonce = self.allocate()
+        try:
+            yield nonce
+        except Exception as e:
+            if "nonce" in str(e).lower():
+                # Our counter disagrees with the node (e.g. another signer process); start over
+                print(f"Nonce Warning: resyncing after error: {e}")
+                self.settle(nonce)
+                self.sync()
+            elif self._accepted(nonce):
+                # The send raised but reached the node (e.g. a timeout on the reply)
+                self.settle(nonce)
+            else:
+                self.release(nonce)
+            raise
+        self.settle(nonce)
+
 class BlockchainService:
+    """Talks to CertificateVerifier (v1, string keys) and, when configured, CertificateVerifierV2.
+
+    New certificates go to v2 if CONTRACT_V2_ADDRESS is set; certificates
+    already on v1 stay readable and revocable there.
+    """
+
     def __init__(self):
         self.w3 = None
         self.account = None
         self.contract = None
+        self.contract_v2 = None
+        self.nonce_manager = None
+        # Flipped off once the deployed v1 contract turns out to predate verifyMany
+        self.supports_verify_many = True
 
-        if settings.RPC_URL.startswith("http") and len(settings.PRIVATE_KEY) >= 64:
+        urls = rpc_urls()
+        if urls and all(url.startswith("http") for url in urls) and len(settings.PRIVATE_KEY) >= 64:
             try:
-                self.w3 = Web3(Web3.HTTPProvider(settings.RPC_URL, request_kwargs={'timeout': 10}))
+                self.w3 = Web3(MultiEndpointProvider(urls))
                 if self.w3.is_connected():
                     self.account = self.w3.eth.account.from_key(settings.PRIVATE_KEY)
                     self.contract = self.w3.eth.contract(address=settings.CONTRACT_ADDRESS, abi=ABI)
-                    print(f"Blockchain initialized: {settings.CONTRACT_ADDRESS}")
+                    if settings.CONTRACT_V2_ADDRESS:
+                        self.contract_v2 = self.w3.eth.contract(address=settings.CONTRACT_V2_ADDRESS, abi=ABI_V2)
+                    fee_engine.bind(self.w3)
+                    self.nonce_manager = NonceManager(self.w3, self.account.address)
+                    self.nonce_manager.sync()
+                    # A new write endpoint has its own view of our pending transactions
+                    self.w3.provider.on_write_failover.append(self.nonce_manager.sync)
+                    print(f"Blockchain initialized: {settings.CONTRACT_ADDRESS} (v2: {settings.CONTRACT_V2_ADDRESS or 'not set'})")
                 else:
                     print("Blockchain Warning: Could not connect to RPC")
                     self.w3 = None
@@ -51,91 +437,299 @@ class BlockchainService:
                 print(f"Blockchain Init Warning: {e}")
                 self.w3 = None
 
+    @property
+    def is_connected(self) -> bool:
+        return self.w3 is not None
+
+    @property
+    def issue_version(self) -> int:
+        """Contract version new certificates and Merkle roots are written to."""
+        return 2 if settings.CONTRACT_V2_ADDRESS else 1
+
+    def _contract(self, version: int):
+        return self.contract_v2 if version == 2 else self.contract
+
+    @staticmethod
+    def _key(cert_hash: str, version: int):
+        # v2 stores the SHA-256 itself instead of its 64-character hex string
+        return bytes.fromhex(cert_hash) if version == 2 else cert_hash
+
+    @contextmanager
+    def signed_transaction(self, function_name: str, args: list, version: int = 1):
+        """Yields (raw transaction, tx hash) for a contract call signed with a reserved nonce.
+
+        The nonce is given back if the block raises, so a caller can persist
+        the raw transaction inside the block and only send it once it is safe
+        to resend after a crash.
+        """
+        contract = self._contract(version)
+        tx = {
+            'from': self.account.address,
+            'to': contract.address,
+            'value': 0,
+            'data': contract.encode_abi(function_name, args),
+        }
+        # Chain id, gas limit and fees come from caches; usually only the send is a round trip
+        tx['gas'] = fee_engine.gas_limit(tx)
+        tx['chainId'] = fee_engine.chain_id
+        tx.update(fee_engine.fee_fields())
+
+        # Only the nonce reservation is serialized; estimates and receipts run concurrently
+        with self.nonce_manager.reserve() as nonce:
+            tx['nonce'] = nonce
+            signed_tx = self.w3.eth.account.sign_transaction(tx, private_key=settings.PRIVATE_KEY)
+            yield self.w3.to_hex(signed_tx.raw_transaction), self.w3.to_hex(signed_tx.hash)
+
+    @contextmanager
+    def signed_issue(self, cert_hash: str):
+        """signed_transaction for issueCertificate on the contract new certificates go to."""
+        version = self.issue_version
+        with self.signed_transaction("issueCertificate", [self._key(cert_hash, version)], version) as signed:
+            yield signed
+
+    def replacement_transaction(self, raw_tx: str):
+        """Re-signs a stuck transaction at the same nonce with its fees bumped; returns (raw tx, tx hash).
+
+        The fees are raised by FEE_REPLACEMENT_BUMP, or to the current fees if
+        the market has moved further than that.
+        """
+        tx = _decode_signed(raw_tx)
+        current = fee_engine.fee_fields()
+        for field in ("gasPrice", "maxFeePerGas", "maxPriorityFeePerGas"):
+            if field in tx:
+                tx[field] = max(_bumped(tx[field]), current.get(field, 0))
+        signed_tx = self.w3.eth.account.sign_transaction(tx, private_key=settings.PRIVATE_KEY)
+        return self.w3.to_hex(signed_tx.raw_transaction), self.w3.to_hex(signed_tx.hash)
+
+    def send_raw_transaction(self, raw_tx: str) -> str:
+        return self.w3.to_hex(self.w3.eth.send_raw_transaction(raw_tx))
+
+    def _transact(self, function_name: str, args: list, version: int = 1):
+        """Signs and broadcasts a contract call and returns its hash without waiting for a receipt."""
+        with self.signed_transaction(function_name, args, version) as (raw_tx, tx_hash):
+            self.send_raw_transaction(raw_tx)
+        return tx_hash
+
     def issue_on_chain(self, cert_hash: str):
         if not self.w3:
             return "MOCK_TX_HASH_NO_RPC"
 
         try:
-            nonce = self.w3.eth.get_transaction_count(self.account.address)
-            
-            base_tx = {
-                'from': self.account.address,
-                'to': settings.CONTRACT_ADDRESS,
-                'data': self.contract.encode_abi("issueCertificate", [cert_hash]),
-            }
-            gas_estimate = self.w3.eth.estimate_gas(base_tx)
-            
-            tx = self.contract.functions.issueCertificate(cert_hash).build_transaction({
-                'chainId': self.w3.eth.chain_id,
-                'gas': int(gas_estimate * 1.2), 
-                'gasPrice': self.w3.eth.gas_price,
-                'nonce': nonce,
-            })
+            version = self.issue_version
+            return self._transact("issueCertificate", [self._key(cert_hash, version)], version)
+        except Exception as e:
+            print(f"Blockchain Error: {e}")
+            raise e
 
-            signed_tx = self.w3.eth.account.sign_transaction(tx, private_key=settings.PRIVATE_KEY)
-            tx_hash = self.w3.eth.send_raw_transaction(signed_tx.raw_transaction)
-            
-            receipt = self.w3.eth.wait_for_transaction_receipt(tx_hash, timeout=120)
-            if receipt.status != 1:
-                raise Exception("Transaction failed on chain")
-                
-            return self.w3.to_hex(tx_hash)
+    def issue_batch_on_chain(self, cert_hashes: list[str]):
+        """Issues a whole cohort in one v2 issueBatch transaction."""
+        if not self.w3:
+            return "MOCK_TX_HASH_NO_RPC"
+
+        try:
+            return self._transact("issueBatch", [[self._key(h, 2) for h in cert_hashes]], 2)
         except Exception as e:
             print(f"Blockchain Error: {e}")
             raise e
 
-    def revoke_on_chain(self, cert_hash: str):
+    def revoke_on_chain(self, cert_hash: str, contract_version: int = 1):
         if not self.w3:
             return "MOCK_TX_HASH_REVOKED_NO_RPC"
 
         try:
-            nonce = self.w3.eth.get_transaction_count(self.account.address)
-            
-            base_tx = {
-                'from': self.account.address,
-                'to': settings.CONTRACT_ADDRESS,
-                'data': self.contract.encode_abi("revokeCertificate", [cert_hash]),
-            }
-            gas_estimate = self.w3.eth.estimate_gas(base_tx)
-            
-            tx = self.contract.functions.revokeCertificate(cert_hash).build_transaction({
-                'chainId': self.w3.eth.chain_id,
-                'gas': int(gas_estimate * 1.2),
-                'gasPrice': self.w3.eth.gas_price,
-                'nonce': nonce,
-            })
+            return self._transact("revokeCertificate", [self._key(cert_hash, contract_version)], contract_version)
+        except Exception as e:
+            print(f"Blockchain Revocation Error: {e}")
+            raise e
 
-            signed_tx = self.w3.eth.account.sign_transaction(tx, private_key=settings.PRIVATE_KEY)
-            tx_hash = self.w3.eth.send_raw_transaction(signed_tx.raw_transaction)
-            
-            receipt = self.w3.eth.wait_for_transaction_receipt(tx_hash, timeout=120)
-            if receipt.status != 1:
-                raise Exception("Revocation failed on chain")
-                
-            return self.w3.to_hex(tx_hash)
+    def anchor_root_on_chain(self, merkle_root: bytes, size: int):
+        if not self.w3:
+            return "MOCK_TX_HASH_ANCHORED_NO_RPC"
+
+        try:
+            return self._transact("anchorRoot", [merkle_root, size], self.issue_version)
+        except Exception as e:
+            print(f"Blockchain Anchoring Error: {e}")
+            raise e
+
+    def revoke_leaf_on_chain(self, merkle_root: bytes, leaf: bytes, proof: list[bytes], contract_version: int = 1):
+        if not self.w3:
+            return "MOCK_TX_HASH_REVOKED_NO_RPC"
+
+        try:
+            return self._transact("revokeLeaf", [merkle_root, leaf, proof], contract_version)
         except Exception as e:
             print(f"Blockchain Revocation Error: {e}")
             raise e
 
-    def verify_on_chain(self, cert_hash: str):
+    def get_receipt_statuses(self, tx_hashes: list[str]) -> dict:
+        """Maps each tx hash to its receipt status (1 success, 0 reverted) or None if not mined yet.
+
+        All receipts are requested in a single JSON-RPC batch.
+        """
         if not self.w3:
-            return {
-                "exists": True,
-                "issuer": "0xMOCK_ISSUER",
-                "timestamp": 1700000000,
-                "revoked": False
-            }
-        
+            return {tx_hash: 1 for tx_hash in tx_hashes}
+        if not tx_hashes:
+            return {}
+
+        responses = self.w3.provider.make_batch_request(
+            [("eth_getTransactionReceipt", [tx_hash]) for tx_hash in tx_hashes]
+        )
+        if not isinstance(responses, list):
+            raise Exception(f"Receipt batch failed: {responses.get('error')}")
+
+        statuses = {}
+        for tx_hash, response in zip(tx_hashes, responses):
+            receipt = response.get("result")
+            statuses[tx_hash] = int(receipt["status"], 16) if receipt else None
+        return statuses
+
+    def get_block_number(self) -> int:
+        return self.w3.eth.block_number
+
+    def get_block_hash(self, block_number: int) -> str:
+        return self.w3.to_hex(self.w3.eth.get_block(block_number)["hash"])
+
+    def get_contract_events(self, from_block: int, to_block: int) -> list:
+        """Fetches and decodes every indexed event of both contracts in the block range with one eth_getLogs."""
+        contracts = [c for c in (self.contract, self.contract_v2) if c]
+        decoders = {}
+        for contract in contracts:
+            for name in INDEXED_EVENTS:
+                event = contract.events[name]()
+                decoders[(contract.address, event.topic)] = event
+
+        logs = self.w3.eth.get_logs({
+            "address": [contract.address for contract in contracts],
+            "fromBlock": from_block,
+            "toBlock": to_block,
+        })
+
+        events = []
+        for log in logs:
+            event = decoders.get((log["address"], self.w3.to_hex(log["topics"][0])))
+            if event:
+                events.append(event.process_log(log))
+        return events
+
+    def _batch_call(self, calls: list, version: int = 1, reverted: list = None) -> list:
+        """Runs (function_name, args) view calls as JSON-RPC batches of RPC_BATCH_SIZE.
+
+        Each call is decoded on its own; a call that fails comes back as None
+        instead of failing the whole batch. When `reverted` is given, the
+        indexes of calls the contract itself rejected (a revert or an empty
+        result) are appended to it, as opposed to calls the node failed to serve.
+        """
+        contract = self._contract(version)
+        results = []
+        for start in range(0, len(calls), settings.RPC_BATCH_SIZE):
+            chunk = calls[start:start + settings.RPC_BATCH_SIZE]
+            responses = self.w3.provider.make_batch_request([
+                ("eth_call", [{"to": contract.address, "data": contract.encode_abi(name, args)}, "latest"])
+                for name, args in chunk
+            ])
+            if not isinstance(responses, list):
+                raise Exception(f"Batch call failed: {responses.get('error')}")
+
+            for (name, _), response in zip(chunk, responses):
+                result = response.get("result")
+                error = response.get("error")
+                if error or not result or result == "0x":
+                    if reverted is not None and (_is_revert(error) if error else True):
+                        reverted.append(len(results))
+                    results.append(None)
+                    continue
+                results.append(self.w3.codec.decode(OUTPUT_TYPES[version][name], bytes.fromhex(result[2:])))
+        return results
+
+    def verify_many_on_chain(self, cert_hashes: list[str], contract_version: int = 1) -> dict:
+        """verify_on_chain for many hashes in as few round trips as possible.
+
+        Hashes go to verifyMany in chunks of VERIFY_MANY_CHUNK_SIZE and the
+        chunks share JSON-RPC batches, so unknown certificates read as
+        exists=False instead of reverting. Hashes whose read failed map to None.
+        """
+        if not self.w3:
+            return {cert_hash: dict(MOCK_VERIFICATION) for cert_hash in cert_hashes}
+
+        try:
+            if contract_version == 2:
+                return self._verify_many_chunked(cert_hashes, 2)
+            if self.supports_verify_many:
+                results = self._verify_many_chunked(cert_hashes, 1)
+                if results is not None:
+                    return results
+                print("Verification Warning: contract has no verifyMany, falling back to verifyCertificate")
+                self.supports_verify_many = False
+            return self._verify_each(cert_hashes)
+        except Exception as e:
+            print(f"Verification Check Error: {e}")
+            return {cert_hash: None for cert_hash in cert_hashes}
+
+    def _verify_many_chunked(self, cert_hashes: list[str], version: int):
+        size = settings.VERIFY_MANY_CHUNK_SIZE
+        chunks = [cert_hashes[start:start + size] for start in range(0, len(cert_hashes), size)]
+        reverted = []
+        outputs = self._batch_call(
+            [("verifyMany", [[self._key(h, version) for h in chunk]]) for chunk in chunks], version, reverted
+        )
+        # Only a contract without verifyMany rejects every chunk; node errors are just failed reads
+        if chunks and len(reverted) == len(chunks):
+            return None
+
+        results = {}
+        for chunk, output in zip(chunks, outputs):
+            if output is None:
+                results.update({cert_hash: None for cert_hash in chunk})
+                continue
+            for cert_hash, exists, issuer, timestamp, revoked in zip(chunk, *output):
+                results[cert_hash] = {"exists": exists, "issuer": issuer, "timestamp": timestamp, "revoked": revoked}
+        return results
+
+    def _verify_each(self, cert_hashes: list[str]) -> dict:
+        # verifyCertificate reverts for unknown hashes, which comes back as None
+        outputs = self._batch_call([("verifyCertificate", [cert_hash]) for cert_hash in cert_hashes])
+        results = {}
+        for cert_hash, output in zip(cert_hashes, outputs):
+            if output is None:
+                results[cert_hash] = None
+                continue
+            exists, issuer, timestamp, revoked = output
+            results[cert_hash] = {"exists": exists, "issuer": issuer, "timestamp": timestamp, "revoked": revoked}
+        return results
+
+    def verify_roots_many_on_chain(self, pairs: list[tuple[bytes, bytes]], contract_version: int = 1) -> dict:
+        """Checks many (root, leaf) pairs with verifyRoot and isLeafRevoked, keyed by the leaf's hex."""
+        if not self.w3:
+            return {Web3.to_hex(leaf): dict(MOCK_VERIFICATION) for _, leaf in pairs}
+
+        roots = list(dict.fromkeys(root for root, _ in pairs))
         try:
-            exists, issuer, timestamp, revoked = self.contract.functions.verifyCertificate(cert_hash).call()
-            return {
+            outputs = self._batch_call(
+                [("verifyRoot", [root]) for root in roots] + [("isLeafRevoked", [leaf]) for _, leaf in pairs],
+                contract_version
+            )
+        except Exception as e:
+            print(f"Root Verification Check Error: {e}")
+            return {Web3.to_hex(leaf): None for _, leaf in pairs}
+
+        anchors = dict(zip(roots, outputs[:len(roots)]))
+        results = {}
+        for (root, leaf), revoked in zip(pairs, outputs[len(roots):]):
+            anchor = anchors[root]
+            if anchor is None or revoked is None:
+                results[Web3.to_hex(leaf)] = None
+                continue
+            exists, issuer, timestamp = anchor
+            results[Web3.to_hex(leaf)] = {
                 "exists": exists,
                 "issuer": issuer,
                 "timestamp": timestamp,
-                "revoked": revoked
+                "revoked": revoked[0] if exists else False,
             }
-        except Exception as e:
-            print(f"Verification Check Error: {e}")
-            return None
+        return results
+
+    def verify_on_chain(self, cert_hash: str, contract_version: int = 1):
+        return self.verify_many_on_chain([cert_hash], contract_version)[cert_hash]
 
 blockchain_service = BlockchainService()
@@ -0,0 +1,348 @@
+import csv
+import io
+import json
+import queue
+import threading
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Optional
+from sqlalchemy import update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+from app.config.settings import settings
+from app.db.database import SessionLocal
+from app.models.bulk_job import BulkJob, BulkJobItem
+from app.models.certificate import Certificate
+from app.schemas.organization import OrganizationOut
+from app.services.blockchain_service import blockchain_service
+from app.services.certificate_service import RenderedPdf, generate_certificate_pdf, get_content_hash
+from app.services.minio_service import minio_service
+from app.services.metrics import stage_timer
+
+_DONE = object()
+
+@dataclass
+class BulkRow:
+    item_id: int
+    row_number: int
+    owner_name: str
+    course_name: str
+    cert_hash: Optional[str] = None
+    pdf: Optional[RenderedPdf] = None
+    object_name: Optional[str] = None
+    file_hash: Optional[str] = None
+    tx_hash: Optional[str] = None
+    error: Optional[str] = None
+
+def _read_records(text, name: str):
+    if name.endswith(".csv"):
+        for row in csv.DictReader(text):
+            yield {"owner_name": row.get("owner_name"), "course_name": row.get("course_name")}
+    elif name.endswith((".ndjson", ".jsonl")):
+        for line in text:
+            if not line.strip():
+                continue
+            try:
+                record = json.loads(line)
+                yield {"owner_name": record.get("owner_name"), "course_name": record.get("course_name")}
+            except (ValueError, AttributeError) as e:
+                yield {"owner_name": None, "course_name": None, "error": f"Invalid JSON: {e}"}
+    else:
+        raise ValueError("Recipients file must be .csv or .ndjson")
+
+def parse_recipients(file, filename: str) -> list[dict]:
+    """Reads a CSV (with owner_name,course_name header) or NDJSON upload into row dicts.
+
+    Rows that cannot be parsed are returned with an "error" key instead of failing the whole file.
+    Reading stops as soon as the file goes over BULK_MAX_ROWS.
+    """
+    text = io.TextIOWrapper(file, encoding="utf-8-sig", newline="")
+    rows = []
+    for row in _read_records(text, (filename or "").lower()):
+        if len(rows) == settings.BULK_MAX_ROWS:
+            raise ValueError(f"Recipients file has more than {settings.BULK_MAX_ROWS} rows")
+        if "error" not in row and not (row["owner_name"] and row["course_name"]):
+            row["error"] = "owner_name and course_name are required"
+        rows.append(row)
+    return rows
+
+def create_job(db: Session, organization_id: int, rows: list[dict]) -> BulkJob:
+    job = BulkJob(id=uuid.uuid4().hex, organization_id=organization_id, total=len(rows))
+    db.add(job)
+    db.add_all([
+        BulkJobItem(
+            job_id=job.id,
+            row_number=number,
+            owner_name=row["owner_name"],
+            course_name=row["course_name"],
+            status="failed" if row.get("error") else "pending",
+            error=row.get("error"),
+        )
+        for number, row in enumerate(rows, start=1)
+    ])
+    job.failed = sum(1 for row in rows if row.get("error"))
+    db.commit()
+    db.refresh(job)
+    return job
+
+class _Stage:
+    """A pool of threads that applies `fn` to every row from `inbox` and passes it on.
+
+    Rows that raise are sent straight to `failures` so later stages skip them.
+    """
+
+    def __init__(self, name: str, fn, workers: int, inbox: queue.Queue, outbox: queue.Queue, failures: queue.Queue):
+        self.name = name
+        self.fn = fn
+        self.workers = max(1, workers)
+        self.inbox = inbox
+        self.outbox = outbox
+        self.failures = failures
+        self._running = self.workers
+        self._lock = threading.Lock()
+
+    def start(self):
+        for i in range(self.workers):
+            threading.Thread(target=self._run, name=f"bulk-{self.name}-{i}", daemon=True).start()
+
+    def _run(self):
+        while True:
+            row = self.inbox.get()
+            if row is _DONE:
+                # Leave the marker for sibling workers
+                self.inbox.put(_DONE)
+                break
+            try:
+                with stage_timer("bulk_issue", self.name):
+                    row = self.fn(row)
+                self.outbox.put(row)
+            except Exception as e:
+                row.error = f"{self.name} failed: {e}"
+                self.failures.put(row)
+        self._worker_done()
+
+    def _worker_done(self):
+        with self._lock:
+            self._running -= 1
+            last = self._running == 0
+        if last:
+            self.outbox.put(_DONE)
+
+class _BatchStage(_Stage):
+    """A _Stage whose `fn` takes a list of up to `batch_size` rows.
+
+    A worker waits at most BULK_ISSUE_BATCH_WAIT_SECONDS for the next row
+    before sending a partial batch, so a slow upstream never stalls it.
+    """
+
+    def __init__(self, name: str, fn, workers: int, inbox: queue.Queue, outbox: queue.Queue,
+                 failures: queue.Queue, batch_size: int):
+        super().__init__(name, fn, workers, inbox, outbox, failures)
+        self.batch_size = batch_size
+
+    def _run(self):
+        done = False
+        while not done:
+            batch = []
+            while len(batch) < self.batch_size:
+                try:
+                    row = self.inbox.get(timeout=None if not batch else settings.BULK_ISSUE_BATCH_WAIT_SECONDS)
+                except queue.Empty:
+                    break
+                if row is _DONE:
+                    self.inbox.put(_DONE)
+                    done = True
+                    break
+                batch.append(row)
+            if not batch:
+                continue
+
+            try:
+                for row in self.fn(batch):
+                    self.outbox.put(row)
+            except Exception as e:
+                for row in batch:
+                    row.error = f"{self.name} failed: {e}"
+                    self.failures.put(row)
+        self._worker_done()
+
+class BulkIssuancePipeline:
+    """Streams the rows of one job through render, upload, anchor and insert stages running in parallel."""
+
+    def __init__(self, job_id: str, organization_id: int, org_name: str, template_name: str = None):
+        self.job_id = job_id
+        self.organization_id = organization_id
+        self.org_name = org_name
+        self.template_name = template_name
+
+    def _render(self, row: BulkRow) -> BulkRow:
+        # Bulk jobs wait for a render slot instead of being rejected when the pool is busy
+        row.pdf = generate_certificate_pdf(
+            row.owner_name, row.course_name, self.org_name, row.cert_hash, self.template_name, block=True
+        )
+        return row
+
+    def _upload(self, row: BulkRow) -> BulkRow:
+        row.file_hash = row.pdf.sha256
+        row.object_name = minio_service.upload_pdf(row.pdf.data, row.file_hash)
+        # Only the object name travels further down the pipeline
+        row.pdf = None
+        return row
+
+    def _anchor(self, row: BulkRow) -> BulkRow:
+        # Merkle mode rows are picked up by the next anchored batch
+        if settings.ANCHOR_MODE != "merkle":
+            row.tx_hash = blockchain_service.issue_on_chain(row.cert_hash)
+        return row
+
+    def _anchor_batch(self, rows: list[BulkRow]) -> list[BulkRow]:
+        # One issueBatch transaction for the whole group on the v2 contract
+        tx_hash = blockchain_service.issue_batch_on_chain([row.cert_hash for row in rows])
+        for row in rows:
+            row.tx_hash = tx_hash
+        return rows
+
+    def _anchor_stage(self, inbox: queue.Queue, outbox: queue.Queue) -> _Stage:
+        if settings.ANCHOR_MODE != "merkle" and blockchain_service.issue_version == 2:
+            return _BatchStage("anchor", self._anchor_batch, settings.BULK_ANCHOR_WORKERS, inbox, outbox, outbox,
+                               settings.BULK_ISSUE_BATCH_SIZE)
+        return _Stage("anchor", self._anchor, settings.BULK_ANCHOR_WORKERS, inbox, outbox, outbox)
+
+    def _load_rows(self, db: Session) -> list[BulkRow]:
+        items = (
+            db.query(BulkJobItem)
+            .filter(BulkJobItem.job_id == self.job_id, BulkJobItem.status == "pending")
+            .order_by(BulkJobItem.row_number)
+            .all()
+        )
+        rows = [BulkRow(item.id, item.row_number, item.owner_name, item.course_name) for item in items]
+
+        seen = set()
+        for row in rows:
+            row.cert_hash = get_content_hash(row.owner_name, row.course_name, self.org_name)
+            if row.cert_hash in seen:
+                row.error = "Duplicate recipient in this file"
+            seen.add(row.cert_hash)
+
+        # Rows already issued are rejected before any rendering or gas is spent
+        hashes = [row.cert_hash for row in rows if not row.error]
+        existing = set()
+        for start in range(0, len(hashes), 500):
+            chunk = hashes[start:start + 500]
+            existing.update(h for (h,) in db.query(Certificate.cert_hash).filter(Certificate.cert_hash.in_(chunk)))
+        for row in rows:
+            if not row.error and row.cert_hash in existing:
+                row.error = "Certificate already issued"
+        return rows
+
+    def run(self):
+        db = SessionLocal()
+        try:
+            job = db.query(BulkJob).filter(BulkJob.id == self.job_id).first()
+            job.status = "running"
+            db.commit()
+
+            rows = self._load_rows(db)
+            size = settings.BULK_QUEUE_SIZE
+            to_render, to_upload, to_anchor, to_insert = (queue.Queue(size) for _ in range(4))
+
+            stages = [
+                _Stage("render", self._render, settings.BULK_RENDER_WORKERS, to_render, to_upload, to_insert),
+                _Stage("upload", self._upload, settings.BULK_UPLOAD_WORKERS, to_upload, to_anchor, to_insert),
+                self._anchor_stage(to_anchor, to_insert),
+            ]
+            for stage in stages:
+                stage.start()
+
+            def feed():
+                for row in rows:
+                    (to_insert if row.error else to_render).put(row)
+                to_render.put(_DONE)
+
+            threading.Thread(target=feed, name="bulk-feed", daemon=True).start()
+            self._insert(db, to_insert)
+
+            job.status = "completed"
+            job.finished_at = datetime.now(timezone.utc)
+            db.commit()
+        except Exception as e:
+            print(f"Bulk Issuance Error ({self.job_id}): {e}")
+            db.rollback()
+            db.query(BulkJob).filter(BulkJob.id == self.job_id).update(
+                {BulkJob.status: "failed", BulkJob.finished_at: datetime.now(timezone.utc)}
+            )
+            db.commit()
+        finally:
+            db.close()
+
+    def _insert(self, db: Session, inbox: queue.Queue):
+        """Single writer: collects finished rows and commits them BULK_INSERT_BATCH_SIZE at a time."""
+        batch = []
+        while True:
+            row = inbox.get()
+            if row is _DONE:
+                break
+            batch.append(row)
+            if len(batch) >= settings.BULK_INSERT_BATCH_SIZE or inbox.empty():
+                self._flush(db, batch)
+                batch = []
+        if batch:
+            self._flush(db, batch)
+
+    def _flush(self, db: Session, rows: list[BulkRow]):
+        try:
+            self._write(db, rows)
+        except IntegrityError:
+            # One bad row should not fail its whole batch
+            db.rollback()
+            for row in rows:
+                try:
+                    self._write(db, [row])
+                except IntegrityError as e:
+                    db.rollback()
+                    row.error = f"insert failed: {e.orig}"
+                    self._write(db, [row])
+
+    def _write(self, db: Session, rows: list[BulkRow]):
+        issued = [row for row in rows if not row.error]
+        certs = [
+            Certificate(
+                cert_hash=row.cert_hash,
+                owner_name=row.owner_name,
+                course_name=row.course_name,
+                issued_by=self.organization_id,
+                storage_url=row.object_name,
+                file_hash=row.file_hash,
+                tx_hash=row.tx_hash,
+                chain_status="pending" if row.tx_hash is None or blockchain_service.is_connected else "confirmed",
+                contract_version=blockchain_service.issue_version,
+            )
+            for row in issued
+        ]
+        db.add_all(certs)
+        db.flush()
+
+        cert_ids = {cert.cert_hash: cert.id for cert in certs}
+        db.execute(update(BulkJobItem), [
+            {
+                "id": row.item_id,
+                "status": "failed" if row.error else "issued",
+                "cert_hash": row.cert_hash,
+                "certificate_id": cert_ids.get(row.cert_hash) if not row.error else None,
+                "error": row.error,
+            }
+            for row in rows
+        ])
+        db.query(BulkJob).filter(BulkJob.id == self.job_id).update({
+            BulkJob.succeeded: BulkJob.succeeded + len(issued),
+            BulkJob.failed: BulkJob.failed + len(rows) - len(issued),
+        })
+        db.commit()
+
+_job_executor = ThreadPoolExecutor(max_workers=settings.BULK_MAX_CONCURRENT_JOBS, thread_name_prefix="bulk-job")
+
+def start_job(job: BulkJob, org: OrganizationOut):
+    pipeline = BulkIssuancePipeline(job.id, job.organization_id, org.name, org.certificate_template)
+    _job_executor.submit(pipeline.run)
@@ -1,17 +1,59 @@
 import hashlib
 import os
+import re
 import qrcode
 import base64
 from io import BytesIO
-from jinja2 import Environment, FileSystemLoader
+from dataclasses import dataclass
+from jinja2 import Environment, FileSystemBytecodeCache, FileSystemLoader
+from reportlab import rl_config
 from xhtml2pdf import pisa
 from datetime import datetime
 from app.config.settings import settings
 
-STORAGE_DIR = "storage"
+# No creation timestamp or random /ID in the PDF: identical certificates render to
+# identical bytes, so they share one content-addressed object in storage
+rl_config.invariant = 1
+
 TEMPLATE_DIR = "app/templates"
+DEFAULT_TEMPLATE = "certificate_template.html"
+HASH_CHUNK_SIZE = 1024 * 1024
+
+# Compiled once per process. The bytecode cache on disk lets new processes
+# (and renderer pool workers) skip compilation after a restart, and
+# auto_reload recompiles a template only when its file's mtime changes.
+os.makedirs(settings.TEMPLATE_CACHE_DIR, exist_ok=True)
+template_env = Environment(
+    loader=FileSystemLoader(TEMPLATE_DIR),
+    bytecode_cache=FileSystemBytecodeCache(settings.TEMPLATE_CACHE_DIR),
+    auto_reload=True,
+    cache_size=settings.TEMPLATE_CACHE_SIZE,
+)
+
+def available_templates() -> list[str]:
+    return sorted(name for name in template_env.list_templates() if name.endswith(".html"))
+
+@dataclass
+class RenderedPdf:
+    data: bytes
+    sha256: str
+
+class HashingBuffer(BytesIO):
+    """In-memory PDF sink that hashes bytes as the renderer writes them."""
+
+    def __init__(self):
+        super().__init__()
+        self._sha256 = hashlib.sha256()
+
+    def write(self, data) -> int:
+        self._sha256.update(data)
+        return super().write(data)
+
+    def hexdigest(self) -> str:
+        return self._sha256.hexdigest()
 
-def generate_certificate_pdf(owner_name: str, course_name: str, org_name: str, cert_hash: str) -> str:
+def render_certificate_pdf(owner_name: str, course_name: str, org_name: str, cert_hash: str, template_name: str = None) -> RenderedPdf:
+    """Renders the certificate to PDF bytes and their SHA-256. CPU-bound; runs inside the renderer pool workers."""
     verify_url = f"{settings.FRONTEND_URL}/verify?hash={cert_hash}"
     qr = qrcode.QRCode(version=1, box_size=10, border=5)
     qr.add_data(verify_url)
@@ -23,8 +65,7 @@ def generate_certificate_pdf(owner_name: str, course_name: str, org_name: str, c
     qr_base64 = base64.b64encode(buffered.getvalue()).decode()
     qr_data_uri = f"data:image/png;base64,{qr_base64}"
 
-    env = Environment(loader=FileSystemLoader(TEMPLATE_DIR))
-    template = env.get_template("certificate_template.html")
+    template = template_env.get_template(template_name or DEFAULT_TEMPLATE)
     
     html_content = template.render(
         owner_name=owner_name,
@@ -35,25 +76,52 @@ def generate_certificate_pdf(owner_name: str, course_name: str, org_name: str, c
         cert_hash=cert_hash
     )
 
-    timestamp = datetime.now().strftime("%Y%m%d%H%M%S")
-    filename = f"cert_{owner_name.replace(' ', '_')}_{timestamp}.pdf"
-    filepath = os.path.join(STORAGE_DIR, filename)
-
-    with open(filepath, "wb") as result_file:
-        pisa_status = pisa.CreatePDF(html_content, dest=result_file)
+    pdf_buffer = HashingBuffer()
+    pisa_status = pisa.CreatePDF(html_content, dest=pdf_buffer)
         
     if pisa_status.err:
         raise Exception("Failed to generate PDF from HTML")
 
-    return filepath
+    return RenderedPdf(data=pdf_buffer.getvalue(), sha256=pdf_buffer.hexdigest())
+
+def warm_up():
+    """Loads fonts and the QR encoder by rendering one throwaway certificate, and compiles every template."""
+    for name in available_templates():
+        template_env.get_template(name)
+    render_certificate_pdf("Warm Up", "Warm Up", "Warm Up", "0" * 64)
+
+def generate_certificate_pdf(owner_name: str, course_name: str, org_name: str, cert_hash: str,
+                             template_name: str = None, block: bool = False) -> RenderedPdf:
+    from app.services.pdf_renderer import renderer_pool
+    return renderer_pool.render(owner_name, course_name, org_name, cert_hash, template_name, block=block)
+
+def content_object_name(sha256: str) -> str:
+    """Object name for a PDF derived from its SHA-256, fanned out over two directory levels."""
+    return f"certs/sha256/{sha256[:2]}/{sha256[2:4]}/{sha256}.pdf"
+
+class UploadTooLarge(ValueError):
+    pass
+
+async def hash_upload(upload, max_bytes: int) -> str:
+    """SHA-256 of an UploadFile, read in HASH_CHUNK_SIZE blocks straight from its spooled file."""
+    if upload.size is not None and upload.size > max_bytes:
+        raise UploadTooLarge(f"File exceeds the {max_bytes} byte limit")
 
-def get_file_hash(filepath: str) -> str:
     sha256_hash = hashlib.sha256()
-    with open(filepath, "rb") as f:
-        for byte_block in iter(lambda: f.read(4096), b""):
-            sha256_hash.update(byte_block)
+    total = 0
+    while chunk := await upload.read(HASH_CHUNK_SIZE):
+        total += len(chunk)
+        if total > max_bytes:
+            raise UploadTooLarge(f"File exceeds the {max_bytes} byte limit")
+        sha256_hash.update(chunk)
     return sha256_hash.hexdigest()
 
+CERT_HASH_PATTERN = re.compile(r"[0-9a-f]{64}")
+
+def is_cert_hash(value: str) -> bool:
+    """Whether `value` has the shape of a certificate hash: a lowercase hex SHA-256."""
+    return CERT_HASH_PATTERN.fullmatch(value) is not None
+
 def get_content_hash(owner_name: str, course_name: str, org_name: str) -> str:
     """Preview hash based on content before PDF generation"""
     content = f"{owner_name}|{course_name}|{org_name}|{datetime.now().strftime('%Y%m%d')}"
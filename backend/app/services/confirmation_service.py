@@ -0,0 +1,103 @@
+from datetime import datetime, timedelta, timezone
+from sqlalchemy import or_
+from sqlalchemy.orm import Session
+from app.config.settings import settings
+from app.db.database import SessionLocal
+from app.models.certificate import Certificate
+from app.services.anchor_service import release_failed_batch
+from app.services.blockchain_service import blockchain_service
+from app.services.fee_engine import fee_engine
+from app.services.worker import PollingWorker
+
+def _pending_tx_hash(cert: Certificate) -> str:
+    return cert.revoke_tx_hash if cert.revoked and cert.revoke_tx_hash else cert.tx_hash
+
+def _mark_failed(db: Session, cert: Certificate, released: set):
+    """Settles a certificate whose transaction reverted or was never mined.
+
+    Certificates of a merkle batch share one transaction; the batch is put
+    back in the anchor queue once, and `released` records it for its siblings.
+    """
+    if cert.revoked and cert.revoke_tx_hash:
+        # Revocation never made it on chain; the confirmed issuance still stands
+        print(f"Confirmation Warning: revocation {cert.revoke_tx_hash} failed, certificate {cert.id} is not revoked")
+        cert.revoked = False
+        cert.revoke_tx_hash = None
+        cert.chain_status = "confirmed"
+    elif cert.anchor_batch_id:
+        released.add(cert.anchor_batch_id)
+        release_failed_batch(db, cert.anchor_batch_id)
+    else:
+        cert.chain_status = "failed"
+
+def confirm_pending(db: Session, after_id: int = 0):
+    """Checks receipts for the page of pending certificates after `after_id`.
+
+    Returns the last id on the page to continue from, or None after the last
+    page. Unsettled certificates are paged past rather than blocking the
+    certificates behind them until they time out.
+    """
+    certs = (
+        db.query(Certificate)
+        .filter(
+            Certificate.chain_status == "pending",
+            or_(Certificate.tx_hash.isnot(None), Certificate.revoke_tx_hash.isnot(None)),
+            Certificate.id > after_id,
+        )
+        .order_by(Certificate.id)
+        .limit(settings.CONFIRMATION_BATCH_SIZE)
+        .all()
+    )
+    if not certs:
+        return None
+
+    # Read before anything changes: releasing a batch clears the tx hash of all its certificates
+    pending = [(cert, _pending_tx_hash(cert), cert.anchor_batch_id) for cert in certs]
+    last_id = certs[-1].id
+    statuses = blockchain_service.get_receipt_statuses(list({tx_hash for _, tx_hash, _ in pending}))
+    deadline = datetime.now(timezone.utc) - timedelta(seconds=settings.CONFIRMATION_TIMEOUT_SECONDS)
+    released = set()
+    timed_out = False
+    reverted = False
+
+    for cert, tx_hash, batch_id in pending:
+        if batch_id and batch_id in released:
+            # Already back in the anchor queue with the rest of its batch
+            continue
+        status = statuses.get(tx_hash)
+        if status == 1:
+            cert.chain_status = "confirmed"
+        elif status == 0:
+            _mark_failed(db, cert, released)
+            reverted = True
+        elif cert.chain_updated_at and cert.chain_updated_at.replace(tzinfo=timezone.utc) < deadline:
+            print(f"Confirmation Warning: {tx_hash} not mined after {settings.CONFIRMATION_TIMEOUT_SECONDS}s")
+            _mark_failed(db, cert, released)
+            timed_out = True
+
+    db.commit()
+
+    if reverted:
+        # The revert may have been an out-of-gas from a cached limit; estimate afresh
+        fee_engine.forget_estimates()
+    if timed_out and blockchain_service.nonce_manager:
+        # A dropped transaction leaves a nonce gap that blocks everything after it
+        blockchain_service.nonce_manager.sync()
+    return last_id if len(certs) == settings.CONFIRMATION_BATCH_SIZE else None
+
+class ReceiptConfirmer(PollingWorker):
+    name = "Receipt Confirmer"
+
+    def run_once(self):
+        db = SessionLocal()
+        try:
+            after_id = confirm_pending(db)
+            while after_id is not None:
+                after_id = confirm_pending(db, after_id)
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+
+receipt_confirmer = ReceiptConfirmer(settings.CONFIRMATION_POLL_SECONDS)
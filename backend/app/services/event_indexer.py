@@ -0,0 +1,156 @@
+from datetime import datetime, timedelta, timezone
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+from web3 import Web3
+from app.config.settings import settings
+from app.db.database import SessionLocal
+from app.models.chain_event import ChainEvent, IndexerState
+from app.services.blockchain_service import blockchain_service
+from app.services.worker import PollingWorker
+
+def get_state(db: Session) -> IndexerState:
+    state = db.query(IndexerState).filter(IndexerState.id == 1).first()
+    if not state:
+        state = IndexerState(id=1, last_block=settings.INDEXER_START_BLOCK - 1)
+        db.add(state)
+        db.flush()
+    return state
+
+def _event_key(event) -> str:
+    args = event["args"]
+    if event["event"] == "RootAnchored":
+        return Web3.to_hex(args["root"])
+    if event["event"] == "LeafRevoked":
+        return Web3.to_hex(args["leaf"])
+    cert_hash = args["certHash"]
+    # v2 logs carry the raw bytes32; key it like the hex cert_hash stored in the database
+    return cert_hash if isinstance(cert_hash, str) else cert_hash.hex()
+
+def _to_row(event) -> ChainEvent:
+    args = event["args"]
+    return ChainEvent(
+        event=event["event"],
+        key=_event_key(event),
+        actor=args.get("issuer") or args.get("revoker"),
+        timestamp=args.get("timestamp"),
+        block_number=event["blockNumber"],
+        tx_hash=Web3.to_hex(event["transactionHash"]),
+        log_index=event["logIndex"],
+    )
+
+def _rewind_if_reorged(db: Session, state: IndexerState):
+    """Drops the last INDEXER_REORG_DEPTH blocks of events if the tip we indexed is no longer canonical."""
+    if state.last_block < settings.INDEXER_START_BLOCK or not state.last_block_hash:
+        return
+    if blockchain_service.get_block_hash(state.last_block) == state.last_block_hash:
+        return
+
+    rewind_to = max(state.last_block - settings.INDEXER_REORG_DEPTH, settings.INDEXER_START_BLOCK - 1)
+    print(f"Event Indexer: reorg detected at block {state.last_block}, rewinding to {rewind_to}")
+    db.query(ChainEvent).filter(ChainEvent.block_number > rewind_to).delete(synchronize_session=False)
+    state.last_block = rewind_to
+    state.last_block_hash = (
+        blockchain_service.get_block_hash(rewind_to) if rewind_to >= settings.INDEXER_START_BLOCK else None
+    )
+
+def index_next_range(db: Session) -> bool:
+    """Indexes up to INDEXER_BATCH_BLOCKS new blocks. Returns True while the index is still behind the head."""
+    state = get_state(db)
+    _rewind_if_reorged(db, state)
+
+    head = blockchain_service.get_block_number()
+    from_block = state.last_block + 1
+    to_block = min(head, from_block + settings.INDEXER_BATCH_BLOCKS - 1)
+
+    if from_block <= to_block:
+        events = blockchain_service.get_contract_events(from_block, to_block)
+        db.add_all([_to_row(event) for event in events])
+        state.last_block = to_block
+        state.last_block_hash = blockchain_service.get_block_hash(to_block)
+
+    state.head_block = head
+    state.updated_at = datetime.now(timezone.utc)
+    db.commit()
+    return state.last_block < head
+
+def is_caught_up(state: IndexerState) -> bool:
+    if not state or not state.updated_at or state.head_block is None:
+        return False
+    fresh_after = datetime.now(timezone.utc) - timedelta(seconds=settings.INDEXER_MAX_LAG_SECONDS)
+    return state.updated_at.replace(tzinfo=timezone.utc) >= fresh_after and state.last_block >= state.head_block
+
+_NOT_FOUND = {"exists": False, "revoked": False, "issuer": "None", "timestamp": 0}
+
+# Lookups are built as statements so the sync and async paths share them
+_STATE = select(IndexerState).where(IndexerState.id == 1)
+
+def _certificate_events(cert_hashes: list[str]):
+    return select(ChainEvent).where(
+        ChainEvent.key.in_(cert_hashes), ChainEvent.event.in_(["CertificateIssued", "CertificateRevoked"])
+    )
+
+def _root_events(pairs: list[tuple[str, str]]):
+    roots = {root for root, _ in pairs}
+    leaves = [leaf for _, leaf in pairs]
+    return select(ChainEvent).where(
+        (ChainEvent.key.in_(roots) & (ChainEvent.event == "RootAnchored"))
+        | (ChainEvent.key.in_(leaves) & (ChainEvent.event == "LeafRevoked"))
+    )
+
+def _found(event, revoked: bool) -> dict:
+    return {"exists": True, "issuer": event.actor, "timestamp": event.timestamp, "revoked": revoked}
+
+def _certificate_results(events, cert_hashes: list[str]) -> dict:
+    issued = {e.key: e for e in events if e.event == "CertificateIssued"}
+    revoked = {e.key for e in events if e.event == "CertificateRevoked"}
+    return {
+        cert_hash: _found(issued[cert_hash], cert_hash in revoked) if cert_hash in issued else dict(_NOT_FOUND)
+        for cert_hash in cert_hashes
+    }
+
+def _root_results(events, pairs: list[tuple[str, str]]) -> dict:
+    anchored = {e.key: e for e in events if e.event == "RootAnchored"}
+    revoked = {e.key for e in events if e.event == "LeafRevoked"}
+    return {
+        leaf: _found(anchored[root], leaf in revoked) if root in anchored else dict(_NOT_FOUND)
+        for root, leaf in pairs
+    }
+
+def lookup_certificates(db: Session, cert_hashes: list[str]):
+    """Answers verifyCertificate for many hashes with one query, or returns None when the index cannot be trusted."""
+    if not is_caught_up(db.scalars(_STATE).first()):
+        return None
+    return _certificate_results(db.scalars(_certificate_events(cert_hashes)).all(), cert_hashes)
+
+def lookup_roots(db: Session, pairs: list[tuple[str, str]]):
+    """Index equivalent of verify_roots_many_on_chain for (root, leaf) pairs, keyed by leaf."""
+    if not is_caught_up(db.scalars(_STATE).first()):
+        return None
+    return _root_results(db.scalars(_root_events(pairs)).all(), pairs)
+
+async def lookup_certificates_async(db: AsyncSession, cert_hashes: list[str]):
+    if not is_caught_up((await db.scalars(_STATE)).first()):
+        return None
+    return _certificate_results((await db.scalars(_certificate_events(cert_hashes))).all(), cert_hashes)
+
+async def lookup_roots_async(db: AsyncSession, pairs: list[tuple[str, str]]):
+    if not is_caught_up((await db.scalars(_STATE)).first()):
+        return None
+    return _root_results((await db.scalars(_root_events(pairs))).all(), pairs)
+
+class EventIndexer(PollingWorker):
+    name = "Event Indexer"
+
+    def run_once(self):
+        db = SessionLocal()
+        try:
+            while index_next_range(db):
+                pass
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+
+event_indexer = EventIndexer(settings.INDEXER_POLL_SECONDS)
@@ -0,0 +1,102 @@
+import statistics
+import threading
+import time
+from web3 import Web3
+from app.config.settings import settings
+from app.services.worker import PollingWorker
+
+class FeeEngine(PollingWorker):
+    """Supplies chain id, gas limits and fees for outgoing transactions without per-transaction RPC calls.
+
+    - chain_id is read once per process.
+    - Gas estimates are cached per (contract, function selector, calldata
+      length) for GAS_ESTIMATE_TTL_SECONDS; the length keeps batch calls of
+      different sizes apart.
+    - Fees are EIP-1559 values derived from an eth_feeHistory window that the
+      worker refreshes every FEE_REFRESH_SECONDS. Chains without a base fee
+      fall back to legacy gasPrice.
+    """
+
+    name = "Fee Engine"
+
+    def __init__(self, interval: float):
+        super().__init__(interval)
+        self.w3 = None
+        self._chain_id = None
+        self._fees = None
+        self._fees_at = 0.0
+        self._estimates = {}
+        self._lock = threading.Lock()
+
+    def bind(self, w3: Web3):
+        self.w3 = w3
+        self._chain_id = None
+        self._fees = None
+        self._estimates = {}
+
+    @property
+    def chain_id(self) -> int:
+        if self._chain_id is None:
+            self._chain_id = self.w3.eth.chain_id
+        return self._chain_id
+
+    def gas_limit(self, tx: dict) -> int:
+        key = (tx["to"], tx["data"][:10], len(tx["data"]))
+        now = time.monotonic()
+        cached = self._estimates.get(key)
+        if cached and cached[1] > now:
+            return cached[0]
+
+        gas = int(self.w3.eth.estimate_gas(tx) * settings.GAS_LIMIT_MULTIPLIER)
+        with self._lock:
+            self._estimates[key] = (gas, now + settings.GAS_ESTIMATE_TTL_SECONDS)
+        return gas
+
+    def forget_estimates(self):
+        """Drops cached gas limits, e.g. after a transaction ran out of gas."""
+        with self._lock:
+            self._estimates = {}
+
+    def fee_fields(self) -> dict:
+        """The fee part of a transaction: maxFeePerGas/maxPriorityFeePerGas, or gasPrice on legacy chains."""
+        # The worker keeps this fresh; only refresh inline if it is not running or fell behind
+        if self._fees is None or time.monotonic() - self._fees_at > 2 * self.interval:
+            self.run_once()
+        return dict(self._fees)
+
+    def run_once(self):
+        if not self.w3:
+            return
+        fees = self._eip1559_fees()
+        if fees is None:
+            fees = {"gasPrice": self.w3.eth.gas_price}
+        with self._lock:
+            self._fees = fees
+            self._fees_at = time.monotonic()
+
+    def _eip1559_fees(self):
+        try:
+            history = self.w3.eth.fee_history(
+                settings.FEE_HISTORY_BLOCKS, "latest", [settings.FEE_PRIORITY_PERCENTILE]
+            )
+        except Exception as e:
+            print(f"Fee Engine Warning: eth_feeHistory unavailable, using gasPrice: {e}")
+            return None
+
+        base_fees = history.get("baseFeePerGas") or []
+        if not base_fees or not base_fees[-1]:
+            return None
+
+        # The last entry is the base fee of the block being built next
+        next_base_fee = base_fees[-1]
+        rewards = [block[0] for block in history.get("reward") or [] if block and block[0] > 0]
+        minimum_tip = Web3.to_wei(settings.FEE_MIN_PRIORITY_GWEI, "gwei")
+        priority_fee = max(int(statistics.median(rewards)) if rewards else 0, minimum_tip)
+
+        return {
+            "maxPriorityFeePerGas": priority_fee,
+            # Headroom for the base fee to keep rising for several full blocks
+            "maxFeePerGas": int(next_base_fee * settings.FEE_BASE_FEE_MULTIPLIER) + priority_fee,
+        }
+
+fee_engine = FeeEngine(settings.FEE_REFRESH_SECONDS)
@@ -0,0 +1,337 @@
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+from sqlalchemy import or_
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+from app.config.settings import settings
+from app.db.database import SessionLocal
+from app.models.certificate import Certificate
+from app.models.issuance_job import IssuanceJob
+from app.services.blockchain_service import blockchain_service
+from app.services.certificate_service import generate_certificate_pdf
+from app.services.fee_engine import fee_engine
+from app.services.metrics import stage_timer
+from app.services.minio_service import minio_service
+from app.services.pdf_renderer import RendererSaturated
+from app.services.worker import PollingWorker
+
+# Node errors meaning an earlier send of the same raw transaction already got through
+ALREADY_SENT = ("already known", "known transaction", "already imported")
+# Node errors meaning our nonce was used by another transaction
+NONCE_TAKEN = ("nonce too low", "replacement transaction underpriced")
+
+def _now() -> datetime:
+    return datetime.now(timezone.utc)
+
+def _lease_free():
+    return or_(IssuanceJob.lease_until.is_(None), IssuanceJob.lease_until < _now())
+
+def enqueue(db: Session, org, owner_name: str, course_name: str, cert_hash: str):
+    """Returns (job, claimed) for this certificate, creating the job on first sight.
+
+    Submitting the same certificate again returns its existing job, which
+    resumes from its last completed stage, and restarts it if it had failed.
+    `claimed` is False while someone else holds the job's lease.
+    """
+    job = db.query(IssuanceJob).filter(IssuanceJob.cert_hash == cert_hash).first()
+    if job is None:
+        job = IssuanceJob(
+            id=uuid.uuid4().hex,
+            organization_id=org.id,
+            owner_name=owner_name,
+            course_name=course_name,
+            org_name=org.name,
+            template_name=org.certificate_template,
+            cert_hash=cert_hash,
+            lease_until=_now() + timedelta(seconds=settings.ISSUANCE_LEASE_SECONDS),
+        )
+        db.add(job)
+        try:
+            db.commit()
+            return job, True
+        except IntegrityError:
+            # A concurrent request created it first
+            db.rollback()
+            job = db.query(IssuanceJob).filter(IssuanceJob.cert_hash == cert_hash).first()
+
+    if job.status == "failed":
+        job.status = "pending"
+        job.attempts = 0
+        job.error = None
+        job.lease_until = None
+        db.commit()
+    return job, claim(db, job)
+
+def claim(db: Session, job: IssuanceJob) -> bool:
+    claimed = db.query(IssuanceJob).filter(
+        IssuanceJob.id == job.id, IssuanceJob.status == "pending", _lease_free()
+    ).update(
+        {IssuanceJob.lease_until: _now() + timedelta(seconds=settings.ISSUANCE_LEASE_SECONDS)},
+        synchronize_session=False,
+    )
+    db.commit()
+    db.refresh(job)
+    return claimed == 1
+
+def claim_jobs(db: Session, limit: int) -> list[IssuanceJob]:
+    """Leases pending jobs nobody is working on, oldest first."""
+    jobs = (
+        db.query(IssuanceJob)
+        .filter(IssuanceJob.status == "pending", _lease_free())
+        .order_by(IssuanceJob.created_at)
+        .limit(limit)
+        .with_for_update(skip_locked=True)
+        .all()
+    )
+    lease_until = _now() + timedelta(seconds=settings.ISSUANCE_LEASE_SECONDS)
+    for job in jobs:
+        job.lease_until = lease_until
+    db.commit()
+    return jobs
+
+def _set_stage(db: Session, job: IssuanceJob, stage: str):
+    job.stage = stage
+    job.attempts = 0
+    job.error = None
+    job.updated_at = _now()
+    db.commit()
+
+def _fail(db: Session, job: IssuanceJob, error: str):
+    print(f"Issuance Error: job {job.id} failed after stage '{job.stage}': {error}")
+    job.status = "failed"
+    job.error = error
+    job.lease_until = None
+    job.updated_at = _now()
+    db.commit()
+
+def _record_failure(db: Session, job: IssuanceJob, error: Exception):
+    db.rollback()
+    print(f"Issuance Warning: job {job.id} stuck after stage '{job.stage}', retrying: {error}")
+    job.error = str(error)
+    # Once signed, the transaction may still land; the job keeps retrying instead of giving up
+    if not job.signed_tx:
+        job.attempts += 1
+        if job.attempts >= settings.ISSUANCE_MAX_ATTEMPTS:
+            _fail(db, job, str(error))
+            return
+    # The lease doubles as the retry backoff
+    job.lease_until = _now() + timedelta(seconds=settings.ISSUANCE_RETRY_SECONDS)
+    db.commit()
+
+def _render_and_upload(db: Session, job: IssuanceJob, block: bool) -> bool:
+    # Rendered in memory and stored under its content hash; a crash before the upload
+    # completes just renders again, which yields the same bytes and object name
+    pdf = generate_certificate_pdf(
+        job.owner_name, job.course_name, job.org_name, job.cert_hash, job.template_name, block=block
+    )
+    job.storage_url = minio_service.upload_pdf(pdf.data, pdf.sha256)
+    if job.storage_url is None:
+        raise Exception(f"Upload of {pdf.sha256}.pdf failed")
+    job.pdf_sha256 = pdf.sha256
+    _set_stage(db, job, "uploaded")
+    return True
+
+def _issued_on_chain(job: IssuanceJob) -> bool:
+    """Whether the certificate is on chain, whichever of the job's transactions got it there."""
+    result = blockchain_service.verify_on_chain(job.cert_hash, job.contract_version or blockchain_service.issue_version)
+    if result is None:
+        raise Exception(f"Could not read {job.cert_hash} from the chain")
+    return bool(result["exists"])
+
+def _send(db: Session, job: IssuanceJob):
+    try:
+        blockchain_service.send_raw_transaction(job.signed_tx)
+    except Exception as e:
+        message = str(e).lower()
+        if any(known in message for known in ALREADY_SENT):
+            return
+        if any(taken in message for taken in NONCE_TAKEN):
+            if blockchain_service.get_receipt_statuses([job.tx_hash]).get(job.tx_hash) is not None:
+                # Our own transaction used the nonce: it was mined after all
+                return
+            if _issued_on_chain(job):
+                # An earlier transaction of this job (before a fee bump) used the nonce;
+                # the timeout check in settle() finds the certificate and confirms it
+                return
+            # Another transaction took the nonce (e.g. we died between signing and sending);
+            # this one can never be mined, so sign a fresh one on the next attempt
+            job.signed_tx = None
+            job.tx_hash = None
+            db.commit()
+            blockchain_service.nonce_manager.sync()
+        raise
+
+def _broadcast(db: Session, job: IssuanceJob, block: bool) -> bool:
+    if not job.signed_tx:
+        if settings.ANCHOR_MODE == "merkle":
+            # The anchor service writes the certificate's batch root instead
+            return _commit(db, job, block)
+        job.contract_version = blockchain_service.issue_version
+        if not blockchain_service.is_connected:
+            job.tx_hash = "MOCK_TX_HASH_NO_RPC"
+            job.broadcast_at = _now()
+            _set_stage(db, job, "broadcast")
+            return True
+        with blockchain_service.signed_issue(job.cert_hash) as (raw_tx, tx_hash):
+            job.signed_tx = raw_tx
+            job.tx_hash = tx_hash
+            # Durable before it can reach the chain: a crash from here on resends, never re-signs
+            db.commit()
+
+    _send(db, job)
+    job.broadcast_at = _now()
+    _set_stage(db, job, "broadcast")
+    return True
+
+def settle(db: Session, job: IssuanceJob, status) -> bool:
+    """Applies a receipt status (1, 0 or None if not mined) to a broadcast job; True once it is confirmed."""
+    if status == 1:
+        _set_stage(db, job, "confirmed")
+        return True
+    if status == 0:
+        # The revert may have been an out-of-gas from a cached limit; estimate afresh
+        fee_engine.forget_estimates()
+        _fail(db, job, f"Transaction {job.tx_hash} reverted")
+        return False
+
+    deadline = _now() - timedelta(seconds=settings.CONFIRMATION_TIMEOUT_SECONDS)
+    if job.broadcast_at and job.broadcast_at.replace(tzinfo=timezone.utc) < deadline:
+        # A transaction replaced by a fee bump may still be the one that got mined
+        if _issued_on_chain(job):
+            _set_stage(db, job, "confirmed")
+            return True
+        job.attempts += 1
+        if job.attempts >= settings.ISSUANCE_MAX_ATTEMPTS:
+            _fail(db, job, f"Transaction {job.tx_hash} not mined after {job.attempts} broadcasts")
+            # A dropped transaction leaves a nonce gap that blocks everything after it
+            if blockchain_service.nonce_manager:
+                blockchain_service.nonce_manager.sync()
+            return False
+        # Probably underpriced: replace it at the same nonce with higher fees
+        print(f"Issuance Warning: {job.tx_hash} not mined after {settings.CONFIRMATION_TIMEOUT_SECONDS}s, bumping its fee")
+        job.signed_tx, job.tx_hash = blockchain_service.replacement_transaction(job.signed_tx)
+        # Durable before it can reach the chain, like the first signature
+        db.commit()
+        _send(db, job)
+        job.broadcast_at = _now()
+        db.commit()
+    return False
+
+def _confirm(db: Session, job: IssuanceJob, block: bool) -> bool:
+    return settle(db, job, blockchain_service.get_receipt_statuses([job.tx_hash]).get(job.tx_hash))
+
+def _commit(db: Session, job: IssuanceJob, block: bool) -> bool:
+    # The certificate row and the job's last stage are written in one transaction
+    cert = Certificate(
+        cert_hash=job.cert_hash,
+        owner_name=job.owner_name,
+        course_name=job.course_name,
+        issued_by=job.organization_id,
+        storage_url=job.storage_url,
+        file_hash=job.pdf_sha256,
+        tx_hash=job.tx_hash,
+        chain_status="confirmed" if job.tx_hash else "pending",
+        contract_version=job.contract_version or blockchain_service.issue_version,
+    )
+    db.add(cert)
+    db.flush()
+    job.certificate_id = cert.id
+    job.status = "done"
+    job.lease_until = None
+    _set_stage(db, job, "committed")
+    return True
+
+# The step that runs after each completed stage
+STEPS = {
+    "queued": _render_and_upload,
+    "uploaded": _broadcast,
+    "broadcast": _confirm,
+    "confirmed": _commit,
+}
+
+def _step(db: Session, job: IssuanceJob, block: bool) -> bool:
+    step = STEPS[job.stage]
+    with stage_timer("issue", step.__name__.lstrip("_")):
+        return step(db, job, block)
+
+def advance(db: Session, job: IssuanceJob, block: bool = False) -> IssuanceJob:
+    """Runs a leased job's remaining stages until it is committed, failed or waiting for its receipt.
+
+    A failing stage is retried later from where it stopped. With block=False
+    a full render queue raises RendererSaturated and the job is left for the
+    issuance worker.
+    """
+    try:
+        while job.status == "pending" and _step(db, job, block):
+            pass
+    except RendererSaturated:
+        db.rollback()
+        job.lease_until = None
+        db.commit()
+        raise
+    except Exception as e:
+        _record_failure(db, job, e)
+        return job
+
+    if job.status == "pending":
+        # Waiting for a receipt: the worker checks it on its next poll
+        job.lease_until = None
+        db.commit()
+    return job
+
+class IssuanceWorker(PollingWorker):
+    """Resumes pending issuance jobs: those left behind by a crash, a failed stage or a pending receipt.
+
+    Receipts of all broadcast jobs are fetched in one batch; the other jobs
+    advance in parallel on ISSUANCE_WORKERS threads.
+    """
+
+    name = "Issuance Worker"
+
+    def __init__(self, interval: float, workers: int):
+        super().__init__(interval)
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="issuance")
+
+    def run_once(self):
+        db = SessionLocal()
+        try:
+            jobs = claim_jobs(db, settings.ISSUANCE_BATCH_SIZE)
+            ready = [job.id for job in jobs if job.stage != "broadcast"]
+            ready += self._confirm(db, [job for job in jobs if job.stage == "broadcast"])
+        finally:
+            db.close()
+        list(self._pool.map(self._advance, ready))
+
+    def _confirm(self, db: Session, jobs: list[IssuanceJob]) -> list[str]:
+        if not jobs:
+            return []
+        try:
+            statuses = blockchain_service.get_receipt_statuses(list({job.tx_hash for job in jobs}))
+        except Exception as e:
+            for job in jobs:
+                _record_failure(db, job, e)
+            return []
+
+        confirmed = []
+        for job in jobs:
+            try:
+                if settle(db, job, statuses.get(job.tx_hash)):
+                    confirmed.append(job.id)
+                elif job.status == "pending":
+                    job.lease_until = None
+                    db.commit()
+            except Exception as e:
+                _record_failure(db, job, e)
+        return confirmed
+
+    def _advance(self, job_id: str):
+        db = SessionLocal()
+        try:
+            advance(db, db.get(IssuanceJob, job_id), block=True)
+        except Exception as e:
+            print(f"{self.name} Error: job {job_id}: {e}")
+        finally:
+            db.close()
+
+issuance_worker = IssuanceWorker(settings.ISSUANCE_POLL_SECONDS, settings.ISSUANCE_WORKERS)
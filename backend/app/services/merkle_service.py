@@ -0,0 +1,57 @@
+import json
+from web3 import Web3
+
+# Leaves and internal nodes use keccak256 with sorted pairs, matching
+# CertificateVerifier._processProof on chain. Sorting the pair means a proof
+# is just the list of sibling hashes, with no left/right flags.
+
+def leaf_hash(cert_hash: str) -> bytes:
+    """Leaf for a certificate: keccak256 of the raw 32-byte SHA-256 cert hash."""
+    return bytes(Web3.keccak(bytes.fromhex(cert_hash)))
+
+def _hash_pair(a: bytes, b: bytes) -> bytes:
+    if a < b:
+        return bytes(Web3.keccak(a + b))
+    return bytes(Web3.keccak(b + a))
+
+def build_levels(leaves: list[bytes]) -> list[list[bytes]]:
+    """Builds every level of the tree, from the leaves up to the single root."""
+    if not leaves:
+        raise ValueError("Cannot build a Merkle tree without leaves")
+
+    levels = [list(leaves)]
+    while len(levels[-1]) > 1:
+        current = levels[-1]
+        parent = []
+        for i in range(0, len(current), 2):
+            if i + 1 < len(current):
+                parent.append(_hash_pair(current[i], current[i + 1]))
+            else:
+                # Odd node out is promoted unchanged
+                parent.append(current[i])
+        levels.append(parent)
+    return levels
+
+def get_root(levels: list[list[bytes]]) -> bytes:
+    return levels[-1][0]
+
+def get_proof(levels: list[list[bytes]], index: int) -> list[bytes]:
+    proof = []
+    for level in levels[:-1]:
+        sibling = index ^ 1
+        if sibling < len(level):
+            proof.append(level[sibling])
+        index //= 2
+    return proof
+
+def verify_proof(leaf: bytes, proof: list[bytes], root: bytes) -> bool:
+    computed = leaf
+    for sibling in proof:
+        computed = _hash_pair(computed, sibling)
+    return computed == root
+
+def proof_to_json(proof: list[bytes]) -> str:
+    return json.dumps([Web3.to_hex(node) for node in proof])
+
+def proof_from_json(data: str) -> list[bytes]:
+    return [bytes(Web3.to_bytes(hexstr=node)) for node in json.loads(data)]
@@ -0,0 +1,69 @@
+from prometheus_client import Counter, Gauge, Histogram
+from prometheus_client.core import GaugeMetricFamily, REGISTRY
+
+# Seconds; spans a cached lookup up to a slow render or a mined transaction
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+
+STAGE_SECONDS = Histogram(
+    "cyphire_stage_seconds", "Time spent in each stage of an operation",
+    ["operation", "stage"], buckets=LATENCY_BUCKETS,
+)
+RPC_REQUESTS = Counter("cyphire_rpc_requests_total", "JSON-RPC requests by method and endpoint", ["method", "endpoint"])
+RPC_ERRORS = Counter("cyphire_rpc_errors_total", "Failed JSON-RPC requests by method and endpoint", ["method", "endpoint"])
+RPC_SECONDS = Histogram("cyphire_rpc_seconds", "JSON-RPC request latency by method", ["method"], buckets=LATENCY_BUCKETS)
+MINIO_SECONDS = Histogram("cyphire_minio_seconds", "MinIO operation latency", ["operation"], buckets=LATENCY_BUCKETS)
+MINIO_ERRORS = Counter("cyphire_minio_errors_total", "Failed MinIO operations", ["operation"])
+DB_CHECKOUT_SECONDS = Histogram(
+    "cyphire_db_pool_checkout_seconds", "Time waiting for a connection from the DB pool", ["pool"], buckets=LATENCY_BUCKETS,
+)
+THREADPOOL_BORROWED = Gauge("cyphire_threadpool_busy_threads", "Threads of the request threadpool in use")
+THREADPOOL_TOTAL = Gauge("cyphire_threadpool_threads", "Size of the request threadpool")
+THREADPOOL_WAITING = Gauge("cyphire_threadpool_waiting_tasks", "Sync routes waiting for a threadpool thread")
+
+def stage_timer(operation: str, stage: str):
+    """Context manager observing the block's duration into cyphire_stage_seconds."""
+    return STAGE_SECONDS.labels(operation, stage).time()
+
+class StatsCollector:
+    """Exports the stats() dicts of services as gauges, read at scrape time.
+
+    Sources are registered as (prefix, callable returning a dict or a list of
+    dicts with a label key); numeric values become cyphire_<prefix>_<key>.
+    """
+
+    def __init__(self):
+        self._sources = []
+
+    def add(self, prefix: str, stats, label: str = None):
+        self._sources.append((prefix, stats, label))
+
+    def collect(self):
+        for prefix, stats, label in self._sources:
+            try:
+                snapshot = stats()
+            except Exception as e:
+                print(f"Metrics Warning: {prefix} stats unavailable: {e}")
+                continue
+            rows = snapshot if isinstance(snapshot, list) else [snapshot]
+            families = {}
+            for row in rows:
+                labels = [str(row[label])] if label else []
+                for key, value in _flatten(row):
+                    if key == label or isinstance(value, str) or value is None:
+                        continue
+                    if key not in families:
+                        families[key] = GaugeMetricFamily(
+                            f"cyphire_{prefix}_{key}", f"{prefix} {key.replace('_', ' ')}", labels=[label] if label else []
+                        )
+                    families[key].add_metric(labels, float(value))
+            yield from families.values()
+
+def _flatten(stats: dict, prefix: str = ""):
+    for key, value in stats.items():
+        if isinstance(value, dict):
+            yield from _flatten(value, f"{prefix}{key}_")
+        else:
+            yield f"{prefix}{key}", value
+
+service_stats = StatsCollector()
+REGISTRY.register(service_stats)
@@ -1,13 +1,36 @@
 import io
 import os
-import shutil
+import time
+from contextlib import contextmanager
+from datetime import timedelta
 from minio import Minio
 from minio.error import S3Error # Import S3Error
 from app.config.settings import settings
+from app.services.cache import MISSING, TTLCache
+from app.services.certificate_service import content_object_name
+from app.services.metrics import MINIO_ERRORS, MINIO_SECONDS
+
+@contextmanager
+def _timed(operation: str):
+    start = time.perf_counter()
+    try:
+        yield
+    except Exception:
+        MINIO_ERRORS.labels(operation).inc()
+        raise
+    finally:
+        MINIO_SECONDS.labels(operation).observe(time.perf_counter() - start)
 
 class MinioService:
     def __init__(self):
         self.bucket = settings.MINIO_BUCKET_NAME
+        self.uploads_skipped = 0
+        # A cached URL is handed out until PRESIGNED_URL_SAFETY_MARGIN_SECONDS before it
+        # expires, so whoever receives it still has at least that long to use it
+        self.url_cache = TTLCache(
+            settings.PRESIGNED_URL_CACHE_SIZE,
+            max(0, settings.PRESIGNED_URL_EXPIRY_SECONDS - settings.PRESIGNED_URL_SAFETY_MARGIN_SECONDS),
+        )
         try:
             self.client = Minio(
                 settings.MINIO_ENDPOINT,
@@ -25,13 +48,15 @@ class MinioService:
 
     # _ensure_bucket_exists method is removed as its logic is integrated into __init__
 
-    def upload_file(self, file_path: str, object_name: str):
+    def upload_bytes(self, data: bytes, object_name: str, sha256: str = None, content_type: str = "application/pdf"):
+        """Uploads an in-memory object without staging it on local disk."""
         if not self.client:
             # Fallback to local storage
             try:
-                dest_path = os.path.join("storage", self.bucket, object_name)
+                dest_path = self._local_path(object_name)
                 os.makedirs(os.path.dirname(dest_path), exist_ok=True)
-                shutil.copy(file_path, dest_path)
+                with open(dest_path, "wb") as f:
+                    f.write(data)
                 print(f"Stored file locally at {dest_path}")
                 return object_name
             except Exception as e:
@@ -39,23 +64,70 @@ class MinioService:
                 return None
 
         try:
-            self.client.fput_object(
-                self.bucket, object_name, file_path
-            )
+            with _timed("put"):
+                self.client.put_object(
+                    self.bucket, object_name, io.BytesIO(data), length=len(data),
+                    content_type=content_type,
+                    metadata={"sha256": sha256} if sha256 else None,
+                )
             return object_name
         except S3Error as e:
             print(f"Failed to upload file to MinIO: {e}")
             raise e
 
-    def get_file_url(self, object_name: str) -> str:
-        """Generates a presigned URL for the object."""
+    def _local_path(self, object_name: str) -> str:
+        return os.path.join("storage", self.bucket, object_name)
+
+    def object_exists(self, object_name: str) -> bool:
         if not self.client:
-             # Return local URL
-             return f"http://localhost:8000/storage/{self.bucket}/{object_name}"
+            return os.path.exists(self._local_path(object_name))
+        start = time.perf_counter()
         try:
-            return self.client.presigned_get_object(self.bucket, object_name)
-        except Exception as e:
-            print(f"Failed to generate presigned URL: {e}")
-            return ""
+            self.client.stat_object(self.bucket, object_name)
+            return True
+        except S3Error as e:
+            if e.code in ("NoSuchKey", "NoSuchObject"):
+                return False
+            MINIO_ERRORS.labels("stat").inc()
+            raise
+        finally:
+            MINIO_SECONDS.labels("stat").observe(time.perf_counter() - start)
+
+    def upload_pdf(self, data: bytes, sha256: str):
+        """Stores a PDF under its content hash and returns the object name.
+
+        Identical bytes map to the same object, so an upload is skipped when
+        the object is already there.
+        """
+        object_name = content_object_name(sha256)
+        if self.object_exists(object_name):
+            self.uploads_skipped += 1
+            return object_name
+        return self.upload_bytes(data, object_name, sha256)
+
+    def get_file_url(self, object_name: str) -> str:
+        """Presigned URL for the object, reused from url_cache while it is still comfortably valid."""
+        url = self.url_cache.get(object_name)
+        if url is not MISSING:
+            return url
+
+        if not self.client:
+            # Return local URL
+            url = f"http://localhost:8000/storage/{self.bucket}/{object_name}"
+        else:
+            try:
+                with _timed("presign"):
+                    url = self.client.presigned_get_object(
+                        self.bucket, object_name, expires=timedelta(seconds=settings.PRESIGNED_URL_EXPIRY_SECONDS)
+                    )
+            except Exception as e:
+                print(f"Failed to generate presigned URL: {e}")
+                return ""
+
+        self.url_cache.set(object_name, url)
+        return url
+
+    def stats(self) -> dict:
+        return {"url_cache": self.url_cache.stats(), "uploads_skipped": self.uploads_skipped}
 
 minio_service = MinioService()
@@ -0,0 +1,33 @@
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+from app.config.settings import settings
+from app.models.organization import Organization
+from app.schemas.organization import OrganizationOut
+from app.services.cache import MISSING, TTLCache
+
+# Detached snapshots (OrganizationOut), safe to share across sessions and threads
+organization_cache = TTLCache(settings.IDENTITY_CACHE_SIZE, settings.IDENTITY_CACHE_TTL_SECONDS)
+
+def remember_organization(org: Organization):
+    """Caches a snapshot of `org`, replacing any older one.
+
+    Called with the committed row after an update, rather than just dropping
+    the entry, so a read served by a lagging replica cannot cache the old values again.
+    """
+    if not org:
+        return None
+    snapshot = OrganizationOut.model_validate(org)
+    organization_cache.set(org.id, snapshot)
+    return snapshot
+
+def get_organization(db: Session, org_id: int) -> OrganizationOut:
+    snapshot = organization_cache.get(org_id)
+    if snapshot is MISSING:
+        snapshot = remember_organization(db.get(Organization, org_id))
+    return snapshot
+
+async def get_organization_async(db: AsyncSession, org_id: int) -> OrganizationOut:
+    snapshot = organization_cache.get(org_id)
+    if snapshot is MISSING:
+        snapshot = remember_organization(await db.get(Organization, org_id))
+    return snapshot
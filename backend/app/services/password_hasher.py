@@ -0,0 +1,87 @@
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+import bcrypt
+
+# Monkey patch for passlib + bcrypt compatibility
+if not hasattr(bcrypt, '__about__'):
+    bcrypt.__about__ = type('about', (object,), {'__version__': bcrypt.__version__})
+
+from passlib.context import CryptContext
+from app.config.settings import settings
+
+# Hashes made with a different cost than BCRYPT_ROUNDS are flagged for rehashing on the next login
+pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto", bcrypt__rounds=settings.BCRYPT_ROUNDS)
+
+class HasherSaturated(Exception):
+    """Raised when every bcrypt worker is busy and the hashing queue is full."""
+
+class PasswordHasher:
+    """Runs bcrypt on its own fixed set of threads, away from the threadpool that serves sync routes.
+
+    bcrypt releases the GIL, so `workers` threads hash in parallel. At most
+    `queue_size` more requests wait for a thread; beyond that callers get
+    HasherSaturated straight away instead of piling up behind a login burst.
+    """
+
+    def __init__(self, workers: int, queue_size: int):
+        self.workers = workers
+        self.queue_size = queue_size
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="bcrypt")
+        self._slots = threading.BoundedSemaphore(workers + queue_size)
+        self._lock = threading.Lock()
+        self._in_flight = 0
+        self.hashed = 0
+        self.verified = 0
+        self.rehashed = 0
+        self.rejected = 0
+
+    async def _run(self, fn, *args):
+        if not self._slots.acquire(blocking=False):
+            with self._lock:
+                self.rejected += 1
+            raise HasherSaturated(f"Password hashing queue is full ({self.queue_size} waiting)")
+
+        with self._lock:
+            self._in_flight += 1
+        try:
+            return await asyncio.wrap_future(self._executor.submit(fn, *args))
+        finally:
+            with self._lock:
+                self._in_flight -= 1
+            self._slots.release()
+
+    async def hash(self, password: str) -> str:
+        result = await self._run(pwd_context.hash, password)
+        self.hashed += 1
+        return result
+
+    async def verify_and_update(self, password: str, password_hash: str):
+        """(matches, new_hash); new_hash is set when the stored hash should be replaced, e.g. after a cost change."""
+        matches, new_hash = await self._run(pwd_context.verify_and_update, password, password_hash)
+        self.verified += 1
+        if new_hash:
+            self.rehashed += 1
+        return matches, new_hash
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    @property
+    def queue_depth(self) -> int:
+        return max(0, self._in_flight - self.workers)
+
+    def stats(self) -> dict:
+        return {
+            "rounds": settings.BCRYPT_ROUNDS,
+            "workers": self.workers,
+            "in_flight": self._in_flight,
+            "queue_depth": self.queue_depth,
+            "queue_capacity": self.queue_size,
+            "hashed": self.hashed,
+            "verified": self.verified,
+            "rehashed": self.rehashed,
+            "rejected": self.rejected,
+        }
+
+password_hasher = PasswordHasher(settings.BCRYPT_WORKERS, settings.BCRYPT_QUEUE_SIZE)
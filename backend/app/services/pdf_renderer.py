@@ -0,0 +1,105 @@
+import multiprocessing
+import os
+import threading
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from app.config.settings import settings
+
+class RendererSaturated(Exception):
+    """Raised when every worker is busy and the render queue is full."""
+
+def _warm_up_worker():
+    # Runs once in each worker process so the first real job does not pay for
+    # importing xhtml2pdf/reportlab, loading fonts and compiling the template
+    from app.services.certificate_service import warm_up
+    warm_up()
+
+def _ping():
+    return None
+
+def _render_job(owner_name: str, course_name: str, org_name: str, cert_hash: str, template_name: str):
+    from app.services.certificate_service import render_certificate_pdf
+    return render_certificate_pdf(owner_name, course_name, org_name, cert_hash, template_name)
+
+class RendererPool:
+    """Renders certificate PDFs in separate processes so rendering is not bound by the API process GIL.
+
+    At most `workers` jobs run at once and at most `queue_size` more wait for a
+    worker; callers beyond that either wait for a slot or get RendererSaturated.
+    """
+
+    def __init__(self, workers: int, queue_size: int):
+        self.workers = workers or os.cpu_count() or 1
+        self.queue_size = queue_size
+        self._slots = threading.BoundedSemaphore(self.workers + queue_size)
+        self._lock = threading.Lock()
+        self._executor = None
+        self._in_flight = 0
+
+    def start(self):
+        with self._lock:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.workers,
+                    mp_context=multiprocessing.get_context("spawn"),
+                    initializer=_warm_up_worker,
+                )
+                # Workers are spawned on demand; one ping each starts and warms them all now
+                for _ in range(self.workers):
+                    self._executor.submit(_ping)
+
+    def shutdown(self):
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=False, cancel_futures=True)
+                self._executor = None
+
+    def submit(self, owner_name: str, course_name: str, org_name: str, cert_hash: str,
+               template_name: str = None, block: bool = False) -> Future:
+        """Queues a render job. With block=True the caller waits for a free slot instead of failing."""
+        timeout = None if block else settings.PDF_RENDER_QUEUE_TIMEOUT_SECONDS
+        if not self._slots.acquire(timeout=timeout):
+            raise RendererSaturated(f"PDF render queue is full ({self.queue_size} waiting)")
+
+        with self._lock:
+            self._in_flight += 1
+        try:
+            self.start()
+            try:
+                future = self._executor.submit(_render_job, owner_name, course_name, org_name, cert_hash, template_name)
+            except BrokenProcessPool:
+                # A worker died (e.g. killed for memory); replace the pool and retry once
+                self.shutdown()
+                self.start()
+                future = self._executor.submit(_render_job, owner_name, course_name, org_name, cert_hash, template_name)
+        except Exception:
+            self._job_done(None)
+            raise
+
+        future.add_done_callback(self._job_done)
+        return future
+
+    def _job_done(self, future):
+        with self._lock:
+            self._in_flight -= 1
+        self._slots.release()
+
+    def render(self, owner_name: str, course_name: str, org_name: str, cert_hash: str,
+               template_name: str = None, block: bool = False):
+        future = self.submit(owner_name, course_name, org_name, cert_hash, template_name, block=block)
+        return future.result(timeout=settings.PDF_RENDER_TIMEOUT_SECONDS)
+
+    @property
+    def queue_depth(self) -> int:
+        """Jobs accepted but still waiting for a worker."""
+        return max(0, self._in_flight - self.workers)
+
+    def stats(self) -> dict:
+        return {
+            "workers": self.workers,
+            "in_flight": self._in_flight,
+            "queue_depth": self.queue_depth,
+            "queue_capacity": self.queue_size,
+        }
+
+renderer_pool = RendererPool(settings.PDF_RENDER_WORKERS, settings.PDF_RENDER_QUEUE_SIZE)
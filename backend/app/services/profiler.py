@@ -0,0 +1,133 @@
+import contextvars
+import inspect
+import os
+import random
+import re
+import secrets
+import threading
+from datetime import datetime, timezone
+from functools import wraps
+from fastapi.routing import APIRoute
+from pyinstrument import Profiler
+from pyinstrument.renderers import SpeedscopeRenderer
+from pyinstrument.session import Session
+from app.config.settings import settings
+
+PROFILE_TOKEN_HEADER = "x-profile-token"
+# Name of the stored profile, returned on profiled responses
+PROFILE_ID_HEADER = "X-Profile-Id"
+PROFILE_SUFFIX = ".speedscope.json"
+PROFILE_NAME = re.compile(r"^[\w.-]+\.speedscope\.json$")
+
+# The profile of the request being served, visible to the threadpool threads it runs sync code on
+_current = contextvars.ContextVar("current_profile", default=None)
+
+def has_profile_token(token: str) -> bool:
+    return bool(settings.PROFILE_TOKEN and token and secrets.compare_digest(token, settings.PROFILE_TOKEN))
+
+def should_profile(headers) -> bool:
+    if has_profile_token(headers.get(PROFILE_TOKEN_HEADER)):
+        return True
+    return settings.PROFILE_SAMPLE_RATE > 0 and random.random() < settings.PROFILE_SAMPLE_RATE
+
+class RequestProfile:
+    """Statistical profile of one request.
+
+    The event loop part is sampled by an async-aware profiler, which only
+    follows this request's tasks; sync endpoints add their own samples from
+    the threadpool thread they run on (see ProfiledRoute).
+    """
+
+    def __init__(self):
+        self.profiler = Profiler(interval=settings.PROFILE_INTERVAL_SECONDS, async_mode="enabled")
+        self._thread_sessions = []
+        self._lock = threading.Lock()
+        self._token = None
+
+    def __enter__(self):
+        self._token = _current.set(self)
+        self.profiler.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.profiler.stop()
+        _current.reset(self._token)
+
+    def add_thread_session(self, session: Session):
+        with self._lock:
+            self._thread_sessions.append(session)
+
+    def session(self) -> Session:
+        session = self.profiler.last_session
+        for thread_session in self._thread_sessions:
+            session = Session.combine(session, thread_session)
+        return session
+
+    def save(self, method: str, path: str) -> str:
+        """Writes the profile as a speedscope file and returns its name."""
+        session = self.session()
+        stamp = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%S%f")
+        slug = re.sub(r"[^\w]+", "-", path).strip("-")[:80] or "root"
+        name = f"{stamp}-{method.lower()}-{slug}-{round(session.duration * 1000)}ms{PROFILE_SUFFIX}"
+
+        os.makedirs(settings.PROFILE_DIR, exist_ok=True)
+        with open(os.path.join(settings.PROFILE_DIR, name), "w") as f:
+            f.write(SpeedscopeRenderer().render(session))
+        _prune()
+        return name
+
+def _profiled_sync(fn):
+    @wraps(fn)
+    def wrapper(*args, **kwargs):
+        profile = _current.get()
+        if profile is None:
+            return fn(*args, **kwargs)
+        profiler = Profiler(interval=settings.PROFILE_INTERVAL_SECONDS, async_mode="disabled")
+        profiler.start()
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            profile.add_thread_session(profiler.stop())
+    return wrapper
+
+class ProfiledRoute(APIRoute):
+    """APIRoute whose sync endpoints join the request's profile.
+
+    FastAPI runs sync endpoints on threadpool threads, which the request's
+    profiler cannot see; there they would show up as a single await.
+    """
+
+    def __init__(self, path: str, endpoint, **kwargs):
+        if not inspect.iscoroutinefunction(endpoint):
+            endpoint = _profiled_sync(endpoint)
+        super().__init__(path, endpoint, **kwargs)
+
+def list_profiles() -> list[dict]:
+    """Stored profiles, newest first."""
+    if not os.path.isdir(settings.PROFILE_DIR):
+        return []
+    profiles = []
+    for entry in os.scandir(settings.PROFILE_DIR):
+        if entry.is_file() and PROFILE_NAME.match(entry.name):
+            stat = entry.stat()
+            profiles.append({
+                "name": entry.name,
+                "size": stat.st_size,
+                "created_at": datetime.fromtimestamp(stat.st_mtime, timezone.utc),
+            })
+    return sorted(profiles, key=lambda p: p["name"], reverse=True)
+
+def profile_path(name: str):
+    """Path of a stored profile, or None for unknown or malformed names."""
+    if not PROFILE_NAME.match(name):
+        return None
+    path = os.path.join(settings.PROFILE_DIR, name)
+    return path if os.path.isfile(path) else None
+
+def _prune():
+    # Names start with a UTC timestamp, so sorting them orders profiles by age
+    for profile in list_profiles()[settings.PROFILE_MAX_FILES:]:
+        try:
+            os.remove(os.path.join(settings.PROFILE_DIR, profile["name"]))
+        except OSError as e:
+            print(f"Profiler Warning: could not remove {profile['name']}: {e}")
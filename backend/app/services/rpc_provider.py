@@ -0,0 +1,210 @@
+import threading
+import time
+from urllib.parse import urlsplit
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+import requests
+from requests.adapters import HTTPAdapter
+from web3 import HTTPProvider
+from web3.providers.base import JSONBaseProvider
+from app.config.settings import settings
+from app.services.metrics import RPC_ERRORS, RPC_REQUESTS, RPC_SECONDS
+
+# Nonces come from one node's pending pool, so the calls of a nonce sequence go to one endpoint
+WRITE_METHODS = {"eth_sendRawTransaction", "eth_getTransactionCount"}
+
+# Weight of the newest sample in the rolling latency and error rate
+EWMA_ALPHA = 0.2
+
+def rpc_urls() -> list[str]:
+    """RPC_URLS (comma separated) if set, otherwise the single RPC_URL."""
+    urls = [url.strip() for url in settings.RPC_URLS.split(",") if url.strip()]
+    return urls or ([settings.RPC_URL] if settings.RPC_URL else [])
+
+def redact_url(url: str, index: int) -> str:
+    """Names an endpoint by position and host only; hosted providers put the API key in the path or query."""
+    parts = urlsplit(url)
+    host = parts.hostname or "unknown"
+    return f"{index}:{host}:{parts.port}" if parts.port else f"{index}:{host}"
+
+class Endpoint:
+    """One RPC URL with its own pooled HTTP session and rolling health numbers.
+
+    `name` is the redacted form used in logs, stats and metrics; `url` may hold credentials.
+    """
+
+    def __init__(self, url: str, index: int = 0):
+        self.url = url
+        self.name = redact_url(url, index)
+        session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=settings.RPC_POOL_SIZE)
+        session.mount("http://", adapter)
+        session.mount("https://", adapter)
+        # Retries are ours to make: a failing endpoint should hand over to the next one
+        self.provider = HTTPProvider(
+            url,
+            request_kwargs={"timeout": settings.RPC_TIMEOUT_SECONDS},
+            session=session,
+            exception_retry_configuration=None,
+        )
+        self.latency = None
+        self.error_rate = 0.0
+        self.requests = 0
+        self.failures = 0
+        self._consecutive_failures = 0
+        self._down_until = 0.0
+        self._lock = threading.Lock()
+
+    @property
+    def healthy(self) -> bool:
+        return time.monotonic() >= self._down_until
+
+    @property
+    def score(self) -> float:
+        """Expected cost of a request; lower is better. Unmeasured endpoints score 0 so they get tried."""
+        return (self.latency or 0.0) / max(0.05, 1.0 - self.error_rate)
+
+    def record_success(self, seconds: float):
+        with self._lock:
+            self.requests += 1
+            self.latency = seconds if self.latency is None else EWMA_ALPHA * seconds + (1 - EWMA_ALPHA) * self.latency
+            self.error_rate = (1 - EWMA_ALPHA) * self.error_rate
+            self._consecutive_failures = 0
+
+    def record_failure(self):
+        with self._lock:
+            self.requests += 1
+            self.failures += 1
+            self.error_rate = EWMA_ALPHA + (1 - EWMA_ALPHA) * self.error_rate
+            self._consecutive_failures += 1
+            if self._consecutive_failures >= settings.RPC_MAX_CONSECUTIVE_FAILURES:
+                self._down_until = time.monotonic() + settings.RPC_COOLDOWN_SECONDS
+
+    def stats(self) -> dict:
+        return {
+            "endpoint": self.name,
+            "healthy": self.healthy,
+            "latency_ms": round(self.latency * 1000, 1) if self.latency is not None else None,
+            "error_rate": round(self.error_rate, 3),
+            "requests": self.requests,
+            "failures": self.failures,
+        }
+
+class MultiEndpointProvider(JSONBaseProvider):
+    """Spreads JSON-RPC traffic over several endpoints.
+
+    Reads go to the healthy endpoint with the best latency/error score and
+    fail over down the ranking; with RPC_HEDGE_READS a second endpoint is
+    asked as well when the first has not answered after RPC_HEDGE_AFTER_MS.
+    Writes stay on one endpoint until it fails; `on_write_failover` callbacks
+    then run so nonce state can be rebuilt against the new endpoint.
+    """
+
+    def __init__(self, urls: list[str]):
+        super().__init__()
+        if not urls:
+            raise ValueError("At least one RPC URL is required")
+        self.endpoints = [Endpoint(url, index) for index, url in enumerate(urls)]
+        self.on_write_failover = []
+        self._write_endpoint = None
+        self._write_lock = threading.Lock()
+        self._hedge_pool = ThreadPoolExecutor(max_workers=settings.RPC_POOL_SIZE, thread_name_prefix="rpc-hedge")
+
+    def __str__(self) -> str:
+        return f"RPC endpoints {', '.join(e.name for e in self.endpoints)}"
+
+    def ranked(self) -> list[Endpoint]:
+        """Healthy endpoints by score, then the ones cooling down in case all are down."""
+        return sorted(self.endpoints, key=lambda e: (not e.healthy, e.score))
+
+    def _call(self, endpoint: Endpoint, method: str, fn):
+        RPC_REQUESTS.labels(method, endpoint.name).inc()
+        start = time.monotonic()
+        try:
+            result = fn(endpoint.provider)
+        except Exception:
+            endpoint.record_failure()
+            RPC_ERRORS.labels(method, endpoint.name).inc()
+            raise
+        elapsed = time.monotonic() - start
+        endpoint.record_success(elapsed)
+        RPC_SECONDS.labels(method).observe(elapsed)
+        return result
+
+    def _with_failover(self, endpoints: list[Endpoint], method: str, fn):
+        error = None
+        for endpoint in endpoints:
+            try:
+                return self._call(endpoint, method, fn)
+            except Exception as e:
+                print(f"RPC Warning: {endpoint.name} failed: {e}")
+                error = e
+        raise error
+
+    def _hedged(self, endpoints: list[Endpoint], method: str, fn):
+        first = self._hedge_pool.submit(self._call, endpoints[0], method, fn)
+        done, _ = wait([first], timeout=settings.RPC_HEDGE_AFTER_MS / 1000)
+        if done and not first.exception():
+            return first.result()
+        if done:
+            # Fast failure: no need to race, just fail over
+            return self._with_failover(endpoints[1:], method, fn)
+
+        second = self._hedge_pool.submit(self._call, endpoints[1], method, fn)
+        pending = {first, second}
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                if not future.exception():
+                    return future.result()
+        return self._with_failover(endpoints[2:], method, fn) if len(endpoints) > 2 else first.result()
+
+    def _read(self, method: str, fn):
+        endpoints = self.ranked()
+        if settings.RPC_HEDGE_READS and len(endpoints) > 1 and endpoints[1].healthy:
+            return self._hedged(endpoints, method, fn)
+        return self._with_failover(endpoints, method, fn)
+
+    def _write(self, method: str, fn):
+        with self._write_lock:
+            if self._write_endpoint is None or not self._write_endpoint.healthy:
+                self._switch_write_endpoint(self.ranked()[0])
+            sticky = self._write_endpoint
+
+        # Signed transactions can be resent as-is elsewhere: the hash does not change
+        error = None
+        for endpoint in [sticky] + [other for other in self.ranked() if other is not sticky]:
+            try:
+                result = self._call(endpoint, method, fn)
+            except Exception as e:
+                print(f"RPC Warning: write endpoint {endpoint.name} failed: {e}")
+                error = e
+                continue
+            if endpoint is not sticky:
+                with self._write_lock:
+                    self._switch_write_endpoint(endpoint)
+            return result
+        raise error
+
+    def _switch_write_endpoint(self, endpoint: Endpoint):
+        previous, self._write_endpoint = self._write_endpoint, endpoint
+        if previous is not None and previous is not endpoint:
+            print(f"RPC Warning: writes moved from {previous.name} to {endpoint.name}")
+            # Callbacks usually make write calls themselves, so they cannot run under _write_lock
+            for callback in self.on_write_failover:
+                threading.Thread(target=callback, name="rpc-write-failover", daemon=True).start()
+
+    def make_request(self, method, params):
+        fn = lambda provider: provider.make_request(method, params)
+        return self._write(method, fn) if method in WRITE_METHODS else self._read(method, fn)
+
+    def make_batch_request(self, batch_requests):
+        # Labelled by the batch's method when uniform, e.g. a receipt or eth_call batch
+        methods = {method for method, _ in batch_requests}
+        label = f"batch:{methods.pop()}" if len(methods) == 1 else "batch"
+        return self._read(label, lambda provider: provider.make_batch_request(batch_requests))
+
+    def is_connected(self, show_traceback: bool = False) -> bool:
+        return any(endpoint.provider.is_connected(show_traceback) for endpoint in self.endpoints)
+
+    def stats(self) -> list[dict]:
+        return [endpoint.stats() for endpoint in self.endpoints]
@@ -0,0 +1,36 @@
+import threading
+
+class PollingWorker:
+    """Calls run_once on a daemon thread every `interval` seconds until stopped."""
+
+    name = "Worker"
+
+    def __init__(self, interval: float):
+        self.interval = interval
+        self._stop_event = threading.Event()
+        self._thread = None
+
+    def start(self):
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._loop, name=self.name, daemon=True)
+        self._thread.start()
+        print(f"{self.name} started (every {self.interval}s)")
+
+    def stop(self, timeout: float = 5):
+        self._stop_event.set()
+        if self._thread:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def _loop(self):
+        while not self._stop_event.is_set():
+            try:
+                self.run_once()
+            except Exception as e:
+                print(f"{self.name} Error: {e}")
+            self._stop_event.wait(self.interval)
+
+    def run_once(self):
+        raise NotImplementedError
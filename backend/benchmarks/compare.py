@@ -0,0 +1,61 @@
+"""Compares two benchmark result files, e.g. from before and after a change.
+
+    python -m benchmarks.compare baseline.json candidate.json --threshold 10
+
+Exits with status 1 when any scenario regressed by more than --threshold
+percent in requests per second or latency, or returned more errors.
+"""
+import argparse
+import json
+import sys
+
+# (label, getter, True when higher is better)
+METRICS = (
+    ("rps", lambda r: r["rps"], True),
+    ("p50 ms", lambda r: r["latency_ms"]["p50"], False),
+    ("p95 ms", lambda r: r["latency_ms"]["p95"], False),
+    ("p99 ms", lambda r: r["latency_ms"]["p99"], False),
+)
+
+def change(before: float, after: float) -> float:
+    return (after - before) / before * 100 if before else 0.0
+
+def compare(baseline: dict, candidate: dict, threshold: float) -> list[str]:
+    """Prints a table of changes and returns the regressions beyond `threshold` percent."""
+    regressions = []
+    print(f"{'scenario':<12} {'metric':<7} {'baseline':>10} {'candidate':>10} {'change':>8}")
+    for scenario, after in candidate["results"].items():
+        before = baseline["results"].get(scenario)
+        if not before:
+            continue
+        for label, get, higher_is_better in METRICS:
+            delta = change(get(before), get(after))
+            worse = -delta if higher_is_better else delta
+            flag = ""
+            if worse > threshold:
+                flag = "  REGRESSION"
+                regressions.append(f"{scenario} {label} {delta:+.1f}%")
+            print(f"{scenario:<12} {label:<7} {get(before):>10} {get(after):>10} {delta:>+7.1f}%{flag}")
+        if after["errors"] > before["errors"]:
+            regressions.append(f"{scenario} errors {before['errors']} -> {after['errors']}")
+    return regressions
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("baseline")
+    parser.add_argument("candidate")
+    parser.add_argument("--threshold", type=float, default=10.0, help="Allowed slowdown in percent")
+    args = parser.parse_args(argv)
+
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    with open(args.candidate) as f:
+        candidate = json.load(f)
+    print(f"baseline {baseline['meta']['commit']}  candidate {candidate['meta']['commit']}")
+    regressions = compare(baseline, candidate, args.threshold)
+    if regressions:
+        print("Regressions: " + ", ".join(regressions))
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,272 @@
+"""Throughput and latency benchmarks for the hot API endpoints.
+
+Starts the real app under uvicorn with local stand-ins: a fresh SQLite file
+(or --database-url, e.g. Postgres), the mock chain (no RPC configured) and
+local filesystem storage instead of MinIO. It then drives /auth/login,
+/certificates/issue, /certificates/verify/{hash} and /certificates/verify-file
+at the requested concurrency and writes p50/p95/p99 latency and requests per
+second as JSON.
+
+    python -m benchmarks.run --requests 200 --concurrency 16 --output before.json
+    python -m benchmarks.compare before.json after.json
+
+Run from the backend directory.
+"""
+import argparse
+import asyncio
+import json
+import math
+import os
+import platform
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import uuid
+from datetime import datetime, timezone
+import httpx
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SCENARIOS = ("login", "issue", "verify", "verify-file")
+PASSWORD = "benchmark-password"
+
+def percentile(sorted_values: list[float], p: float) -> float:
+    """Nearest-rank percentile of an ascending list."""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, math.ceil(p / 100 * len(sorted_values)))
+    return sorted_values[rank - 1]
+
+def summarize(latencies: list[float], statuses: dict, elapsed: float, concurrency: int) -> dict:
+    latencies = sorted(latencies)
+
+    def ms(seconds):
+        return round(seconds * 1000, 2)
+
+    return {
+        "requests": len(latencies),
+        "concurrency": concurrency,
+        # Statuses are HTTP codes, or the exception name for requests that got no response
+        "errors": sum(count for status, count in statuses.items() if not (status.isdigit() and 200 <= int(status) < 300)),
+        "statuses": statuses,
+        "duration_s": round(elapsed, 3),
+        "rps": round(len(latencies) / elapsed, 2) if elapsed else 0.0,
+        "latency_ms": {
+            "p50": ms(percentile(latencies, 50)),
+            "p95": ms(percentile(latencies, 95)),
+            "p99": ms(percentile(latencies, 99)),
+            "mean": ms(sum(latencies) / len(latencies)) if latencies else 0.0,
+            "max": ms(latencies[-1]) if latencies else 0.0,
+        },
+    }
+
+async def run_load(client: httpx.AsyncClient, make_request, total: int, concurrency: int) -> dict:
+    """Sends `total` requests from `concurrency` workers; make_request(i) returns the request's kwargs."""
+    latencies = []
+    statuses = {}
+    counter = iter(range(total))
+
+    async def worker():
+        for i in counter:
+            request = make_request(i)
+            start = time.perf_counter()
+            try:
+                response = await client.request(**request)
+                status = str(response.status_code)
+            except httpx.HTTPError as e:
+                status = type(e).__name__
+            latencies.append(time.perf_counter() - start)
+            statuses[status] = statuses.get(status, 0) + 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return summarize(latencies, statuses, time.perf_counter() - start, concurrency)
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+def _git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=BACKEND_DIR, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+class Server:
+    """The app under uvicorn in a child process, configured with the local stand-ins."""
+
+    def __init__(self, args, workdir: str):
+        self.port = _free_port()
+        self.url = f"http://127.0.0.1:{self.port}"
+        # Files go to storage/<bucket>; a per-run bucket keeps them apart and easy to remove
+        self.bucket = f"benchmark-{uuid.uuid4().hex[:8]}"
+        self.database_url = args.database_url or f"sqlite:///{os.path.join(workdir, 'benchmark.db')}"
+        self.env = {
+            **os.environ,
+            "DATABASE_URL": self.database_url,
+            "DATABASE_REPLICA_URLS": "",
+            "SECRET_KEY": os.environ.get("SECRET_KEY", "benchmark-secret"),
+            # No RPC endpoint: issuance and verification use the mock chain
+            "RPC_URL": "",
+            "RPC_URLS": "",
+            # An empty endpoint makes the MinIO client fail fast and fall back to local storage
+            "MINIO_ENDPOINT": "",
+            "MINIO_BUCKET_NAME": self.bucket,
+            "TEMPLATE_CACHE_DIR": os.path.join(workdir, "template_cache"),
+            "PROFILE_TOKEN": "",
+            "PROFILE_SAMPLE_RATE": "0",
+        }
+        for override in args.env:
+            key, _, value = override.partition("=")
+            self.env[key] = value
+        self.log_path = os.path.join(workdir, "server.log")
+        self.process = None
+
+    def start(self, timeout: float = 60):
+        with open(self.log_path, "w") as log:
+            self.process = subprocess.Popen(
+                [sys.executable, "-m", "uvicorn", "app.main:app", "--host", "127.0.0.1", "--port", str(self.port),
+                 "--log-level", "warning", "--no-access-log"],
+                cwd=BACKEND_DIR, env=self.env, stdout=log, stderr=subprocess.STDOUT,
+            )
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            if self.process.poll() is not None:
+                raise RuntimeError(f"Server exited with code {self.process.returncode}:\n{self.log_tail()}")
+            try:
+                if httpx.get(f"{self.url}/", timeout=1).status_code == 200:
+                    return
+            except httpx.HTTPError:
+                pass
+            time.sleep(0.2)
+        raise RuntimeError(f"Server did not start within {timeout}s")
+
+    def stop(self):
+        if self.process and self.process.poll() is None:
+            self.process.terminate()
+            try:
+                self.process.wait(timeout=15)
+            except subprocess.TimeoutExpired:
+                self.process.kill()
+        shutil.rmtree(os.path.join(BACKEND_DIR, "storage", self.bucket), ignore_errors=True)
+
+    def log_tail(self, lines: int = 30) -> str:
+        with open(self.log_path) as f:
+            return "".join(f.readlines()[-lines:])
+
+    def stored_file(self, object_name: str) -> str:
+        return os.path.join(BACKEND_DIR, "storage", self.bucket, object_name)
+
+def _expect(response: httpx.Response, what: str) -> dict:
+    if response.status_code >= 300:
+        raise RuntimeError(f"{what} failed ({response.status_code}): {response.text}")
+    return response.json()
+
+async def setup_issuer(client: httpx.AsyncClient, run_id: str) -> tuple[dict, dict]:
+    """Creates an organization and an issuer account; returns (credentials, auth headers)."""
+    org = _expect(await client.post("/organizations/", json={"name": f"Benchmark University {run_id}"}), "Organization setup")
+    credentials = {"email": f"benchmark_{run_id}@example.com", "password": PASSWORD}
+    _expect(await client.post("/auth/register", json={**credentials, "organization_id": org["id"]}), "Registration")
+    token = _expect(await client.post("/auth/login", json=credentials), "Login")["access_token"]
+    return credentials, {"Authorization": f"Bearer {token}"}
+
+async def benchmark(args, server: Server) -> dict:
+    run_id = uuid.uuid4().hex[:8]
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    async with httpx.AsyncClient(base_url=server.url, timeout=args.timeout, limits=limits) as client:
+        credentials, headers = await setup_issuer(client, run_id)
+        results = {}
+
+        def issue(prefix):
+            def make(i):
+                return {"method": "POST", "url": "/certificates/issue", "headers": headers,
+                        "json": {"owner_name": f"{prefix} {run_id} {i}", "course_name": "Benchmarking 101"}}
+            return make
+
+        # Certificates for the verify scenarios; issued outside the measured runs
+        issued, pdfs = [], []
+        if {"verify", "verify-file"} & set(args.scenarios):
+            seed = await run_load(client, issue("Seed"), args.seed, args.concurrency)
+            if seed["errors"]:
+                raise RuntimeError(f"Seeding certificates failed: {seed['statuses']}")
+            listing = await client.get("/certificates/", params={"limit": args.seed}, headers=headers)
+            issued = [
+                cert for cert in _expect(listing, "Listing certificates")
+                if cert["owner_name"].startswith(f"Seed {run_id}")
+            ]
+            for cert in issued:
+                with open(server.stored_file(cert["storage_url"]), "rb") as f:
+                    pdfs.append(f.read())
+
+        requests = {
+            "login": lambda i: {"method": "POST", "url": "/auth/login", "json": credentials},
+            "issue": issue("Owner"),
+            "verify": lambda i: {"method": "GET", "url": f"/certificates/verify/{issued[i % len(issued)]['cert_hash']}"},
+            "verify-file": lambda i: {"method": "POST", "url": "/certificates/verify-file",
+                                      "files": {"file": ("certificate.pdf", pdfs[i % len(pdfs)], "application/pdf")}},
+        }
+        for name in args.scenarios:
+            if args.warmup:
+                warmup = requests[name] if name != "issue" else issue("Warmup")
+                await run_load(client, warmup, args.warmup, args.concurrency)
+            results[name] = await run_load(client, requests[name], args.requests, args.concurrency)
+            print(f"{name:>12}: {results[name]['rps']:>8} req/s  p50 {results[name]['latency_ms']['p50']} ms  "
+                  f"p99 {results[name]['latency_ms']['p99']} ms  errors {results[name]['errors']}", file=sys.stderr)
+        return results
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--requests", type=int, default=200, help="Measured requests per scenario")
+    parser.add_argument("--concurrency", type=int, default=8, help="Requests in flight at once")
+    parser.add_argument("--warmup", type=int, default=10, help="Unmeasured requests before each scenario")
+    parser.add_argument("--seed", type=int, default=50, help="Certificates issued up front for the verify scenarios")
+    parser.add_argument("--scenarios", nargs="+", choices=SCENARIOS, default=list(SCENARIOS))
+    parser.add_argument("--database-url", help="Database to run against, e.g. postgresql://...; default: a fresh SQLite file")
+    parser.add_argument("--env", action="append", default=[], metavar="KEY=VALUE", help="Extra app setting, e.g. BCRYPT_ROUNDS=10")
+    parser.add_argument("--timeout", type=float, default=60, help="Per-request timeout in seconds")
+    parser.add_argument("--output", help="Write the JSON results here instead of stdout")
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory(prefix="cyphire-bench-") as workdir:
+        server = Server(args, workdir)
+        try:
+            server.start()
+            results = asyncio.run(benchmark(args, server))
+        except Exception:
+            if server.process:
+                print(f"Server log:\n{server.log_tail()}", file=sys.stderr)
+            raise
+        finally:
+            server.stop()
+
+    report = {
+        "meta": {
+            "commit": _git_commit(),
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpus": os.cpu_count(),
+            "database": server.database_url.split(":", 1)[0],
+            "chain": "mock",
+            "storage": "local",
+            "requests": args.requests,
+            "concurrency": args.concurrency,
+            "warmup": args.warmup,
+            "env": args.env,
+        },
+        "results": results,
+    }
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output + "\n")
+    else:
+        print(output)
+
+if __name__ == "__main__":
+    main()
@@ -10,7 +10,18 @@ from app.config.settings import settings
 
 load_dotenv()
 
-def deploy():
+# version -> (source file, settings variable that should hold the address)
+CONTRACTS = {
+    "1": ("CertificateVerifier.sol", "CONTRACT_ADDRESS"),
+    "2": ("CertificateVerifierV2.sol", "CONTRACT_V2_ADDRESS"),
+}
+
+def deploy(version: str = "1"):
+    if version not in CONTRACTS:
+        print(f"Error: unknown contract version '{version}', expected one of {', '.join(CONTRACTS)}")
+        return
+    source, env_var = CONTRACTS[version]
+
     if not settings.RPC_URL or not settings.PRIVATE_KEY:
         print("Error: RPC_URL and PRIVATE_KEY must be set in .env")
         return
@@ -18,8 +29,8 @@ def deploy():
     print("Installing solc...")
     install_solc("0.8.0")
 
-    print("Compiling contract...")
-    contract_path = os.path.join(os.path.dirname(__file__), "../../contracts/CertificateVerifier.sol")
+    print(f"Compiling {source}...")
+    contract_path = os.path.join(os.path.dirname(__file__), "../../contracts", source)
     compiled_sol = compile_files(
         [contract_path],
         output_values=["abi", "bin"],
@@ -40,9 +51,10 @@ def deploy():
     nonce = w3.eth.get_transaction_count(account.address)
 
     # Build transaction
+    gas_estimate = CertificateVerifier.constructor().estimate_gas({'from': account.address})
     tx = CertificateVerifier.constructor().build_transaction({
         'chainId': w3.eth.chain_id,
-        'gas': 2000000,
+        'gas': int(gas_estimate * 1.2),
         'gasPrice': w3.eth.gas_price,
         'nonce': nonce,
     })
@@ -58,7 +70,8 @@ def deploy():
     
     print(f"Contract deployed at: {tx_receipt.contractAddress}")
     print("\nUPDATE YOUR .env WITH THIS ADDRESS:")
-    print(f"CONTRACT_ADDRESS={tx_receipt.contractAddress}")
+    print(f"{env_var}={tx_receipt.contractAddress}")
 
 if __name__ == "__main__":
-    deploy()
+    # python scripts/deploy.py [1|2]
+    deploy(sys.argv[1] if len(sys.argv) > 1 else "1")
@@ -4,15 +4,70 @@ import os
 
 sys.path.append(os.getcwd())
 from app.config.settings import settings
+from app.db.database import Base
+import app.models.organization
+import app.models.user
+import app.models.anchor_batch
+import app.models.certificate
+import app.models.chain_event
+import app.models.bulk_job
+import app.models.issuance_job
 
 def migrate():
     engine = create_engine(settings.DATABASE_URL)
+    # New tables are created outright; existing tables get the ALTERs below
+    Base.metadata.create_all(bind=engine)
     with engine.connect() as conn:
         print("Checking organizations table...")
         try:
             conn.execute(text("ALTER TABLE organizations ADD COLUMN IF NOT EXISTS domain VARCHAR;"))
+            conn.execute(text("ALTER TABLE organizations ADD COLUMN IF NOT EXISTS certificate_template VARCHAR;"))
             conn.commit()
-            print("Migration successful: Added 'domain' column to organizations.")
+            print("Migration successful: Added 'domain' and 'certificate_template' columns to organizations.")
+        except Exception as e:
+            print(f"Migration Error: {e}")
+
+        print("Checking certificates table...")
+        try:
+            conn.execute(text("ALTER TABLE certificates ADD COLUMN IF NOT EXISTS anchor_batch_id INTEGER REFERENCES anchor_batches(id);"))
+            conn.execute(text("ALTER TABLE certificates ADD COLUMN IF NOT EXISTS merkle_proof TEXT;"))
+            conn.execute(text("CREATE INDEX IF NOT EXISTS ix_certificates_anchor_batch_id ON certificates (anchor_batch_id);"))
+            conn.commit()
+            print("Migration successful: Added merkle anchoring columns to certificates.")
+        except Exception as e:
+            print(f"Migration Error: {e}")
+
+        try:
+            # Rows written before asynchronous confirmation were only saved after their receipt
+            conn.execute(text("ALTER TABLE certificates ADD COLUMN IF NOT EXISTS chain_status VARCHAR NOT NULL DEFAULT 'confirmed';"))
+            conn.execute(text("ALTER TABLE certificates ADD COLUMN IF NOT EXISTS revoke_tx_hash VARCHAR;"))
+            conn.execute(text("ALTER TABLE certificates ADD COLUMN IF NOT EXISTS chain_updated_at TIMESTAMP;"))
+            conn.execute(text("CREATE INDEX IF NOT EXISTS ix_certificates_chain_status ON certificates (chain_status);"))
+            conn.commit()
+            print("Migration successful: Added chain confirmation columns to certificates.")
+        except Exception as e:
+            print(f"Migration Error: {e}")
+
+        try:
+            # Everything issued so far lives on the v1 contract
+            conn.execute(text("ALTER TABLE certificates ADD COLUMN IF NOT EXISTS contract_version INTEGER NOT NULL DEFAULT 1;"))
+            conn.commit()
+            print("Migration successful: Added 'contract_version' column to certificates.")
+        except Exception as e:
+            print(f"Migration Error: {e}")
+
+        try:
+            conn.execute(text("CREATE INDEX IF NOT EXISTS ix_certificates_issued_by_created_at_id ON certificates (issued_by, created_at, id);"))
+            conn.commit()
+            print("Migration successful: Added certificate listing index.")
+        except Exception as e:
+            print(f"Migration Error: {e}")
+
+        try:
+            conn.execute(text("ALTER TABLE certificates ADD COLUMN IF NOT EXISTS file_hash VARCHAR;"))
+            conn.execute(text("CREATE INDEX IF NOT EXISTS ix_certificates_file_hash ON certificates (file_hash);"))
+            conn.commit()
+            print("Migration successful: Added 'file_hash' column to certificates.")
         except Exception as e:
             print(f"Migration Error: {e}")
 
@@ -102,6 +102,8 @@ async def test_organization_and_certs(client):
     upd_res = await client.put(f"/organizations/{org_id}", json={"domain": "verify.test.edu"}, headers=headers)
     assert upd_res.status_code == 200
     assert upd_res.json()["domain"] == "verify.test.edu"
+    me_again = await client.get("/organizations/me", headers=headers)
+    assert me_again.json()["domain"] == "verify.test.edu"
 
     # 3. Issue Certificate
     issue_res = await client.post("/certificates/issue", json={
@@ -112,6 +114,14 @@ async def test_organization_and_certs(client):
     cert_hash = issue_res.json()["cert_hash"]
     cert_id = issue_res.json()["id"]
 
+    # 3b. Verify the issued PDF itself (stored locally when MinIO is unreachable)
+    from app.services.minio_service import minio_service
+    if not minio_service.client:
+        with open(minio_service._local_path(issue_res.json()["storage_url"]), "rb") as f:
+            file_res = await client.post("/certificates/verify-file", files={"file": ("cert.pdf", f.read(), "application/pdf")})
+        assert file_res.status_code == 200
+        assert file_res.json()["local_record"]["cert_hash"] == cert_hash
+
     # 4. List Certificates
     list_res = await client.get("/certificates/", headers=headers)
     assert list_res.status_code == 200
@@ -133,6 +143,174 @@ async def test_organization_and_certs(client):
     if verify_again.json()["on_chain"]["issuer"] != "0xMOCK_ISSUER":
         assert verify_again.json()["on_chain"]["revoked"] is True
 
-    # 8. Delete Certificate
+    # 8. Batch Verify (order kept, unknown hashes reported per item)
+    batch_res = await client.post("/certificates/verify-batch", json={"hashes": ["unknown", cert_hash, "unknown"]})
+    assert batch_res.status_code == 200
+    results = batch_res.json()["results"]
+    assert [r["cert_hash"] for r in results] == ["unknown", cert_hash, "unknown"]
+    assert results[0]["found"] is False
+    assert results[1]["found"] is True
+    assert results[1]["local_record"]["revoked"] is True
+
+    malformed = await client.get("/certificates/verify/not-a-sha256")
+    assert malformed.status_code == 404
+
+    # 9. Delete Certificate
     del_res = await client.delete(f"/certificates/{cert_id}", headers=headers)
     assert del_res.status_code == 200
+
+@pytest.mark.anyio
+async def test_bulk_issuance(client):
+    import time
+    ts = int(time.time())
+    email = f"test_bulk_{ts}@example.com"
+    password = "password123"
+
+    db = SessionLocal()
+    org = Organization(name=f"Bulk Org {ts}")
+    db.add(org)
+    db.commit()
+    db.refresh(org)
+    db.add(User(email=email, password_hash=hash_password(password), organization_id=org.id))
+    db.commit()
+    db.close()
+
+    login_res = await client.post("/auth/login", json={"email": email, "password": password})
+    headers = {"Authorization": f"Bearer {login_res.json()['access_token']}"}
+
+    csv_body = "owner_name,course_name\nAda Lovelace,Analytical Engines\nAlan Turing,Computability\nAda Lovelace,Analytical Engines\n,Missing Name\n"
+    bulk_res = await client.post(
+        "/certificates/issue-bulk",
+        files={"file": ("cohort.csv", csv_body, "text/csv")},
+        headers=headers,
+    )
+    assert bulk_res.status_code == 200
+    job_id = bulk_res.json()["job_id"]
+    assert bulk_res.json()["total"] == 4
+
+    for _ in range(100):
+        job_res = await client.get(f"/certificates/bulk/{job_id}", headers=headers)
+        if job_res.json()["status"] in ("completed", "failed"):
+            break
+        await asyncio.sleep(0.1)
+
+    job = job_res.json()
+    assert job["status"] == "completed"
+    assert job["succeeded"] == 2
+    assert job["failed"] == 2
+    statuses = [item["status"] for item in job["items"]]
+    assert statuses == ["issued", "issued", "failed", "failed"]
+
+@pytest.mark.anyio
+async def test_verify_file_hashes_upload(client):
+    from app.config.settings import settings
+
+    unknown = await client.post("/certificates/verify-file", files={"file": ("random.pdf", b"%PDF-1.4 not issued", "application/pdf")})
+    assert unknown.status_code == 404
+
+    limit = settings.VERIFY_UPLOAD_MAX_BYTES
+    settings.VERIFY_UPLOAD_MAX_BYTES = 16
+    try:
+        too_large = await client.post("/certificates/verify-file", files={"file": ("big.pdf", b"x" * 1024, "application/pdf")})
+    finally:
+        settings.VERIFY_UPLOAD_MAX_BYTES = limit
+    assert too_large.status_code == 413
+
+@pytest.mark.anyio
+async def test_verify_file_rejects_declared_oversize_before_parsing(client):
+    from app.config.settings import settings
+
+    limit = settings.VERIFY_UPLOAD_MAX_BYTES
+    settings.VERIFY_UPLOAD_MAX_BYTES = 16
+    try:
+        # Not a valid form: the route would answer 422 had the body been parsed
+        res = await client.post(
+            "/certificates/verify-file",
+            content=b"x" * (128 * 1024),
+            headers={"Content-Type": "multipart/form-data; boundary=x"},
+        )
+    finally:
+        settings.VERIFY_UPLOAD_MAX_BYTES = limit
+    assert res.status_code == 413
+    assert res.json() == {"detail": "File too large"}
+
+@pytest.mark.anyio
+async def test_list_certificates_pages_with_cursor(client):
+    import time
+    from datetime import datetime, timedelta
+    from app.models.certificate import Certificate
+    ts = int(time.time())
+    email = f"test_pages_{ts}@example.com"
+    password = "password123"
+
+    db = SessionLocal()
+    org = Organization(name=f"Paging Org {ts}")
+    db.add(org)
+    db.commit()
+    db.refresh(org)
+    db.add(User(email=email, password_hash=hash_password(password), organization_id=org.id))
+    # Two certificates share a timestamp so the id has to break the tie
+    start = datetime(2024, 1, 1)
+    for i, offset in enumerate([0, 1, 2, 2, 3]):
+        db.add(Certificate(
+            cert_hash=f"page_{ts}_{i}", owner_name=f"Student {i}", course_name="Even" if i % 2 == 0 else "Odd",
+            issued_by=org.id, storage_url="", revoked=i == 4, created_at=start + timedelta(days=offset),
+        ))
+    db.commit()
+    db.close()
+
+    login_res = await client.post("/auth/login", json={"email": email, "password": password})
+    headers = {"Authorization": f"Bearer {login_res.json()['access_token']}"}
+
+    seen, cursor = [], None
+    while True:
+        params = {"limit": 2, **({"cursor": cursor} if cursor else {})}
+        page = await client.get("/certificates/", params=params, headers=headers)
+        assert page.status_code == 200
+        seen += [cert["cert_hash"] for cert in page.json()]
+        cursor = page.headers.get("x-next-cursor")
+        if not cursor:
+            break
+    assert seen == [f"page_{ts}_{i}" for i in (4, 3, 2, 1, 0)]
+
+    filtered = await client.get("/certificates/", params={"revoked": "false", "course": "Even"}, headers=headers)
+    assert [cert["cert_hash"] for cert in filtered.json()] == [f"page_{ts}_2", f"page_{ts}_0"]
+
+    bad = await client.get("/certificates/", params={"cursor": "not-a-cursor"}, headers=headers)
+    assert bad.status_code == 400
+
+@pytest.mark.anyio
+async def test_anchor_only_touches_the_callers_organization(client):
+    import hashlib
+    import time
+    from app.models.certificate import Certificate
+    ts = time.time_ns()
+    email = f"test_anchor_{ts}@example.com"
+    password = "password123"
+
+    db = SessionLocal()
+    mine, other = Organization(name=f"Anchor Org {ts}"), Organization(name=f"Other Anchor Org {ts}")
+    db.add_all([mine, other])
+    db.commit()
+    db.add(User(email=email, password_hash=hash_password(password), organization_id=mine.id))
+    hashes = {org.id: hashlib.sha256(f"anchor-{org.id}-{ts}".encode()).hexdigest() for org in (mine, other)}
+    for org_id, cert_hash in hashes.items():
+        db.add(Certificate(cert_hash=cert_hash, owner_name="Ada", course_name="Trees", issued_by=org_id, storage_url=""))
+    db.commit()
+    mine_id, other_id = mine.id, other.id
+    db.close()
+
+    login_res = await client.post("/auth/login", json={"email": email, "password": password})
+    headers = {"Authorization": f"Bearer {login_res.json()['access_token']}"}
+    res = await client.post("/certificates/anchor", headers=headers)
+    assert res.status_code == 200
+
+    db = SessionLocal()
+    try:
+        anchored = {
+            cert.issued_by: cert.anchor_batch_id is not None
+            for cert in db.query(Certificate).filter(Certificate.cert_hash.in_(hashes.values()))
+        }
+    finally:
+        db.close()
+    assert anchored == {mine_id: True, other_id: False}
@@ -0,0 +1,32 @@
+import io
+import pytest
+from app.services import bulk_issuance_service
+
+class Upload(io.BytesIO):
+    """Remembers how far it was read; the parser's text wrapper closes it on the way out."""
+
+    read_up_to = None
+
+    def close(self):
+        if self.read_up_to is None:
+            self.read_up_to = self.tell()
+        super().close()
+
+def test_oversized_file_is_rejected_without_reading_it_all(monkeypatch):
+    monkeypatch.setattr(bulk_issuance_service.settings, "BULK_MAX_ROWS", 2)
+    data = ("owner_name,course_name\n" + "Ada,Engines\n" * 100_000).encode()
+    upload = Upload(data)
+
+    with pytest.raises(ValueError, match="more than 2 rows"):
+        bulk_issuance_service.parse_recipients(upload, "recipients.csv")
+    upload.close()
+    assert upload.read_up_to < len(data)
+
+def test_rows_up_to_the_limit_are_parsed(monkeypatch):
+    monkeypatch.setattr(bulk_issuance_service.settings, "BULK_MAX_ROWS", 2)
+    upload = io.BytesIO(b'{"owner_name": "Ada", "course_name": "Engines"}\n\n{"owner_name": "Grace"}\n')
+
+    rows = bulk_issuance_service.parse_recipients(upload, "recipients.ndjson")
+
+    assert rows[0] == {"owner_name": "Ada", "course_name": "Engines"}
+    assert rows[1]["error"] == "owner_name and course_name are required"
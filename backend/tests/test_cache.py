@@ -0,0 +1,28 @@
+import asyncio
+import time
+from app.services.auth_service import create_access_token, get_identity
+from app.services.cache import MISSING, TTLCache
+
+def test_least_recently_used_entry_is_evicted():
+    cache = TTLCache(maxsize=2, ttl=60)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    assert cache.get("a") == 1
+    cache.set("c", 3)
+
+    assert cache.get("b") is MISSING
+    assert cache.get("a") == 1 and cache.get("c") == 3
+    assert cache.stats() == {"size": 2, "maxsize": 2, "hits": 3, "misses": 1}
+
+def test_entries_expire_and_none_is_cacheable():
+    cache = TTLCache(maxsize=10, ttl=0.01)
+    cache.set("gone", None)
+    assert cache.get("gone") is None
+    time.sleep(0.02)
+    assert cache.get("gone") is MISSING
+    assert len(cache) == 0
+
+def test_identity_comes_from_token_claims_without_a_lookup():
+    token = create_access_token({"sub": "7", "role": "issuer", "organization_id": 3})
+    identity = asyncio.run(get_identity(token))
+    assert (identity.user_id, identity.organization_id, identity.role) == (7, 3, "issuer")
@@ -0,0 +1,62 @@
+import time
+from datetime import datetime, timedelta, timezone
+import pytest
+from app.config.settings import settings
+from app.db.database import Base, SessionLocal, engine
+import app.main  # registers every model with Base
+from app.models.anchor_batch import AnchorBatch
+from app.models.certificate import Certificate
+from app.models.organization import Organization
+from app.services import confirmation_service
+from app.services.blockchain_service import blockchain_service
+
+@pytest.fixture
+def db():
+    Base.metadata.create_all(bind=engine)
+    session = SessionLocal()
+    yield session
+    session.close()
+
+def make_certs(db, count, tx_hash, age_seconds=0, batch=None):
+    ts = time.time_ns()
+    org = Organization(name=f"Confirm Org {ts}")
+    db.add(org)
+    db.flush()
+    updated = datetime.now(timezone.utc) - timedelta(seconds=age_seconds)
+    certs = [
+        Certificate(
+            cert_hash=f"confirm_{ts}_{i}", owner_name="Ada", course_name="Engines", issued_by=org.id,
+            storage_url="certs/x.pdf", tx_hash=tx_hash, chain_status="pending", chain_updated_at=updated,
+            anchor_batch_id=batch.id if batch else None,
+        )
+        for i in range(count)
+    ]
+    db.add_all(certs)
+    db.commit()
+    return certs
+
+def test_timed_out_batch_is_requeued_for_every_certificate(db, monkeypatch):
+    tx_hash = f"0xbatch{time.time_ns()}"
+    batch = AnchorBatch(merkle_root=f"0xroot{time.time_ns()}", tx_hash=tx_hash, size=3)
+    db.add(batch)
+    db.flush()
+    certs = make_certs(db, 3, tx_hash, age_seconds=settings.CONFIRMATION_TIMEOUT_SECONDS + 60, batch=batch)
+    monkeypatch.setattr(blockchain_service, "get_receipt_statuses", lambda hashes: {})
+
+    confirmation_service.confirm_pending(db)
+
+    for cert in certs:
+        db.refresh(cert)
+        assert (cert.chain_status, cert.anchor_batch_id, cert.tx_hash) == ("pending", None, None)
+
+def test_unmined_certificates_do_not_hold_back_newer_ones(db, monkeypatch):
+    monkeypatch.setattr(settings, "CONFIRMATION_BATCH_SIZE", 1)
+    [unmined] = make_certs(db, 1, f"0xslow{time.time_ns()}")
+    [mined] = make_certs(db, 1, f"0xfast{time.time_ns()}")
+    monkeypatch.setattr(blockchain_service, "get_receipt_statuses", lambda hashes: {mined.tx_hash: 1})
+
+    confirmation_service.receipt_confirmer.run_once()
+
+    db.refresh(unmined)
+    db.refresh(mined)
+    assert (unmined.chain_status, mined.chain_status) == ("pending", "confirmed")
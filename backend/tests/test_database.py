@@ -0,0 +1,55 @@
+import pytest
+from app.db.database import async_database_url
+
+@pytest.mark.parametrize("url, expected", [
+    ("sqlite:///./cyphire.db", "sqlite+aiosqlite:///./cyphire.db"),
+    ("postgresql://u:p@db:5432/cyphire", "postgresql+asyncpg://u:p@db:5432/cyphire"),
+    ("postgresql+psycopg2://u:p@db/cyphire", "postgresql+asyncpg://u:p@db/cyphire"),
+    ("postgresql://u:p@db/cyphire?sslmode=require", "postgresql+asyncpg://u:p@db/cyphire?ssl=require"),
+])
+def test_async_database_url(url, expected):
+    assert async_database_url(url).render_as_string(hide_password=False) == expected
+
+def test_unknown_backend_is_rejected():
+    with pytest.raises(ValueError):
+        async_database_url("mysql://u:p@db/cyphire")
+
+def test_routing_session_reads_from_replica_and_writes_to_primary(tmp_path):
+    from sqlalchemy import create_engine, text
+    from app.db.database import RoutingSession
+
+    primary = create_engine(f"sqlite:///{tmp_path}/primary.db")
+    replica = create_engine(f"sqlite:///{tmp_path}/replica.db")
+    for db_engine, name in ((primary, "primary"), (replica, "replica")):
+        with db_engine.begin() as conn:
+            conn.execute(text("CREATE TABLE marker (name VARCHAR)"))
+            conn.execute(text("INSERT INTO marker VALUES (:name)"), {"name": name})
+
+    class Routing(RoutingSession):
+        pass
+    Routing.primary, Routing.replicas = primary, [replica]
+
+    with Routing(info={"replica": True}) as db:
+        assert db.execute(text("SELECT name FROM marker")).scalar() == "replica"
+    with Routing() as db:
+        assert db.execute(text("SELECT name FROM marker")).scalar() == "primary"
+
+def test_read_session_sticks_to_one_replica(tmp_path):
+    from sqlalchemy import create_engine, text
+    from app.db.database import RoutingSession
+
+    replicas = []
+    for i in range(4):
+        replica = create_engine(f"sqlite:///{tmp_path}/replica{i}.db")
+        with replica.begin() as conn:
+            conn.execute(text("CREATE TABLE marker (name VARCHAR)"))
+            conn.execute(text("INSERT INTO marker VALUES (:name)"), {"name": f"replica{i}"})
+        replicas.append(replica)
+
+    class Routing(RoutingSession):
+        pass
+    Routing.primary, Routing.replicas = create_engine("sqlite://"), replicas
+
+    with Routing(info={"replica": True}) as db:
+        names = {db.execute(text("SELECT name FROM marker")).scalar() for _ in range(20)}
+    assert len(names) == 1
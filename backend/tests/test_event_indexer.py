@@ -0,0 +1,86 @@
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from app.db.database import Base
+from app.models.chain_event import ChainEvent
+from app.services import event_indexer
+
+class FakeChain:
+    """Minimal stand-in for BlockchainService with a rewritable block history."""
+
+    def __init__(self):
+        self.blocks = {}
+        self.events = {}
+
+    def mine(self, number, fork="a", events=()):
+        self.blocks[number] = f"0x{fork}{number:04d}"
+        self.events[number] = [
+            {
+                "event": name,
+                "args": {"certHash": cert_hash, "issuer": "0xISSUER", "revoker": "0xISSUER", "timestamp": number},
+                "blockNumber": number,
+                "transactionHash": bytes([number, i]) * 16,
+                "logIndex": i,
+            }
+            for i, (name, cert_hash) in enumerate(events)
+        ]
+
+    def get_block_number(self):
+        return max(self.blocks)
+
+    def get_block_hash(self, number):
+        return self.blocks[number]
+
+    def get_contract_events(self, from_block, to_block):
+        return [e for n in range(from_block, to_block + 1) for e in self.events.get(n, [])]
+
+@pytest.fixture
+def db(monkeypatch):
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(bind=engine)
+    session = sessionmaker(bind=engine)()
+    monkeypatch.setattr(event_indexer.settings, "INDEXER_START_BLOCK", 1)
+    monkeypatch.setattr(event_indexer.settings, "INDEXER_REORG_DEPTH", 3)
+    monkeypatch.setattr(event_indexer.settings, "INDEXER_BATCH_BLOCKS", 2)
+    yield session
+    session.close()
+
+def test_indexes_issue_and_revoke_in_batches(db, monkeypatch):
+    chain = FakeChain()
+    chain.mine(1, events=[("CertificateIssued", "aa")])
+    chain.mine(2)
+    chain.mine(3, events=[("CertificateRevoked", "aa"), ("CertificateIssued", "bb")])
+    # v2 contract logs carry bytes32 keys
+    chain.mine(4, events=[("CertificateIssued", bytes.fromhex("dd" * 32))])
+    monkeypatch.setattr(event_indexer, "blockchain_service", chain)
+
+    assert event_indexer.lookup_certificates(db, ["aa"]) is None
+
+    while event_indexer.index_next_range(db):
+        pass
+
+    results = event_indexer.lookup_certificates(db, ["aa", "bb", "cc", "dd" * 32])
+    assert results["aa"] == {"exists": True, "issuer": "0xISSUER", "timestamp": 1, "revoked": True}
+    assert results["bb"]["revoked"] is False
+    assert results["cc"]["exists"] is False
+    assert results["dd" * 32]["exists"] is True
+
+def test_reorg_drops_orphaned_events(db, monkeypatch):
+    chain = FakeChain()
+    for n in range(1, 5):
+        chain.mine(n)
+    chain.mine(5, events=[("CertificateIssued", "aa")])
+    monkeypatch.setattr(event_indexer, "blockchain_service", chain)
+    while event_indexer.index_next_range(db):
+        pass
+    assert event_indexer.lookup_certificates(db, ["aa"])["aa"]["exists"] is True
+
+    # Blocks 4-5 are replaced by a fork that moves the issuance to block 6
+    chain.mine(4, fork="b")
+    chain.mine(5, fork="b")
+    chain.mine(6, fork="b", events=[("CertificateIssued", "aa")])
+    while event_indexer.index_next_range(db):
+        pass
+
+    rows = db.query(ChainEvent).filter(ChainEvent.key == "aa").all()
+    assert [r.block_number for r in rows] == [6]
@@ -0,0 +1,62 @@
+from app.services.fee_engine import FeeEngine
+
+GWEI = 10 ** 9
+
+class FakeEth:
+    def __init__(self, base_fees=None, rewards=None):
+        self.base_fees = base_fees
+        self.rewards = rewards
+        self.calls = {"chain_id": 0, "estimate_gas": 0}
+
+    @property
+    def chain_id(self):
+        self.calls["chain_id"] += 1
+        return 137
+
+    def estimate_gas(self, tx):
+        self.calls["estimate_gas"] += 1
+        return 100_000 + len(tx["data"])
+
+    def fee_history(self, block_count, newest_block, percentiles):
+        if self.base_fees is None:
+            raise ValueError("the method eth_feeHistory does not exist")
+        return {"baseFeePerGas": self.base_fees, "reward": self.rewards}
+
+    @property
+    def gas_price(self):
+        return 30 * GWEI
+
+class FakeWeb3:
+    def __init__(self, eth):
+        self.eth = eth
+
+def make_engine(eth):
+    engine = FeeEngine(15)
+    engine.bind(FakeWeb3(eth))
+    return engine
+
+def test_chain_id_and_estimates_are_cached_per_selector_and_size():
+    eth = FakeEth()
+    engine = make_engine(eth)
+    small = {"to": "0xC", "data": "0xaabbccdd" + "00" * 32}
+    large = {"to": "0xC", "data": "0xaabbccdd" + "00" * 96}
+
+    for _ in range(3):
+        assert engine.chain_id == 137
+        engine.gas_limit(small)
+    engine.gas_limit(large)
+
+    assert eth.calls == {"chain_id": 1, "estimate_gas": 2}
+    engine.forget_estimates()
+    engine.gas_limit(small)
+    assert eth.calls["estimate_gas"] == 3
+
+def test_eip1559_fees_from_fee_history():
+    eth = FakeEth(base_fees=[40 * GWEI, 50 * GWEI, 60 * GWEI], rewards=[[2 * GWEI], [0], [4 * GWEI]])
+    fees = make_engine(eth).fee_fields()
+
+    assert fees["maxPriorityFeePerGas"] == 3 * GWEI
+    assert fees["maxFeePerGas"] == 2 * 60 * GWEI + 3 * GWEI
+
+def test_legacy_gas_price_without_fee_history():
+    assert make_engine(FakeEth()).fee_fields() == {"gasPrice": 30 * GWEI}
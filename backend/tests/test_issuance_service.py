@@ -0,0 +1,125 @@
+import time
+from datetime import datetime, timedelta, timezone
+import pytest
+from eth_account import Account
+from eth_account.typed_transactions import TypedTransaction
+from hexbytes import HexBytes
+from web3 import Web3
+from app.config.settings import settings
+from app.db.database import Base, SessionLocal, engine
+import app.main  # registers every model with Base
+from app.models.certificate import Certificate
+from app.models.organization import Organization
+from app.services.certificate_service import RenderedPdf
+from app.services import issuance_service
+from app.services.blockchain_service import blockchain_service
+from app.services.fee_engine import fee_engine
+from app.services.minio_service import minio_service
+
+@pytest.fixture
+def db():
+    Base.metadata.create_all(bind=engine)
+    session = SessionLocal()
+    yield session
+    session.close()
+
+def make_job(db, stage, **fields):
+    ts = time.time_ns()
+    org = Organization(name=f"Outbox Org {ts}")
+    db.add(org)
+    db.commit()
+    job, claimed = issuance_service.enqueue(db, org, "Grace Hopper", "Compilers", f"outbox_{ts}")
+    assert claimed
+    job.stage = stage
+    for name, value in fields.items():
+        setattr(job, name, value)
+    db.commit()
+    return job
+
+def no_render(*args, **kwargs):
+    raise AssertionError("a completed stage ran again")
+
+def test_queued_job_uploads_the_rendered_pdf_from_memory(db, monkeypatch):
+    uploads = []
+    pdf = RenderedPdf(b"%PDF-1.4 rendered", "ab" * 32)
+    monkeypatch.setattr(issuance_service, "generate_certificate_pdf", lambda *args, **kwargs: pdf)
+    monkeypatch.setattr(minio_service, "upload_pdf", lambda data, sha256: uploads.append((data, sha256)) or f"{sha256}.pdf")
+    job = make_job(db, "queued")
+
+    job = issuance_service.advance(db, job)
+
+    assert uploads == [(pdf.data, pdf.sha256)]
+    assert (job.stage, job.status) == ("committed", "done")
+    cert = db.get(Certificate, job.certificate_id)
+    assert (cert.storage_url, cert.file_hash) == (f"{pdf.sha256}.pdf", pdf.sha256)
+    assert cert.chain_status == "confirmed"
+
+def test_signed_transaction_is_rebroadcast_not_signed_again(db, monkeypatch):
+    sent = []
+    monkeypatch.setattr(blockchain_service, "signed_issue", no_render)
+    monkeypatch.setattr(blockchain_service, "send_raw_transaction", lambda raw_tx: sent.append(raw_tx) or "0xabc")
+    job = make_job(db, "uploaded", storage_url="certs/sha256/00/00/0000.pdf", signed_tx="0xf86b01", tx_hash="0xabc", contract_version=1)
+
+    job = issuance_service.advance(db, job)
+
+    assert sent == ["0xf86b01"]
+    assert job.stage == "committed"
+    assert db.get(Certificate, job.certificate_id).tx_hash == "0xabc"
+
+def render_fails(*args, **kwargs):
+    raise RuntimeError("renderer crashed")
+
+def test_failed_stage_backs_off_and_keeps_its_place(db, monkeypatch):
+    monkeypatch.setattr(issuance_service, "generate_certificate_pdf", render_fails)
+    job = make_job(db, "queued")
+    # The render fails: the job stays queued and waits out the backoff
+    job = issuance_service.advance(db, job)
+
+    assert (job.stage, job.status, job.attempts) == ("queued", "pending", 1)
+    assert job.error == "renderer crashed"
+    assert issuance_service.claim(db, job) is False
+
+def stuck_job(db, monkeypatch, on_chain):
+    monkeypatch.setattr(blockchain_service, "get_receipt_statuses", lambda hashes: {})
+    monkeypatch.setattr(blockchain_service, "verify_on_chain", lambda cert_hash, version: {"exists": on_chain})
+    timed_out = datetime.now(timezone.utc) - timedelta(seconds=settings.CONFIRMATION_TIMEOUT_SECONDS + 60)
+    return make_job(db, "broadcast", storage_url="certs/sha256/00/00/0000.pdf", signed_tx="0xold",
+                    tx_hash="0xoldhash", contract_version=1, broadcast_at=timed_out)
+
+def test_stuck_transaction_is_replaced_with_a_fee_bump(db, monkeypatch):
+    sent = []
+    monkeypatch.setattr(blockchain_service, "replacement_transaction", lambda raw_tx: ("0xnew", "0xnewhash"))
+    monkeypatch.setattr(blockchain_service, "send_raw_transaction", lambda raw_tx: sent.append(raw_tx))
+    job = stuck_job(db, monkeypatch, on_chain=False)
+
+    job = issuance_service.advance(db, job)
+
+    assert sent == ["0xnew"]
+    assert (job.stage, job.status, job.signed_tx, job.tx_hash) == ("broadcast", "pending", "0xnew", "0xnewhash")
+
+def test_certificate_mined_by_a_replaced_transaction_is_committed(db, monkeypatch):
+    monkeypatch.setattr(blockchain_service, "replacement_transaction", no_render)
+    job = stuck_job(db, monkeypatch, on_chain=True)
+
+    job = issuance_service.advance(db, job)
+
+    assert (job.stage, job.status) == ("committed", "done")
+    assert db.get(Certificate, job.certificate_id).cert_hash == job.cert_hash
+
+def test_replacement_keeps_the_nonce_and_raises_the_fees(monkeypatch):
+    account = Account.create()
+    monkeypatch.setattr(settings, "PRIVATE_KEY", account.key.hex())
+    monkeypatch.setattr(blockchain_service, "w3", Web3())
+    monkeypatch.setattr(fee_engine, "fee_fields", lambda: {"maxFeePerGas": 105, "maxPriorityFeePerGas": 1})
+    original = account.sign_transaction({
+        "to": "0x" + "11" * 20, "value": 0, "data": "0x", "gas": 60000, "chainId": 1, "nonce": 7,
+        "maxFeePerGas": 100, "maxPriorityFeePerGas": 10,
+    })
+
+    raw_tx, tx_hash = blockchain_service.replacement_transaction(Web3.to_hex(original.raw_transaction))
+
+    replacement = TypedTransaction.from_bytes(HexBytes(raw_tx)).as_dict()
+    assert replacement["nonce"] == 7 and tx_hash != Web3.to_hex(original.hash)
+    # Bumped past the old fees, or up to the current market when that is higher
+    assert replacement["maxPriorityFeePerGas"] > 10 * 1.1
+    assert replacement["maxFeePerGas"] == 113
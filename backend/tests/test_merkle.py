@@ -0,0 +1,29 @@
+import hashlib
+import pytest
+from app.services import merkle_service
+
+def _cert_hashes(count):
+    return [hashlib.sha256(f"cert-{i}".encode()).hexdigest() for i in range(count)]
+
+@pytest.mark.parametrize("count", [1, 2, 3, 7, 8, 33])
+def test_every_proof_verifies_against_root(count):
+    leaves = [merkle_service.leaf_hash(h) for h in _cert_hashes(count)]
+    levels = merkle_service.build_levels(leaves)
+    root = merkle_service.get_root(levels)
+
+    for index, leaf in enumerate(leaves):
+        proof = merkle_service.get_proof(levels, index)
+        assert merkle_service.verify_proof(leaf, proof, root)
+
+def test_proof_rejects_foreign_leaf_and_survives_json():
+    leaves = [merkle_service.leaf_hash(h) for h in _cert_hashes(5)]
+    levels = merkle_service.build_levels(leaves)
+    root = merkle_service.get_root(levels)
+    proof = merkle_service.proof_from_json(merkle_service.proof_to_json(merkle_service.get_proof(levels, 2)))
+
+    assert merkle_service.verify_proof(leaves[2], proof, root)
+    assert not merkle_service.verify_proof(merkle_service.leaf_hash("ab" * 32), proof, root)
+
+def test_empty_tree_is_rejected():
+    with pytest.raises(ValueError):
+        merkle_service.build_levels([])
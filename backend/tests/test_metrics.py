@@ -0,0 +1,41 @@
+import asyncio
+from httpx import AsyncClient, ASGITransport
+from prometheus_client import CollectorRegistry, generate_latest
+from app.main import app
+from app.config.settings import settings
+from app.services.metrics import StatsCollector, stage_timer
+
+def _scrape(headers=None):
+    async def get():
+        async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as ac:
+            return await ac.get("/metrics", headers=headers or {})
+    return asyncio.run(get())
+
+def test_stats_dicts_become_labelled_gauges():
+    collector = StatsCollector()
+    collector.add("cache", lambda: {"size": 2, "nested": {"hits": 5}, "name": "skipped", "latency": None})
+    collector.add("endpoint", lambda: [{"url": "a", "healthy": True}, {"url": "b", "healthy": False}], label="url")
+    registry = CollectorRegistry()
+    registry.register(collector)
+
+    text = generate_latest(registry).decode()
+    assert "cyphire_cache_size 2.0" in text
+    assert "cyphire_cache_nested_hits 5.0" in text
+    assert 'cyphire_endpoint_healthy{url="a"} 1.0' in text
+    assert 'cyphire_endpoint_healthy{url="b"} 0.0' in text
+    assert "name" not in text and "latency" not in text
+
+def test_metrics_endpoint_exposes_stages_and_service_stats(monkeypatch):
+    with stage_timer("verify", "lookup"):
+        pass
+
+    response = _scrape()
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+    assert 'cyphire_stage_seconds_count{operation="verify",stage="lookup"}' in response.text
+    assert "cyphire_bcrypt_queue_capacity" in response.text
+    assert "cyphire_threadpool_threads" in response.text
+
+    monkeypatch.setattr(settings, "METRICS_TOKEN", "s3cret")
+    assert _scrape().status_code == 401
+    assert _scrape({"Authorization": "Bearer s3cret"}).status_code == 200
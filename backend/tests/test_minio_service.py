@@ -0,0 +1,65 @@
+import hashlib
+from minio.error import S3Error
+from app.services.cache import TTLCache
+from app.services.certificate_service import content_object_name, render_certificate_pdf
+from app.services.minio_service import minio_service
+
+class FakeMinio:
+    def __init__(self):
+        self.signed = 0
+
+    def presigned_get_object(self, bucket, object_name, expires):
+        self.signed += 1
+        return f"https://minio.test/{bucket}/{object_name}?sig={self.signed}"
+
+def test_presigned_urls_are_reused_while_cached(monkeypatch):
+    client = FakeMinio()
+    monkeypatch.setattr(minio_service, "client", client)
+    monkeypatch.setattr(minio_service, "url_cache", TTLCache(maxsize=10, ttl=60))
+
+    first = minio_service.get_file_url("certs/a.pdf")
+    assert minio_service.get_file_url("certs/a.pdf") == first
+    assert minio_service.get_file_url("certs/b.pdf") != first
+    assert client.signed == 2
+    assert minio_service.stats()["url_cache"]["hits"] == 1
+
+def test_urls_past_the_safety_margin_are_signed_again(monkeypatch):
+    client = FakeMinio()
+    monkeypatch.setattr(minio_service, "client", client)
+    # Expiry minus margin leaves no reuse window
+    monkeypatch.setattr(minio_service, "url_cache", TTLCache(maxsize=10, ttl=0))
+
+    minio_service.get_file_url("certs/a.pdf")
+    minio_service.get_file_url("certs/a.pdf")
+    assert client.signed == 2
+
+class FakeBucket:
+    def __init__(self):
+        self.objects = {}
+        self.puts = 0
+
+    def stat_object(self, bucket, object_name):
+        if object_name not in self.objects:
+            raise S3Error(None, "NoSuchKey", "Object does not exist", object_name, "", "")
+        return object_name
+
+    def put_object(self, bucket, object_name, data, length, content_type, metadata):
+        self.puts += 1
+        self.objects[object_name] = data.read()
+
+def test_identical_pdfs_are_stored_once_under_their_hash(monkeypatch):
+    client = FakeBucket()
+    monkeypatch.setattr(minio_service, "client", client)
+    sha256 = hashlib.sha256(b"%PDF-1.4 same bytes").hexdigest()
+
+    names = {minio_service.upload_pdf(b"%PDF-1.4 same bytes", sha256) for _ in range(3)}
+
+    assert names == {f"certs/sha256/{sha256[:2]}/{sha256[2:4]}/{sha256}.pdf"}
+    assert client.puts == 1
+
+def test_same_certificate_renders_to_the_same_object():
+    first = render_certificate_pdf("Ada Lovelace", "Engines", "Analytical University", "ab" * 32)
+    second = render_certificate_pdf("Ada Lovelace", "Engines", "Analytical University", "ab" * 32)
+
+    assert first.sha256 == second.sha256
+    assert content_object_name(first.sha256) == content_object_name(second.sha256)
@@ -0,0 +1,100 @@
+import threading
+import pytest
+from app.services.blockchain_service import NonceManager
+
+class FakeEth:
+    def __init__(self, count):
+        self.count = count
+        self.calls = 0
+
+    def get_transaction_count(self, address, block_identifier="latest"):
+        self.calls += 1
+        return self.count
+
+class FakeWeb3:
+    def __init__(self, count):
+        self.eth = FakeEth(count)
+
+def test_concurrent_allocations_are_unique_and_contiguous():
+    w3 = FakeWeb3(7)
+    manager = NonceManager(w3, "0xSIGNER")
+    manager.sync()
+    nonces = []
+    lock = threading.Lock()
+
+    def worker():
+        for _ in range(50):
+            nonce = manager.allocate()
+            with lock:
+                nonces.append(nonce)
+
+    threads = [threading.Thread(target=worker) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert sorted(nonces) == list(range(7, 7 + 400))
+    assert w3.eth.calls == 1
+
+def test_failed_send_releases_nonce_for_reuse():
+    manager = NonceManager(FakeWeb3(0), "0xSIGNER")
+    first = manager.allocate()
+
+    with pytest.raises(RuntimeError):
+        with manager.reserve():
+            raise RuntimeError("connection reset")
+
+    # The gap left by the failed send (nonce 1) is filled before moving on
+    assert manager.allocate() == 1
+    assert manager.allocate() == 2
+    assert first == 0
+
+def test_nonce_error_resyncs_from_chain():
+    w3 = FakeWeb3(3)
+    manager = NonceManager(w3, "0xSIGNER")
+    manager.allocate()
+    w3.eth.count = 10
+
+    with pytest.raises(ValueError):
+        with manager.reserve():
+            raise ValueError("nonce too low")
+
+    assert manager.allocate() == 10
+
+def test_send_the_node_accepted_does_not_release_its_nonce():
+    w3 = FakeWeb3(0)
+    manager = NonceManager(w3, "0xSIGNER")
+
+    with pytest.raises(TimeoutError):
+        with manager.reserve():
+            # The node took the transaction, then the reply timed out
+            w3.eth.count = 1
+            raise TimeoutError("read timed out")
+
+    assert manager.allocate() == 1
+
+def test_resync_does_not_reuse_nonces_still_in_flight():
+    w3 = FakeWeb3(5)
+    manager = NonceManager(w3, "0xSIGNER")
+    held = [manager.allocate(), manager.allocate()]
+
+    # Another thread's dropped transaction triggers a resync before these are sent
+    manager.sync()
+
+    assert held == [5, 6]
+    assert manager.allocate() == 7
+
+def test_resync_without_nonces_in_flight_follows_the_chain():
+    w3 = FakeWeb3(5)
+    manager = NonceManager(w3, "0xSIGNER")
+    with manager.reserve():
+        pass
+    with manager.reserve():
+        pass
+    # Nonce 6 was dropped from the mempool
+    w3.eth.count = 6
+
+    manager.sync()
+
+    assert manager.allocate() == 6
@@ -0,0 +1,29 @@
+import asyncio
+import time
+from passlib.context import CryptContext
+from app.config.settings import settings
+from app.services.password_hasher import HasherSaturated, PasswordHasher
+
+def test_full_queue_is_rejected_instead_of_waiting():
+    hasher = PasswordHasher(workers=1, queue_size=1)
+
+    async def burst():
+        return await asyncio.gather(*(hasher._run(time.sleep, 0.05) for _ in range(3)), return_exceptions=True)
+
+    results = asyncio.run(burst())
+    assert [isinstance(r, HasherSaturated) for r in results] == [False, False, True]
+    assert hasher.stats()["rejected"] == 1
+    assert hasher.stats()["in_flight"] == 0
+    hasher.shutdown()
+
+def test_hash_with_old_cost_is_upgraded_on_verify():
+    hasher = PasswordHasher(workers=1, queue_size=0)
+    old_hash = CryptContext(schemes=["bcrypt"], bcrypt__rounds=4).hash("secret")
+
+    matches, new_hash = asyncio.run(hasher.verify_and_update("secret", old_hash))
+
+    assert matches is True
+    assert new_hash.startswith(f"$2b${settings.BCRYPT_ROUNDS:02d}$")
+    assert asyncio.run(hasher.verify_and_update("secret", new_hash)) == (True, None)
+    assert asyncio.run(hasher.verify_and_update("wrong", new_hash)) == (False, None)
+    hasher.shutdown()
@@ -0,0 +1,82 @@
+import asyncio
+import json
+import time
+import pytest
+from fastapi import APIRouter, FastAPI
+from httpx import AsyncClient, ASGITransport
+from starlette.middleware.base import BaseHTTPMiddleware
+from app.config.settings import settings
+from app.main import app, profile_request
+from app.services import profiler
+
+def busy_sync_work():
+    end = time.perf_counter() + 0.05
+    while time.perf_counter() < end:
+        pass
+
+def busy_async_work():
+    end = time.perf_counter() + 0.05
+    while time.perf_counter() < end:
+        pass
+
+router = APIRouter(route_class=profiler.ProfiledRoute)
+
+@router.get("/sync")
+def sync_endpoint():
+    busy_sync_work()
+    return {"ok": True}
+
+@router.get("/async")
+async def async_endpoint():
+    busy_async_work()
+    return {"ok": True}
+
+profiled_app = FastAPI()
+profiled_app.add_middleware(BaseHTTPMiddleware, dispatch=profile_request)
+profiled_app.include_router(router)
+
+@pytest.fixture
+def profiling(monkeypatch, tmp_path):
+    monkeypatch.setattr(settings, "PROFILE_TOKEN", "s3cret")
+    monkeypatch.setattr(settings, "PROFILE_SAMPLE_RATE", 0.0)
+    monkeypatch.setattr(settings, "PROFILE_DIR", str(tmp_path))
+    return tmp_path
+
+def _get(target, path, headers=None):
+    async def get():
+        async with AsyncClient(transport=ASGITransport(app=target), base_url="http://test") as ac:
+            return await ac.get(path, headers=headers or {})
+    return asyncio.run(get())
+
+def _frame_names(profile: dict) -> set:
+    return {frame["name"] for frame in profile["shared"]["frames"]}
+
+def test_only_requests_with_the_token_are_profiled(profiling):
+    assert profiler.PROFILE_ID_HEADER not in _get(profiled_app, "/sync").headers
+    assert profiler.PROFILE_ID_HEADER not in _get(profiled_app, "/sync", {"X-Profile-Token": "wrong"}).headers
+    assert list(profiling.iterdir()) == []
+
+@pytest.mark.parametrize("path,work", [("/sync", "busy_sync_work"), ("/async", "busy_async_work")])
+def test_profile_covers_sync_and_async_endpoints(profiling, path, work):
+    response = _get(profiled_app, path, {"X-Profile-Token": "s3cret"})
+    assert response.json() == {"ok": True}
+
+    name = response.headers[profiler.PROFILE_ID_HEADER]
+    with open(profiling / name) as f:
+        assert work in _frame_names(json.load(f))
+
+def test_profiles_are_listed_and_downloaded_with_the_token(profiling):
+    name = _get(profiled_app, "/sync", {"X-Profile-Token": "s3cret"}).headers[profiler.PROFILE_ID_HEADER]
+
+    assert _get(app, "/profiles/").status_code == 403
+    listed = _get(app, "/profiles/", {"X-Profile-Token": "s3cret"}).json()
+    assert [p["name"] for p in listed] == [name]
+
+    download = _get(app, f"/profiles/{name}", {"X-Profile-Token": "s3cret"})
+    assert download.status_code == 200 and "busy_sync_work" in _frame_names(download.json())
+    assert _get(app, "/profiles/..%2Fsettings.py", {"X-Profile-Token": "s3cret"}).status_code == 404
+
+def test_oldest_profiles_are_pruned(profiling, monkeypatch):
+    monkeypatch.setattr(settings, "PROFILE_MAX_FILES", 2)
+    names = [_get(profiled_app, "/async", {"X-Profile-Token": "s3cret"}).headers[profiler.PROFILE_ID_HEADER] for _ in range(3)]
+    assert sorted(p.name for p in profiling.iterdir()) == names[1:]
@@ -0,0 +1,85 @@
+import threading
+import time
+from prometheus_client import generate_latest
+from app.config.settings import settings
+from app.services.rpc_provider import MultiEndpointProvider
+
+class FakeHTTPProvider:
+    def __init__(self, name, delay=0.0, fail=False):
+        self.name = name
+        self.delay = delay
+        self.fail = fail
+        self.calls = []
+
+    def make_request(self, method, params):
+        self.calls.append(method)
+        time.sleep(self.delay)
+        if self.fail:
+            raise ConnectionError(f"{self.name} is down")
+        return {"jsonrpc": "2.0", "id": 1, "result": self.name}
+
+    def make_batch_request(self, requests):
+        return [self.make_request(method, params) for method, params in requests]
+
+def make_provider(*fakes):
+    provider = MultiEndpointProvider([f"http://{fake.name}" for fake in fakes])
+    for endpoint, fake in zip(provider.endpoints, fakes):
+        endpoint.provider = fake
+    return provider
+
+def test_reads_prefer_the_fastest_endpoint():
+    slow, fast = FakeHTTPProvider("slow", delay=0.02), FakeHTTPProvider("fast")
+    provider = make_provider(slow, fast)
+
+    # Both get measured once, then the fast one wins
+    for _ in range(5):
+        provider.make_request("eth_blockNumber", [])
+
+    assert provider.make_request("eth_blockNumber", [])["result"] == "fast"
+    assert len(slow.calls) == 1
+
+def test_reads_fail_over_and_cool_down_a_dead_endpoint(monkeypatch):
+    monkeypatch.setattr(settings, "RPC_MAX_CONSECUTIVE_FAILURES", 2)
+    down, up = FakeHTTPProvider("down", fail=True), FakeHTTPProvider("up")
+    provider = make_provider(down, up)
+
+    results = [provider.make_request("eth_call", [])["result"] for _ in range(5)]
+
+    assert results == ["up"] * 5
+    assert len(down.calls) == 2
+    assert provider.endpoints[0].healthy is False
+
+def test_writes_stick_to_one_endpoint_and_report_failover():
+    first, second = FakeHTTPProvider("first"), FakeHTTPProvider("second")
+    provider = make_provider(first, second)
+    moved = threading.Event()
+    provider.on_write_failover.append(moved.set)
+
+    for _ in range(3):
+        provider.make_request("eth_sendRawTransaction", ["0x00"])
+    assert len(first.calls) == 3 and not second.calls
+
+    first.fail = True
+    assert provider.make_request("eth_sendRawTransaction", ["0x00"])["result"] == "second"
+    assert provider.make_request("eth_getTransactionCount", ["0x00", "pending"])["result"] == "second"
+    assert moved.wait(1)
+
+def test_hedged_read_returns_the_backup_answer(monkeypatch):
+    monkeypatch.setattr(settings, "RPC_HEDGE_READS", True)
+    monkeypatch.setattr(settings, "RPC_HEDGE_AFTER_MS", 10)
+    stalled, backup = FakeHTTPProvider("stalled", delay=0.5), FakeHTTPProvider("backup")
+    provider = make_provider(stalled, backup)
+
+    started = time.monotonic()
+    assert provider.make_batch_request([("eth_call", [])])[0]["result"] == "backup"
+    assert time.monotonic() - started < 0.4
+
+def test_stats_and_metrics_never_expose_the_endpoint_url():
+    provider = MultiEndpointProvider(["https://mainnet.infura.io/v3/SECRETKEY", "http://localhost:8545/?key=SECRETKEY"])
+    for endpoint in provider.endpoints:
+        endpoint.provider = FakeHTTPProvider("node")
+    provider.make_request("eth_chainId", [])
+
+    assert [s["endpoint"] for s in provider.stats()] == ["0:mainnet.infura.io", "1:localhost:8545"]
+    assert "SECRETKEY" not in str(provider.stats()) + str(provider)
+    assert "SECRETKEY" not in generate_latest().decode()
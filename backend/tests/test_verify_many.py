@@ -0,0 +1,106 @@
+from web3 import Web3
+from app.config.settings import settings
+from app.services.blockchain_service import ABI, ABI_V2, BlockchainService
+
+ISSUER = "0x" + "22" * 20
+
+class FakeProvider:
+    """Answers eth_call batches from a dict of issued hashes, like the deployed contract would."""
+
+    def __init__(self, w3, contract, issued, has_verify_many=True):
+        self.w3 = w3
+        self.contract = contract
+        self.issued = issued
+        self.has_verify_many = has_verify_many
+        self.batches = []
+
+    def make_batch_request(self, requests):
+        self.batches.append(len(requests))
+        responses = []
+        for i, (_, params) in enumerate(requests):
+            function, args = self.contract.decode_function_input(params[0]["data"])
+            if function.fn_name == "verifyMany" and self.has_verify_many:
+                # v2 passes bytes32 keys; the fake stores everything by hex string
+                hashes = [h if isinstance(h, str) else h.hex() for h in args["_certHashes"]]
+                result = self.w3.codec.encode(["bool[]", "address[]", "uint256[]", "bool[]"], [
+                    [h in self.issued for h in hashes],
+                    [ISSUER if h in self.issued else "0x" + "00" * 20 for h in hashes],
+                    [1 if h in self.issued else 0 for h in hashes],
+                    [self.issued.get(h, False) for h in hashes],
+                ])
+            elif function.fn_name == "verifyCertificate" and args["_certHash"] in self.issued:
+                result = self.w3.codec.encode(
+                    ["bool", "address", "uint256", "bool"], [True, ISSUER, 1, self.issued[args["_certHash"]]]
+                )
+            else:
+                responses.append({"id": i, "error": {"code": 3, "message": "execution reverted"}})
+                continue
+            responses.append({"id": i, "result": "0x" + result.hex()})
+        return responses
+
+def make_service(issued, has_verify_many=True, version=1):
+    service = BlockchainService()
+    service.w3 = Web3()
+    service.contract = service.w3.eth.contract(address="0x" + "11" * 20, abi=ABI)
+    service.contract_v2 = service.w3.eth.contract(address="0x" + "33" * 20, abi=ABI_V2)
+    contract = service.contract_v2 if version == 2 else service.contract
+    service.w3.provider = FakeProvider(service.w3, contract, issued, has_verify_many)
+    return service
+
+def test_verify_many_chunks_into_one_batch(monkeypatch):
+    monkeypatch.setattr(settings, "VERIFY_MANY_CHUNK_SIZE", 2)
+    service = make_service({"a": False, "c": True})
+
+    results = service.verify_many_on_chain(["a", "b", "c", "d", "e"])
+
+    assert service.w3.provider.batches == [3]
+    assert results["a"] == {"exists": True, "issuer": ISSUER, "timestamp": 1, "revoked": False}
+    assert results["b"]["exists"] is False
+    assert results["c"]["revoked"] is True
+
+def test_falls_back_to_verify_certificate_without_verify_many():
+    service = make_service({"a": False}, has_verify_many=False)
+
+    results = service.verify_many_on_chain(["a", "b"])
+
+    assert service.supports_verify_many is False
+    assert results["a"]["exists"] is True
+    assert results["b"] is None
+
+def test_v2_reads_use_bytes32_keys():
+    issued_hash = "ab" * 32
+    service = make_service({issued_hash: True}, version=2)
+
+    results = service.verify_many_on_chain([issued_hash, "cd" * 32], contract_version=2)
+
+    assert results[issued_hash]["revoked"] is True
+    assert results["cd" * 32]["exists"] is False
+
+class FailingProvider:
+    """Fails every call of a batch the way a node does when it is rate limited."""
+
+    def make_batch_request(self, requests):
+        return [{"id": i, "error": {"code": -32005, "message": "rate limit exceeded"}} for i in range(len(requests))]
+
+def test_node_errors_do_not_disable_verify_many():
+    service = make_service({"a": False})
+    service.w3.provider = FailingProvider()
+
+    results = service.verify_many_on_chain(["a", "b"])
+
+    assert results == {"a": None, "b": None}
+    assert service.supports_verify_many is True
+
+class EmptyProvider:
+    """Answers eth_call with no data, as for a contract without the called function and no fallback."""
+
+    def make_batch_request(self, requests):
+        return [{"id": i, "result": "0x"} for i in range(len(requests))]
+
+def test_empty_results_disable_verify_many():
+    service = make_service({"a": False})
+    service.w3.provider = EmptyProvider()
+
+    service.verify_many_on_chain(["a"])
+
+    assert service.supports_verify_many is False
@@ -10,11 +10,22 @@ contract CertificateVerifier {
         bool exists;
     }
 
+    struct Anchor {
+        address issuer;
+        uint256 timestamp;
+        uint256 size;
+        bool exists;
+    }
+
     mapping(string => Certificate) private certificates;
+    mapping(bytes32 => Anchor) private anchors;
+    mapping(bytes32 => bool) private revokedLeaves;
     address public owner;
 
     event CertificateIssued(string certHash, address indexed issuer, uint256 timestamp);
     event CertificateRevoked(string certHash, address indexed revoker);
+    event RootAnchored(bytes32 indexed root, address indexed issuer, uint256 size, uint256 timestamp);
+    event LeafRevoked(bytes32 indexed root, bytes32 indexed leaf, address indexed revoker);
 
     constructor() {
         owner = msg.sender;
@@ -45,6 +56,27 @@ contract CertificateVerifier {
         return (cert.exists, cert.issuer, cert.timestamp, cert.revoked);
     }
 
+    // Non-reverting bulk read: unknown hashes come back with exists = false
+    function verifyMany(string[] memory _certHashes) public view returns (
+        bool[] memory exists,
+        address[] memory issuers,
+        uint256[] memory timestamps,
+        bool[] memory revoked
+    ) {
+        exists = new bool[](_certHashes.length);
+        issuers = new address[](_certHashes.length);
+        timestamps = new uint256[](_certHashes.length);
+        revoked = new bool[](_certHashes.length);
+
+        for (uint256 i = 0; i < _certHashes.length; i++) {
+            Certificate memory cert = certificates[_certHashes[i]];
+            exists[i] = cert.exists;
+            issuers[i] = cert.issuer;
+            timestamps[i] = cert.timestamp;
+            revoked[i] = cert.revoked;
+        }
+    }
+
     function revokeCertificate(string memory _certHash) public {
         require(certificates[_certHash].exists, "Certificate does not exist");
         require(msg.sender == certificates[_certHash].issuer || msg.sender == owner, "Not authorized to revoke");
@@ -52,4 +84,47 @@ contract CertificateVerifier {
         certificates[_certHash].revoked = true;
         emit CertificateRevoked(_certHash, msg.sender);
     }
+
+    function anchorRoot(bytes32 _root, uint256 _size) public onlyOwner {
+        require(!anchors[_root].exists, "Root already anchored");
+
+        anchors[_root] = Anchor({
+            issuer: msg.sender,
+            timestamp: block.timestamp,
+            size: _size,
+            exists: true
+        });
+
+        emit RootAnchored(_root, msg.sender, _size, block.timestamp);
+    }
+
+    function verifyRoot(bytes32 _root) public view returns (bool, address, uint256) {
+        Anchor memory anchor = anchors[_root];
+        return (anchor.exists, anchor.issuer, anchor.timestamp);
+    }
+
+    function revokeLeaf(bytes32 _root, bytes32 _leaf, bytes32[] memory _proof) public {
+        require(anchors[_root].exists, "Root does not exist");
+        require(msg.sender == anchors[_root].issuer || msg.sender == owner, "Not authorized to revoke");
+        require(_processProof(_proof, _leaf) == _root, "Invalid inclusion proof");
+
+        revokedLeaves[_leaf] = true;
+        emit LeafRevoked(_root, _leaf, msg.sender);
+    }
+
+    function isLeafRevoked(bytes32 _leaf) public view returns (bool) {
+        return revokedLeaves[_leaf];
+    }
+
+    // Sorted-pair keccak256, so a proof is only the list of sibling hashes
+    function _processProof(bytes32[] memory _proof, bytes32 _leaf) internal pure returns (bytes32) {
+        bytes32 computed = _leaf;
+        for (uint256 i = 0; i < _proof.length; i++) {
+            bytes32 sibling = _proof[i];
+            computed = computed < sibling
+                ? keccak256(abi.encodePacked(computed, sibling))
+                : keccak256(abi.encodePacked(sibling, computed));
+        }
+        return computed;
+    }
 }
@@ -0,0 +1,149 @@
+// SPDX-License-Identifier: MIT
+pragma solidity ^0.8.0;
+
+// Certificates keyed by the raw 32-byte SHA-256 instead of its hex string.
+// A certificate fits in one storage slot and cohorts are issued in one transaction.
+contract CertificateVerifierV2 {
+    struct Certificate {
+        address issuer;
+        uint64 timestamp;
+        bool revoked;
+    }
+
+    struct Anchor {
+        address issuer;
+        uint256 timestamp;
+        uint256 size;
+        bool exists;
+    }
+
+    mapping(bytes32 => Certificate) private certificates;
+    mapping(bytes32 => Anchor) private anchors;
+    mapping(bytes32 => bool) private revokedLeaves;
+    address public owner;
+
+    event CertificateIssued(bytes32 indexed certHash, address indexed issuer, uint256 timestamp);
+    event CertificateRevoked(bytes32 indexed certHash, address indexed revoker);
+    event RootAnchored(bytes32 indexed root, address indexed issuer, uint256 size, uint256 timestamp);
+    event LeafRevoked(bytes32 indexed root, bytes32 indexed leaf, address indexed revoker);
+
+    constructor() {
+        owner = msg.sender;
+    }
+
+    modifier onlyOwner() {
+        require(msg.sender == owner, "Only owner can perform this action");
+        _;
+    }
+
+    function issueCertificate(bytes32 _certHash) public onlyOwner {
+        require(certificates[_certHash].issuer == address(0), "Certificate hash already exists");
+        _issue(_certHash);
+    }
+
+    // Hashes that are already issued are skipped so one duplicate does not fail the cohort
+    function issueBatch(bytes32[] calldata _certHashes) public onlyOwner {
+        for (uint256 i = 0; i < _certHashes.length; i++) {
+            if (certificates[_certHashes[i]].issuer == address(0)) {
+                _issue(_certHashes[i]);
+            }
+        }
+    }
+
+    function verifyCertificate(bytes32 _certHash) public view returns (bool, address, uint256, bool) {
+        Certificate memory cert = certificates[_certHash];
+        return (cert.issuer != address(0), cert.issuer, cert.timestamp, cert.revoked);
+    }
+
+    function verifyMany(bytes32[] calldata _certHashes) public view returns (
+        bool[] memory exists,
+        address[] memory issuers,
+        uint256[] memory timestamps,
+        bool[] memory revoked
+    ) {
+        exists = new bool[](_certHashes.length);
+        issuers = new address[](_certHashes.length);
+        timestamps = new uint256[](_certHashes.length);
+        revoked = new bool[](_certHashes.length);
+
+        for (uint256 i = 0; i < _certHashes.length; i++) {
+            Certificate memory cert = certificates[_certHashes[i]];
+            exists[i] = cert.issuer != address(0);
+            issuers[i] = cert.issuer;
+            timestamps[i] = cert.timestamp;
+            revoked[i] = cert.revoked;
+        }
+    }
+
+    function revokeCertificate(bytes32 _certHash) public {
+        _revoke(_certHash);
+    }
+
+    function revokeBatch(bytes32[] calldata _certHashes) public {
+        for (uint256 i = 0; i < _certHashes.length; i++) {
+            _revoke(_certHashes[i]);
+        }
+    }
+
+    function anchorRoot(bytes32 _root, uint256 _size) public onlyOwner {
+        require(!anchors[_root].exists, "Root already anchored");
+
+        anchors[_root] = Anchor({
+            issuer: msg.sender,
+            timestamp: block.timestamp,
+            size: _size,
+            exists: true
+        });
+
+        emit RootAnchored(_root, msg.sender, _size, block.timestamp);
+    }
+
+    function verifyRoot(bytes32 _root) public view returns (bool, address, uint256) {
+        Anchor memory anchor = anchors[_root];
+        return (anchor.exists, anchor.issuer, anchor.timestamp);
+    }
+
+    function revokeLeaf(bytes32 _root, bytes32 _leaf, bytes32[] memory _proof) public {
+        require(anchors[_root].exists, "Root does not exist");
+        require(msg.sender == anchors[_root].issuer || msg.sender == owner, "Not authorized to revoke");
+        require(_processProof(_proof, _leaf) == _root, "Invalid inclusion proof");
+
+        revokedLeaves[_leaf] = true;
+        emit LeafRevoked(_root, _leaf, msg.sender);
+    }
+
+    function isLeafRevoked(bytes32 _leaf) public view returns (bool) {
+        return revokedLeaves[_leaf];
+    }
+
+    function _issue(bytes32 _certHash) internal {
+        certificates[_certHash] = Certificate({
+            issuer: msg.sender,
+            timestamp: uint64(block.timestamp),
+            revoked: false
+        });
+
+        emit CertificateIssued(_certHash, msg.sender, block.timestamp);
+    }
+
+    function _revoke(bytes32 _certHash) internal {
+        address issuer = certificates[_certHash].issuer;
+        require(issuer != address(0), "Certificate does not exist");
+        require(msg.sender == issuer || msg.sender == owner, "Not authorized to revoke");
+
+        certificates[_certHash].revoked = true;
+        emit CertificateRevoked(_certHash, msg.sender);
+    }
+
+    // Sorted-pair keccak256, so a proof is only the list of sibling hashes
+    function _processProof(bytes32[] memory _proof, bytes32 _leaf) internal pure returns (bytes32) {
+        bytes32 computed = _leaf;
+        for (uint256 i = 0; i < _proof.length; i++) {
+            bytes32 sibling = _proof[i];
+            computed = computed < sibling
+                ? keccak256(abi.encodePacked(computed, sibling))
+                : keccak256(abi.encodePacked(sibling, computed));
+        }
+        return computed;
+    }
+}